@@ -1,15 +1,30 @@
+import asyncio
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from app.cache import ResultCache
 from app.config import settings
 from app.models import TokenData, User, UserInDB, Token
+from app.timing import timed
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Users resolved from already-verified tokens, keyed by token hash. Entries
+# expire at the token's exp claim, so an expired token is decoded (and rejected)
+# again rather than served from here.
+token_cache = ResultCache(
+    max_bytes=settings.AUTH_TOKEN_CACHE_MAX_BYTES,
+    default_ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+)
+
 # Fake users database (replace with real database in production)
 fake_users_db = {
     "admin": {
@@ -17,6 +32,7 @@ fake_users_db = {
         "email": "admin@nyctlc.com",
         "hashed_password": "$2b$12$EixZaYVK1fsbw1ZfbX3OXePaWxn96p36WQoeG6Lruj3vjPGga31lW",  # password: secret
         "disabled": False,
+        "is_admin": True,
     }
 }
 
@@ -39,6 +55,90 @@ def authenticate_user(username: str, password: str):
         return False
     return user
 
+class LoginBusyError(Exception):
+    """Raised when too many logins are already waiting for password verification"""
+
+class PasswordVerifier:
+    """
+    Runs authenticate_user (bcrypt, ~250 ms CPU at cost 12) on a small dedicated
+    thread pool so a burst of logins never blocks the event loop. bcrypt releases
+    the GIL while hashing, so threads give real parallelism up to ``workers``.
+    At most ``max_pending`` logins may be running or queued; beyond that
+    authenticate() raises LoginBusyError instead of letting the queue grow.
+    """
+    
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._verify_total = 0.0
+    
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="auth")
+            return self._executor
+    
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False)
+    
+    async def authenticate(self, username: str, password: str):
+        """authenticate_user off the event loop; raises LoginBusyError when saturated"""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise LoginBusyError()
+            self._pending += 1
+        queued_at = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, self._verify, username, password, queued_at)
+        finally:
+            with self._lock:
+                self._pending -= 1
+    
+    def _verify(self, username: str, password: str, queued_at: float):
+        started = time.perf_counter()
+        with self._lock:
+            self._running += 1
+            self._wait_total += started - queued_at
+        try:
+            return authenticate_user(username, password)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                self._verify_total += time.perf_counter() - started
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            done = self._completed
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "completed": done,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(self._wait_total / done * 1000, 2) if done else 0.0,
+                "avg_verify_ms": round(self._verify_total / done * 1000, 2) if done else 0.0,
+            }
+
+password_verifier = PasswordVerifier(
+    workers=settings.AUTH_HASH_WORKERS,
+    max_pending=settings.AUTH_MAX_PENDING_LOGINS
+)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -49,7 +149,20 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
 async def get_current_user(token: str = Depends(oauth2_scheme)):
+    with timed("auth"):
+        return _user_for_token(token)
+
+def _user_for_token(token: str) -> User:
+    """Resolve a bearer token to its user, via the verified-token cache"""
+    key = _token_key(token)
+    user = token_cache.get(key)
+    if user is not None:
+        return user
+    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -66,9 +179,18 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     user = get_user(username=token_data.username)
     if user is None:
         raise credentials_exception
+    
+    expires_in = payload.get("exp", 0) - time.time()
+    if expires_in > 0:
+        token_cache.set(key, user, ttl=expires_in)
     return user
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
     if current_user.disabled:
         raise HTTPException(status_code=400, detail="Inactive user")
+    return current_user
+
+async def get_current_admin_user(current_user: User = Depends(get_current_active_user)):
+    if not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required")
     return current_user
\ No newline at end of file
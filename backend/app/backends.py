@@ -0,0 +1,316 @@
+"""
+Storage backends behind app.database.Database.
+
+A backend supplies DB-API connections for the pool and names the SQL dialect
+the routers' QueryBuilder should emit. Selected with DB_BACKEND:
+
+- ``mssql`` (default): Azure SQL through pyodbc (T-SQL)
+- ``duckdb``: an in-process DuckDB database over the Parquet layout the
+  notebook writes (``<DUCKDB_PARQUET_PATH>/validated/{yellow_taxi,green_taxi,
+  fhv,fhvhv}``). fact_trip is a view over the files, so trip queries scan
+  Parquet directly; the aggregate tables the dashboard reads are built from
+  it when the backend opens (one columnar pass, seconds for ~1B rows).
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+try:
+    import pyodbc
+except ImportError:  # Also raised when the ODBC driver manager is missing
+    pyodbc = None
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+from app.versioning import STATS_WATERMARK_QUERY, WATERMARK_QUERY
+
+logger = logging.getLogger(__name__)
+
+# service_type -> folder under validated/, in trip_id order
+PARQUET_FOLDERS = {
+    "yellow": "yellow_taxi",
+    "green": "green_taxi",
+    "fhv": "fhv",
+    "fhvhv": "fhvhv",
+}
+
+# Synthesized trip_id: service (bits 48-49), file within the service (bits 32-47),
+# row within the file (bits 0-31). Below 2**53 so JavaScript clients keep it
+# exact; stable as long as the files do not change.
+_FILE_BITS = 32
+_SERVICE_BITS = 48
+
+
+class Backend:
+    """Connection factory plus dialect for one storage engine"""
+
+    name = ""
+    dialect = "tsql"
+    # Probe app.versioning.DataVersion polls for the data watermark
+    watermark_query = WATERMARK_QUERY
+
+    def open(self):
+        """Prepare the store before the pool opens its connections"""
+
+    def connect(self) -> Any:
+        """New DB-API connection (called by the pool)"""
+        raise NotImplementedError
+
+    def close(self):
+        """Release resources after the pool is closed"""
+
+    def stats(self) -> Dict[str, Any]:
+        return {"name": self.name, "dialect": self.dialect}
+
+
+class MSSQLBackend(Backend):
+    """Azure SQL / SQL Server through pyodbc"""
+
+    name = "mssql"
+    dialect = "tsql"
+
+    def __init__(self, connection_string: str):
+        self.connection_string = connection_string
+
+    def connect(self) -> Any:
+        if pyodbc is None:
+            raise RuntimeError("pyodbc (and the ODBC driver) is required for DB_BACKEND=mssql")
+        return pyodbc.connect(self.connection_string)
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+FACT_TRIP_SELECT = """
+    SELECT
+        CAST({service_index} * {service_step} + t.file_index * {file_step} + t.file_row_number AS BIGINT) AS trip_id,
+        CAST(t.service_type AS VARCHAR) AS service_type,
+        CAST(t.pickup_datetime AS TIMESTAMP) AS pickup_datetime,
+        CAST(t.dropoff_datetime AS TIMESTAMP) AS dropoff_datetime,
+        CAST(t.pickup_location_id AS INTEGER) AS pickup_location_id,
+        CAST(t.dropoff_location_id AS INTEGER) AS dropoff_location_id,
+        {pickup_borough} AS pickup_borough,
+        {pickup_zone} AS pickup_zone,
+        {dropoff_borough} AS dropoff_borough,
+        {dropoff_zone} AS dropoff_zone,
+        CAST(t.trip_distance AS DOUBLE) AS trip_distance,
+        CAST(t.total_amount AS DOUBLE) AS total_amount,
+        CAST(t.trip_duration_sec AS INTEGER) AS trip_duration_sec,
+        CAST(t.pickup_date AS DATE) AS pickup_date,
+        {is_valid} AS is_valid,
+        CAST(NULL AS TIMESTAMP) AS created_at
+    FROM read_parquet({path}) AS t
+    {joins}
+"""
+
+# The notebook leaves FHV zones empty and invalidates unknown pickups in SQL
+FHV_JOINS = """
+    LEFT JOIN dim_taxi_zone AS pz ON pz.location_id = t.pickup_location_id
+    LEFT JOIN dim_taxi_zone AS dz ON dz.location_id = t.dropoff_location_id
+"""
+
+# Same definitions as the notebook's aggregation cells and app.rollups
+AGGREGATE_TABLES_SQL = """
+CREATE OR REPLACE TABLE agg_daily_metrics AS
+SELECT
+    pickup_date AS metric_date,
+    service_type,
+    COUNT(*) AS total_trips,
+    CAST(SUM(total_amount) AS DECIMAL(18, 2)) AS total_revenue,
+    CAST(AVG(trip_distance) AS DECIMAL(18, 2)) AS avg_trip_distance,
+    CAST(AVG(trip_duration_sec) AS DECIMAL(18, 2)) AS avg_trip_duration_sec,
+    CAST(AVG(total_amount) AS DECIMAL(18, 2)) AS avg_fare_amount,
+    {built_at} AS created_at
+FROM fact_trip
+WHERE is_valid = 1
+GROUP BY pickup_date, service_type
+ORDER BY metric_date, service_type;
+
+CREATE OR REPLACE TABLE agg_daily_borough_metrics AS
+SELECT
+    pickup_date AS metric_date,
+    service_type,
+    COALESCE(pickup_borough, 'Unknown') AS pickup_borough,
+    COUNT(*) AS total_trips,
+    CAST(SUM(total_amount) AS DECIMAL(18, 2)) AS total_revenue,
+    CAST(SUM(trip_distance) AS DECIMAL(18, 2)) AS total_distance,
+    COUNT(CASE WHEN service_type <> 'fhv' THEN trip_distance END) AS distance_trips,
+    CAST(SUM(trip_duration_sec) AS BIGINT) AS total_duration_sec,
+    {built_at} AS created_at
+FROM fact_trip
+WHERE is_valid = 1
+GROUP BY pickup_date, service_type, COALESCE(pickup_borough, 'Unknown')
+ORDER BY metric_date, service_type;
+
+CREATE OR REPLACE TABLE agg_service_stats AS
+SELECT
+    service_type,
+    COUNT(*) AS total_trips,
+    CAST(SUM(is_valid) AS BIGINT) AS valid_trips,
+    COALESCE(SUM(CASE WHEN is_valid = 1 THEN total_amount END), 0) AS total_revenue,
+    MIN(CASE WHEN is_valid = 1 THEN pickup_date END) AS min_pickup_date,
+    MAX(CASE WHEN is_valid = 1 THEN pickup_date END) AS max_pickup_date,
+    MAX(trip_id) AS max_trip_id,
+    {built_at} AS refreshed_at
+FROM fact_trip
+GROUP BY service_type;
+"""
+
+ZONES_TABLE_SQL = """
+CREATE OR REPLACE TABLE dim_taxi_zone AS
+SELECT
+    CAST(LocationID AS INTEGER) AS location_id,
+    CAST(Borough AS VARCHAR) AS borough,
+    CAST(Zone AS VARCHAR) AS zone_name,
+    CAST(service_zone AS VARCHAR) AS service_zone
+FROM read_csv_auto({path}, header = true)
+"""
+
+EMPTY_ZONES_TABLE_SQL = """
+CREATE OR REPLACE TABLE dim_taxi_zone (
+    location_id INTEGER, borough VARCHAR, zone_name VARCHAR, service_zone VARCHAR
+)
+"""
+
+
+class DuckDBBackend(Backend):
+    """
+    In-process DuckDB over the validated/ Parquet folders.
+
+    Pool connections are cursors on one shared in-memory database, so they
+    all see the same views and tables. Remote roots (``abfss://``, ``s3://``)
+    work through DuckDB's azure/httpfs extensions, which it autoloads.
+    New Parquet loads are picked up on restart.
+    """
+
+    name = "duckdb"
+    dialect = "duckdb"
+    watermark_query = STATS_WATERMARK_QUERY
+
+    def __init__(
+        self,
+        parquet_path: str,
+        zones_csv: str = "",
+        threads: int = 0,
+        memory_limit: str = ""
+    ):
+        self.parquet_path = parquet_path.rstrip("/")
+        self.zones_csv = zones_csv
+        self.threads = threads
+        self.memory_limit = memory_limit
+        self._lock = threading.Lock()
+        self._conn = None
+        self.services: Dict[str, int] = {}
+        self.built_at: Optional[datetime] = None
+        self.build_seconds: Optional[float] = None
+
+    def folder_glob(self, service: str) -> str:
+        return f"{self.parquet_path}/validated/{PARQUET_FOLDERS[service]}/**/*.parquet"
+
+    def open(self):
+        """Create fact_trip over the Parquet files and build the aggregate tables (once)"""
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._build()
+
+    def _build(self):
+        if duckdb is None:
+            raise RuntimeError("duckdb is required for DB_BACKEND=duckdb")
+        config = {}
+        if self.threads:
+            config["threads"] = self.threads
+        if self.memory_limit:
+            config["memory_limit"] = self.memory_limit
+        conn = duckdb.connect(":memory:", config=config)
+        started = time.perf_counter()
+        try:
+            if self.zones_csv:
+                conn.execute(ZONES_TABLE_SQL.format(path=_quote(self.zones_csv)))
+            else:
+                conn.execute(EMPTY_ZONES_TABLE_SQL)
+
+            selects = []
+            services = {}
+            for index, service in enumerate(PARQUET_FOLDERS):
+                files = conn.execute("SELECT COUNT(*) FROM glob(?)", [self.folder_glob(service)]).fetchone()[0]
+                if not files:
+                    logger.warning("No Parquet files for %s under %s", service, self.folder_glob(service))
+                    continue
+                services[service] = files
+                selects.append(self._service_select(index, service))
+            if not selects:
+                raise RuntimeError(f"No Parquet files under {self.parquet_path}/validated/")
+            conn.execute("CREATE OR REPLACE VIEW fact_trip AS " + "\nUNION ALL\n".join(selects))
+
+            built_at = datetime.utcnow().replace(microsecond=0)
+            literal = f"TIMESTAMP '{built_at.isoformat(' ')}'"
+            for statement in AGGREGATE_TABLES_SQL.split(";"):
+                if statement.strip():
+                    conn.execute(statement.format(built_at=literal))
+        except Exception:
+            conn.close()
+            raise
+
+        self.services = services
+        self.built_at = built_at
+        self.build_seconds = round(time.perf_counter() - started, 3)
+        logger.info("DuckDB backend ready over %s (%s) in %.1fs", self.parquet_path,
+                    ", ".join(f"{s}: {n} files" for s, n in services.items()), self.build_seconds)
+        return conn
+
+    def _service_select(self, index: int, service: str) -> str:
+        fhv = service == "fhv"
+        column = "COALESCE(t.{0}, {1}.{2})" if fhv else "t.{0}"
+        return FACT_TRIP_SELECT.format(
+            service_index=index,
+            service_step=1 << _SERVICE_BITS,
+            file_step=1 << _FILE_BITS,
+            pickup_borough=column.format("pickup_borough", "pz", "borough"),
+            pickup_zone=column.format("pickup_zone", "pz", "zone_name"),
+            dropoff_borough=column.format("dropoff_borough", "dz", "borough"),
+            dropoff_zone=column.format("dropoff_zone", "dz", "zone_name"),
+            is_valid=(
+                "CASE WHEN t.pickup_location_id IS NULL THEN 0 ELSE CAST(t.is_valid AS INTEGER) END"
+                if fhv else "CAST(t.is_valid AS INTEGER)"
+            ),
+            path=_quote(self.folder_glob(service)),
+            joins=FHV_JOINS if fhv else "",
+        )
+
+    def connect(self) -> Any:
+        if self._conn is None:
+            self.open()
+        return self._conn.cursor()
+
+    def close(self):
+        with self._lock:
+            conn, self._conn = self._conn, None
+        if conn is not None:
+            conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **super().stats(),
+            "parquet_path": self.parquet_path,
+            "services": dict(self.services),
+            "built_at": self.built_at.isoformat() if self.built_at else None,
+            "build_seconds": self.build_seconds,
+        }
+
+
+def create_backend(settings) -> Backend:
+    """The backend selected by settings.DB_BACKEND"""
+    if settings.DB_BACKEND == "duckdb":
+        return DuckDBBackend(
+            settings.DUCKDB_PARQUET_PATH,
+            zones_csv=settings.DUCKDB_ZONES_CSV,
+            threads=settings.DUCKDB_THREADS,
+            memory_limit=settings.DUCKDB_MEMORY_LIMIT
+        )
+    return MSSQLBackend(settings.database_url)
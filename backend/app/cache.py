@@ -0,0 +1,342 @@
+import asyncio
+import functools
+import json
+import threading
+import time
+from collections import OrderedDict
+from enum import Enum
+from typing import Any, Callable, Dict, Optional, Tuple
+from fastapi import Request, Response
+from pydantic import BaseModel
+from app.compression import add_vary, choose_encoding, compressible, encoded_etag, precompress
+from app.config import settings
+from app.metrics import registry
+from app.versioning import DataVersion, data_version, etag_matches, make_etag
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "size")
+
+    def __init__(self, value: Any, expires_at: float, size: int):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+
+
+CACHE_REQUESTS = registry.counter(
+    "cache_requests_total",
+    "cached() endpoint calls by namespace and outcome (hit, miss, coalesced, not_modified)",
+    ("namespace", "result")
+)
+
+
+class _Encoded:
+    """A Response cached together with its pre-compressed bodies ({encoding: bytes})"""
+    __slots__ = ("response", "variants")
+
+    def __init__(self, response: Response, variants: Dict[str, bytes]):
+        self.response = response
+        self.variants = variants
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate the memory cost of a cached value by its serialized size"""
+    if isinstance(value, _Encoded):
+        return len(value.response.body) + sum(len(body) for body in value.variants.values())
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode())
+    if isinstance(value, Response):
+        return len(value.body)
+    if isinstance(value, BaseModel):
+        return len(value.model_dump_json())
+    return len(json.dumps(value, default=str))
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache with per-entry TTL and a memory ceiling in bytes.
+
+    Entries are evicted least-recently-used first whenever the total estimated
+    size would exceed ``max_bytes``; expired entries are dropped on access.
+    """
+
+    def __init__(self, max_bytes: int, default_ttl: float):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._data: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the cached value or ``default``; refreshes LRU position on hit"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._misses += 1
+                return default
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self._expirations += 1
+                self._misses += 1
+                return default
+            self._data.move_to_end(key)
+            self._hits += 1
+            return entry.value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, size: Optional[int] = None):
+        """Store a value; values larger than the whole cache are not stored"""
+        if size is None:
+            size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            while self._data and self._bytes + size > self.max_bytes:
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self._evictions += 1
+            self._data[key] = _Entry(value, expires_at, size)
+            self._bytes += size
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of size and hit/miss/eviction counters"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._data
+
+    def _remove(self, key: str):
+        entry = self._data.pop(key)
+        self._bytes -= entry.size
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical cache misses: the first caller for a key
+    starts the work as a task and later callers await that same task instead
+    of running the query again. The task is shielded, so a caller that goes
+    away does not cancel the work the others are waiting for.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, "asyncio.Future"] = {}
+        self._executions = 0
+        self._coalesced = 0
+
+    async def run(self, key: str, func: Callable) -> Tuple[Any, bool]:
+        """Await ``func()`` for ``key``; returns (result, shared) where shared means coalesced"""
+        task = self._inflight.get(key)
+        shared = task is not None
+        if shared:
+            self._coalesced += 1
+        else:
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            self._executions += 1
+            task.add_done_callback(functools.partial(self._done, key))
+        return await asyncio.shield(task), shared
+
+    def _done(self, key: str, task: "asyncio.Future"):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved even if every waiter went away
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._inflight),
+            "executions": self._executions,
+            "coalesced": self._coalesced,  # Duplicate DB calls avoided
+        }
+
+
+def _key_part(value: Any) -> str:
+    if isinstance(value, Enum):
+        return str(value.value)
+    return str(value)
+
+
+def make_cache_key(namespace: str, **params: Any) -> str:
+    """Build a deterministic cache key from a namespace and query parameters"""
+    parts = "&".join(f"{name}={_key_part(params[name])}" for name in sorted(params))
+    return f"{namespace}?{parts}"
+
+
+def _encode(result: Any) -> Any:
+    """Compress cacheable Response bodies once, when stored, instead of on every hit"""
+    if isinstance(result, Response) and compressible(result.headers.get("content-type"), len(result.body)):
+        return _Encoded(result, precompress(result.body))
+    return result
+
+
+def _respond(result: Any, response: Optional[Response], encoding: Optional[str] = None) -> Any:
+    """
+    A Response returned by the endpoint bypasses the injected one, so hand out a
+    fresh copy carrying its headers (the cached instance is shared between requests).
+    Pre-compressed entries are sent in ``encoding`` when the client accepts it.
+    """
+    variants: Dict[str, bytes] = {}
+    if isinstance(result, _Encoded):
+        result, variants = result.response, result.variants
+    if not isinstance(result, Response):
+        return result
+    body = variants.get(encoding, result.body) if encoding else result.body
+    fresh = Response(content=body, status_code=result.status_code, media_type=result.media_type)
+    for source in (result, response):
+        if isinstance(source, Response):
+            for name, value in source.headers.items():
+                if name not in ("content-length", "content-type"):
+                    fresh.headers[name] = value
+    if variants:
+        add_vary(fresh.headers)
+    if variants and encoding in variants:
+        fresh.headers["Content-Encoding"] = encoding
+        if "etag" in fresh.headers:
+            fresh.headers["ETag"] = encoded_etag(fresh.headers["etag"], encoding)
+    return fresh
+
+
+def _revalidated_encoding(if_none_match: str, etag: str, encoding: Optional[str]) -> Optional[str]:
+    """``encoding`` if the client's matching validator is the one sent with that coding ("abc-br")"""
+    if encoding is None:
+        return None
+    candidates = {c.strip()[2:] if c.strip().startswith("W/") else c.strip() for c in if_none_match.split(",")}
+    return encoding if encoded_etag(etag, encoding) in candidates else None
+
+
+def _not_modified(response: Optional[Response], encoding: Optional[str] = None) -> Response:
+    """
+    Empty 304 carrying the validator and caching headers already set on
+    ``response``; for a compressed variant, its ETag and Vary as the 200 sent them.
+    """
+    not_modified = Response(status_code=304)
+    if isinstance(response, Response):
+        for name, value in response.headers.items():
+            if name not in ("content-length", "content-type"):
+                not_modified.headers[name] = value
+    if encoding:
+        add_vary(not_modified.headers)
+        if "etag" in not_modified.headers:
+            not_modified.headers["ETag"] = encoded_etag(not_modified.headers["etag"], encoding)
+    return not_modified
+
+
+def cached(
+    namespace: str,
+    ttl: Optional[float] = None,
+    cache_control: Optional[str] = None,
+    vary: Optional[str] = None,
+    exclude: Tuple[str, ...] = ("response", "request", "current_user"),
+    cache: Optional["ResultCache"] = None,
+    versions: Optional[DataVersion] = None,
+    flight: Optional[SingleFlight] = None,
+):
+    """
+    Cache an async endpoint's result in the shared result cache.
+
+    The key is built from the endpoint's keyword arguments (minus ``exclude``),
+    so every query parameter participates. If the endpoint takes a ``Response``
+    the ``Cache-Control``, ``Vary`` and ``X-Cache`` headers are set on both hits and misses,
+    including when the endpoint returns a ``Response`` (e.g. Arrow bytes) itself.
+
+    Once the data version is known, entries are keyed by it and a strong
+    ``ETag`` (version + parameters) is sent. If the endpoint takes a ``Request``
+    whose ``If-None-Match`` matches, a 304 is returned before the cache or the
+    endpoint is consulted.
+
+    ``Response`` results worth compressing are stored gzip/brotli-encoded
+    alongside the identity body and sent in the encoding the client accepts.
+
+    Concurrent misses for the same key share one call of the endpoint
+    (``X-Cache: COALESCED`` on the callers that waited for it).
+    """
+    def decorator(func: Callable):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            store = cache if cache is not None else result_cache
+            response = kwargs.get("response")
+            if isinstance(response, Response) and cache_control:
+                response.headers["Cache-Control"] = cache_control
+            if isinstance(response, Response) and vary:
+                response.headers["Vary"] = vary
+
+            params_key = make_cache_key(
+                namespace,
+                **{name: value for name, value in kwargs.items() if name not in exclude}
+            )
+            version = (versions if versions is not None else data_version).current
+            key = f"{params_key}@{version}"
+            request = kwargs.get("request")
+            encoding = None
+            if isinstance(request, Request):
+                encoding = choose_encoding(request.headers.get("accept-encoding"))
+            if version is not None:
+                etag = make_etag(params_key, version)
+                if isinstance(response, Response):
+                    response.headers["ETag"] = etag
+                if_none_match = request.headers.get("if-none-match") if isinstance(request, Request) else None
+                if etag_matches(if_none_match, etag):
+                    CACHE_REQUESTS.inc(namespace, "not_modified")
+                    return _not_modified(response, _revalidated_encoding(if_none_match, etag, encoding))
+
+            result = store.get(key)
+            if result is not None:
+                CACHE_REQUESTS.inc(namespace, "hit")
+                if isinstance(response, Response):
+                    response.headers["X-Cache"] = "HIT"
+                return _respond(result, response, encoding)
+
+            async def load():
+                loaded = _encode(await func(*args, **kwargs))
+                store.set(key, loaded, ttl=ttl)
+                return loaded
+
+            result, shared = await (flight if flight is not None else single_flight).run(key, load)
+            CACHE_REQUESTS.inc(namespace, "coalesced" if shared else "miss")
+            if isinstance(response, Response):
+                response.headers["X-Cache"] = "COALESCED" if shared else "MISS"
+            return _respond(result, response, encoding)
+
+        return wrapper
+    return decorator
+
+
+# Shared cache and miss coalescing for all routers
+single_flight = SingleFlight()
+result_cache = ResultCache(
+    max_bytes=settings.CACHE_MAX_BYTES,
+    default_ttl=settings.CACHE_DEFAULT_TTL_SEC
+)
@@ -0,0 +1,109 @@
+"""
+Columnar (Apache Arrow / Parquet) responses.
+
+Clients that load results straight into DataFrames can ask for
+``Accept: application/vnd.apache.arrow.stream`` or ``?format=arrow|parquet``
+instead of JSON. Record batches are built from cursor row batches (or the
+in-memory column arrays) without any per-row model objects. pyarrow is
+optional; without it only JSON is served.
+"""
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+from fastapi import Query, Request
+from app.models import ResponseFormat
+from app.query_builder import SCHEMA
+from app.timing import timed
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
+MEDIA_TYPES = {
+    ResponseFormat.ARROW: ARROW_STREAM_MEDIA_TYPE,
+    ResponseFormat.PARQUET: PARQUET_MEDIA_TYPE,
+}
+
+
+def arrow_available() -> bool:
+    return pa is not None
+
+
+def negotiate_format(
+    request: Request,
+    requested: Optional[ResponseFormat] = Query(
+        None, alias="format", description="json, arrow or parquet (overrides the Accept header)"
+    )
+) -> ResponseFormat:
+    """Dependency picking the response format from ?format= or the Accept header"""
+    if requested is not None:
+        return requested
+    accept = request.headers.get("accept", "")
+    if ARROW_STREAM_MEDIA_TYPE in accept:
+        return ResponseFormat.ARROW
+    if PARQUET_MEDIA_TYPE in accept:
+        return ResponseFormat.PARQUET
+    return ResponseFormat.JSON
+
+
+def _arrow_type(kind: str):
+    return {
+        "int": pa.int64(),
+        "float": pa.float64(),
+        "str": pa.string(),
+        "bool": pa.bool_(),
+        "date": pa.date32(),
+        "datetime": pa.timestamp("us"),
+    }[kind]
+
+
+def schema_for(fields: Sequence[Tuple[str, str]]):
+    """Arrow schema from (name, kind) pairs, kinds as in query_builder.SCHEMA"""
+    return pa.schema([(name, _arrow_type(kind)) for name, kind in fields])
+
+
+def table_schema(table: str, columns: Sequence[str]):
+    """Arrow schema for columns of a declared table"""
+    return schema_for([(column, SCHEMA[table][column]) for column in columns])
+
+
+def _array(values, arrow_type):
+    try:
+        return pa.array(values, type=arrow_type, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # DECIMAL columns arrive from the driver as decimal.Decimal
+        return pa.array(values, from_pandas=True).cast(arrow_type)
+
+
+def batch_from_rows(schema, rows: Sequence[Sequence]):
+    """RecordBatch from a batch of row tuples in schema column order"""
+    columns = list(zip(*rows)) if rows else [()] * len(schema)
+    return pa.RecordBatch.from_arrays(
+        [_array(list(values), field.type) for values, field in zip(columns, schema)],
+        schema=schema
+    )
+
+
+def batch_from_columns(schema, columns: Dict[str, Sequence]):
+    """RecordBatch from column sequences or NumPy arrays keyed by name (NaN -> null)"""
+    return pa.RecordBatch.from_arrays(
+        [_array(columns[field.name], field.type) for field in schema],
+        schema=schema
+    )
+
+
+def serialize(response_format: ResponseFormat, schema, batches: Iterable) -> bytes:
+    """Arrow IPC stream or Parquet file bytes for the given record batches"""
+    with timed("serialize"):
+        sink = pa.BufferOutputStream()
+        if response_format == ResponseFormat.ARROW:
+            with pa.ipc.new_stream(sink, schema) as writer:
+                for batch in batches:
+                    writer.write_batch(batch)
+        else:
+            pq.write_table(pa.Table.from_batches(list(batches), schema=schema), sink)
+        return sink.getvalue().to_pybytes()
@@ -0,0 +1,78 @@
+"""
+Column-oriented result sets.
+
+Turns a list of row tuples into one typed array per column: NumPy arrays when
+NumPy is installed (int64/float64, datetime64 for dates, NULL as NaN/NaT),
+otherwise ``array.array`` for numbers and plain lists for everything else.
+Column kinds use the names from query_builder.SCHEMA and are inferred from
+the first non-NULL value when not given.
+"""
+import math
+from array import array
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+
+def infer_kind(values: Sequence[Any]) -> str:
+    """SCHEMA-style kind of a column from its first non-NULL value"""
+    for value in values:
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            return "bool"
+        if isinstance(value, int):
+            return "int"
+        if isinstance(value, (float, Decimal)):
+            return "float"
+        if isinstance(value, datetime):
+            return "datetime"
+        if isinstance(value, date):
+            return "date"
+        return "str"
+    return "str"
+
+
+def column_array(values: Sequence[Any], kind: str):
+    """One column as a typed array; ints containing NULL become floats with NaN"""
+    has_null = any(v is None for v in values)
+    if kind == "int" and has_null:
+        kind = "float"
+
+    if np is not None:
+        if kind == "int":
+            return np.array(values, dtype=np.int64)
+        if kind == "float":
+            return np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+        if kind == "date":
+            return np.array(values, dtype="datetime64[D]")
+        if kind == "datetime":
+            return np.array(values, dtype="datetime64[us]")
+        if kind == "bool" and not has_null:
+            return np.array(values, dtype=bool)
+        return list(values)
+
+    if kind == "int":
+        return array("q", values)
+    if kind == "float":
+        return array("d", [math.nan if v is None else float(v) for v in values])
+    return list(values)
+
+
+def to_columns(
+    columns: Sequence[str],
+    rows: Sequence[Sequence[Any]],
+    kinds: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """{column: array} for row tuples in ``columns`` order"""
+    kinds = kinds or {}
+    data = list(zip(*rows)) if rows else [()] * len(columns)
+    return {
+        name: column_array(values, kinds.get(name) or infer_kind(values))
+        for name, values in zip(columns, data)
+    }
@@ -0,0 +1,213 @@
+"""
+Response compression.
+
+CompressionMiddleware gzip/brotli-encodes responses whose content type is
+worth compressing (JSON, CSV, NDJSON, Arrow IPC) and whose body reaches
+COMPRESSION_MIN_BYTES; small bodies and already-compressed formats (Parquet)
+go out untouched. Streaming bodies are compressed chunk by chunk with a sync
+flush so exports stay incremental. Responses that already carry a
+Content-Encoding - the pre-compressed cache entries - are passed through.
+Brotli is optional; without it only gzip is offered.
+"""
+import gzip
+import zlib
+from typing import Dict, List, Optional, Tuple
+from app.config import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# Content types worth compressing (prefix match); Parquet is compressed already
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/vnd.apache.arrow.stream",
+    "text/",
+)
+
+ENCODINGS = ("br", "gzip")
+
+
+def supported_encodings() -> Tuple[str, ...]:
+    return ENCODINGS if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best supported coding the client accepts (q > 0), brotli preferred"""
+    if not accept_encoding:
+        return None
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    for encoding in supported_encodings():
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+def compressible(content_type: Optional[str], size: int, minimum_size: Optional[int] = None) -> bool:
+    if minimum_size is None:
+        minimum_size = settings.COMPRESSION_MIN_BYTES
+    if size < minimum_size or not content_type:
+        return False
+    return content_type.lower().startswith(COMPRESSIBLE_TYPES)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def precompress(body: bytes) -> Dict[str, bytes]:
+    """Every supported encoding of ``body``, for storing in the result cache"""
+    return {encoding: compress(body, encoding) for encoding in supported_encodings()}
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """Distinct strong validator per content coding: "abc" -> "abc-gzip" """
+    if etag.endswith('"'):
+        return f'{etag[:-1]}-{encoding}"'
+    return etag
+
+
+def add_vary(headers, value: str = "Accept-Encoding"):
+    existing = headers.get("vary")
+    if not existing:
+        headers["Vary"] = value
+    elif value.lower() not in existing.lower():
+        headers["Vary"] = f"{existing}, {value}"
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+        else:
+            self._gz = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._br.process(data) + self._br.flush()
+        return self._gz.compress(data) + self._gz.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._br.finish()
+        return self._gz.flush()
+
+
+class CompressionMiddleware:
+    """ASGI middleware applying the policy above"""
+
+    def __init__(self, app, minimum_size: Optional[int] = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_BYTES if minimum_size is None else minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = None
+        for name, value in scope.get("headers", []):
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _Responder(send, encoding, self.minimum_size))
+
+
+class _Responder:
+    """Wraps ``send``: holds the start message until the first body chunk decides the policy"""
+
+    def __init__(self, send, encoding: str, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start: Optional[dict] = None
+        self.compressor: Optional[_StreamCompressor] = None
+        self.passthrough = False
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is not None:
+            data = self.compressor.chunk(body) if body else b""
+            if not more_body:
+                data += self.compressor.finish()
+            await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
+            return
+
+        headers = _Headers(self.start["headers"])
+        content_type = headers.get("content-type")
+        # A streamed body's size is unknown; judge it on content type alone
+        size = len(body) if not more_body else self.minimum_size
+        if headers.get("content-encoding") or not compressible(content_type, size, self.minimum_size):
+            self.passthrough = True
+            await self.send(self.start)
+            await self.send(message)
+            return
+
+        headers.set("Content-Encoding", self.encoding)
+        add_vary(headers)
+        if headers.get("etag"):
+            headers.set("ETag", encoded_etag(headers.get("etag"), self.encoding))
+        headers.remove("content-length")
+
+        if not more_body:
+            data = compress(body, self.encoding)
+            headers.set("Content-Length", str(len(data)))
+            await self.send({**self.start, "headers": headers.raw})
+            await self.send({"type": "http.response.body", "body": data})
+            return
+
+        self.compressor = _StreamCompressor(self.encoding)
+        await self.send({**self.start, "headers": headers.raw})
+        await self.send({"type": "http.response.body", "body": self.compressor.chunk(body), "more_body": True})
+
+
+class _Headers:
+    """Minimal mutable view over ASGI raw headers"""
+
+    def __init__(self, raw: List[Tuple[bytes, bytes]]):
+        self.raw = list(raw)
+
+    def get(self, name: str) -> Optional[str]:
+        key = name.lower().encode("latin-1")
+        for k, v in self.raw:
+            if k.lower() == key:
+                return v.decode("latin-1")
+        return None
+
+    def remove(self, name: str):
+        key = name.lower().encode("latin-1")
+        self.raw = [(k, v) for k, v in self.raw if k.lower() != key]
+
+    def set(self, name: str, value: str):
+        self.remove(name)
+        self.raw.append((name.lower().encode("latin-1"), value.encode("latin-1")))
+
+    def __setitem__(self, name: str, value: str):
+        self.set(name, value)
@@ -1,5 +1,6 @@
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Literal, Optional
 import json
 import os
 from pathlib import Path
@@ -21,16 +22,61 @@ def find_env_file():
 
 class Settings(BaseSettings):
     # Database
-    DB_SERVER: str
-    DB_NAME: str
-    DB_USER: str
-    DB_PASSWORD: str
+    DB_BACKEND: Literal["mssql", "duckdb"] = "mssql"  # Azure SQL via pyodbc, or DuckDB over local/remote Parquet
+    DB_SERVER: Optional[str] = None  # DB_SERVER/NAME/USER/PASSWORD are required for mssql
+    DB_NAME: Optional[str] = None
+    DB_USER: Optional[str] = None
+    DB_PASSWORD: Optional[str] = None
     DB_DRIVER: str = "ODBC Driver 18 for SQL Server"
     
+    # DuckDB backend
+    DUCKDB_PARQUET_PATH: str = ""  # Folder (or abfss:// / s3:// prefix) holding validated/{yellow_taxi,green_taxi,fhv,fhvhv}
+    DUCKDB_ZONES_CSV: str = ""  # taxi_zone_lookup.csv for dim_taxi_zone and FHV borough enrichment (optional)
+    DUCKDB_THREADS: int = 0  # 0 = all cores
+    DUCKDB_MEMORY_LIMIT: str = ""  # e.g. "8GB"; empty = DuckDB's default (80% of RAM)
+    
+    # Connection pool
+    DB_POOL_MIN_SIZE: int = 1
+    DB_POOL_MAX_SIZE: int = 10
+    DB_POOL_MAX_LIFETIME_SEC: int = 1800  # Recycle connections after 30 minutes
+    DB_POOL_TIMEOUT_SEC: int = 30  # Max wait for a free connection
+    DB_POOL_PING_AFTER_SEC: int = 30  # Liveness-check connections idle longer than this
+    DB_EXECUTOR_WORKERS: int = 0  # Threads for blocking DB calls (0 = DB_POOL_MAX_SIZE)
+    SLOW_QUERY_MS: int = 1000  # Queries at least this slow go to the app.slow_query log (0 = all)
+    SLOW_QUERY_MAX_SQL_CHARS: int = 2000  # SQL text is truncated in slow-query records
+    SERVER_TIMING: bool = True  # Server-Timing header with auth/db/serialize phases
+    METRICS_PUBLIC: bool = False  # Serve /metrics without a bearer token (only when scraped on a private network)
+    
+    # Result cache (shared by all routers)
+    CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    CACHE_DEFAULT_TTL_SEC: int = 300
+    DATA_VERSION_POLL_SEC: int = 60  # How often the ETag/cache data watermark is re-read
+    
+    # Background cache warm-up of the default dashboard filters after startup
+    CACHE_WARMUP: bool = True
+    CACHE_WARMUP_DAYS: List[int] = [7, 30, 90]  # Ranges ending at the newest metric_date (env: JSON list)
+    CACHE_WARMUP_CONCURRENCY: int = 2  # Filters warmed at once, leaves pool room for live traffic
+    CACHE_WARMUP_TRIPS_PAGE_SIZE: int = 50  # The dashboard's trips page size
+    
+    # In-memory (NumPy) copy of agg_daily_metrics / agg_daily_borough_metrics
+    INMEMORY_AGGREGATES: bool = False
+    INMEMORY_REFRESH_SEC: int = 900
+    
+    # Response compression (gzip, plus brotli when installed)
+    COMPRESSION_MIN_BYTES: int = 1024  # Smaller bodies are sent uncompressed
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 5
+    
+    # Streaming exports
+    EXPORT_BATCH_SIZE: int = 5000  # Rows per fetchmany / response chunk
+    
     # JWT
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    AUTH_TOKEN_CACHE_MAX_BYTES: int = 1024 * 1024  # Verified-token cache ceiling
+    AUTH_HASH_WORKERS: int = 2  # Threads for bcrypt verification in /token
+    AUTH_MAX_PENDING_LOGINS: int = 32  # Running + queued logins before /token returns 503
     
     # API
     API_TITLE: str = "NYC TLC Trip Analytics API"
@@ -38,6 +84,16 @@ class Settings(BaseSettings):
     CORS_ORIGINS: str = '["http://localhost:4200"]'
     ALLOWED_ORIGINS: str = ""  # Alternative env var name, takes precedence
     
+    @model_validator(mode="after")
+    def check_backend_settings(self) -> "Settings":
+        if self.DB_BACKEND == "mssql":
+            missing = [name for name in ("DB_SERVER", "DB_NAME", "DB_USER", "DB_PASSWORD") if not getattr(self, name)]
+            if missing:
+                raise ValueError(f"DB_BACKEND=mssql requires {', '.join(missing)}")
+        elif not self.DUCKDB_PARQUET_PATH:
+            raise ValueError("DB_BACKEND=duckdb requires DUCKDB_PARQUET_PATH")
+        return self
+    
     @property
     def cors_origins_list(self) -> List[str]:
         # Use ALLOWED_ORIGINS if set, otherwise fall back to CORS_ORIGINS
@@ -1,53 +1,343 @@
-import pyodbc
-from typing import Optional
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
 from contextlib import contextmanager
+from app.backends import Backend, create_backend
 from app.config import settings
+from app.columns import to_columns
+from app.metrics import registry
+from app.pool import ConnectionPool
+from app.timing import RequestTiming, add_timing, current_timing
 
-class Database:
-    def __init__(self):
-        self.connection_string = settings.database_url
+# Structured (one JSON object per line) log of queries slower than SLOW_QUERY_MS
+slow_query_logger = logging.getLogger("app.slow_query")
+
+DB_QUERY_SECONDS = registry.histogram(
+    "db_query_duration_seconds",
+    "Driver time per query (execute + fetch, excluding pool wait), by query label",
+    ("query",)
+)
+DB_ROWS_FETCHED = registry.counter("db_rows_fetched_total", "Rows returned by the driver, by query label", ("query",))
+DB_QUERY_ERRORS = registry.counter("db_query_errors_total", "Queries that raised, by query label", ("query",))
+DB_QUERIES_IN_FLIGHT = registry.gauge("db_queries_in_flight", "Queries executing or being fetched")
+
+_TABLE_PATTERN = re.compile(r"\b(?:FROM|INTO|UPDATE|MERGE)\s+([A-Za-z_][\w.]*)", re.IGNORECASE)
+
+@functools.lru_cache(maxsize=256)
+def query_label(query: str) -> str:
+    """Low-cardinality metrics label for a statement: "<verb>:<first table>" (e.g. "count:fact_trip")"""
+    words = query.split(None, 2)
+    verb = words[0].lower() if words else "unknown"
+    if verb == "select" and len(words) > 1 and words[1].upper().startswith("COUNT("):
+        verb = "count"
+    match = _TABLE_PATTERN.search(query)
+    return f"{verb}:{match.group(1) if match else '-'}"
+
+def params_shape(params: Optional[tuple]) -> List[str]:
+    """Type names of the bound parameters; values are never logged"""
+    return [type(p).__name__ for p in params or ()]
+
+# Most recent slow queries, newest last, for the unauthenticated /health:
+# SQL text and parameter types go only to the app.slow_query log
+recent_slow_queries: deque = deque(maxlen=20)
+_LOG_ONLY_FIELDS = ("sql", "params")
+
+def _record_query(
+    query: str,
+    params: Optional[tuple],
+    seconds: float,
+    rows: int,
+    error: bool = False,
+    timing: Optional[RequestTiming] = None
+):
+    """Feed one finished query into the DB metrics and, above the threshold, the slow-query log"""
+    label = query_label(query)
+    DB_QUERY_SECONDS.observe(seconds, label)
+    if rows:
+        DB_ROWS_FETCHED.inc(label, amount=rows)
+    if error:
+        DB_QUERY_ERRORS.inc(label)
+    if seconds * 1000 < settings.SLOW_QUERY_MS:
+        return
+    timing = timing or current_timing()
+    record = {
+        "event": "slow_query",
+        "query": label,
+        "duration_ms": round(seconds * 1000, 1),
+        "rows": rows,
+        "error": error,
+        "params": params_shape(params),
+        "request": f"{timing.method} {timing.path}" if timing else None,
+        "sql": " ".join(query.split())[:settings.SLOW_QUERY_MAX_SQL_CHARS],
+    }
+    recent_slow_queries.append({k: v for k, v in record.items() if k not in _LOG_ONLY_FIELDS})
+    slow_query_logger.warning(json.dumps(record))
+
+class _QueryTimer:
+    """Times one statement on a checked-out connection and records it on exit"""
+    
+    __slots__ = ("query", "params", "rows", "_started")
+    
+    def __init__(self, query: str, params: Optional[tuple]):
+        self.query = query
+        self.params = params
+        self.rows = 0
+    
+    def __enter__(self):
+        DB_QUERIES_IN_FLIGHT.inc()
+        self._started = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        DB_QUERIES_IN_FLIGHT.dec()
+        elapsed = time.perf_counter() - self._started
+        add_timing("db", elapsed)
+        _record_query(self.query, self.params, elapsed, self.rows, error=exc_type is not None)
+        return False
+
+class QueryStream:
+    """
+    Cursor over a pooled connection that is read batch by batch with fetchmany,
+    so memory stays proportional to batch_size however many rows the query returns.
+    The connection goes back to the pool when the rows run out or close() is called.
+    """
     
+    def __init__(self, pool: ConnectionPool, query: str, params: Optional[tuple] = None, batch_size: int = 5000):
+        self.batch_size = batch_size
+        self.query = query
+        self.params = params
+        # close() may run outside the request's context; keep its timing for the slow-query log
+        self._timing = current_timing()
+        self._pool = pool
+        self._lock = threading.Lock()
+        self._closed = False
+        # Driver time only (execute + each fetchmany), not the consumer's time between batches
+        self._seconds = 0.0
+        self._rows = 0
+        self._entry = pool.acquire()
+        DB_QUERIES_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            self._cursor = self._entry.conn.cursor()
+            if params:
+                self._cursor.execute(query, params)
+            else:
+                self._cursor.execute(query)
+        except Exception:
+            DB_QUERIES_IN_FLIGHT.dec()
+            self._add_time(time.perf_counter() - started, calls=1)
+            _record_query(query, params, self._seconds, 0, error=True)
+            pool.release(self._entry, discard=True)
+            raise
+        self._add_time(time.perf_counter() - started, calls=1)
+        self.columns = [column[0] for column in self._cursor.description]
+    
+    def fetch(self) -> list:
+        """Next batch of row tuples; an empty list once exhausted"""
+        with self._lock:
+            if self._closed:
+                return []
+            started = time.perf_counter()
+            try:
+                rows = self._cursor.fetchmany(self.batch_size)
+            except Exception:
+                self._add_time(time.perf_counter() - started)
+                self._close(discard=True, error=True)
+                raise
+            self._add_time(time.perf_counter() - started)
+            self._rows += len(rows)
+            if not rows:
+                self._close()
+            return rows
+    
+    def _add_time(self, seconds: float, calls: int = 0):
+        # Fetches add to the request's db phase without counting as more queries
+        self._seconds += seconds
+        add_timing("db", seconds, calls)
+    
+    def close(self):
+        """Stop reading early (e.g. client disconnected) and return the connection"""
+        with self._lock:
+            self._close()
+    
+    def _close(self, discard: bool = False, error: bool = False):
+        if self._closed:
+            return
+        self._closed = True
+        DB_QUERIES_IN_FLIGHT.dec()
+        _record_query(self.query, self.params, self._seconds, self._rows, error=error, timing=self._timing)
+        try:
+            self._cursor.close()
+        except Exception:
+            discard = True
+        self._pool.release(self._entry, discard=discard)
+
+class Database:
+    def __init__(self, backend: Optional[Backend] = None):
+        # Storage engine (DB_BACKEND); decides the connections and the SQL dialect
+        self.backend = backend or create_backend(settings)
+        self.dialect = self.backend.dialect
+        self.pool = ConnectionPool(
+            connect=self.backend.connect,
+            min_size=settings.DB_POOL_MIN_SIZE,
+            max_size=settings.DB_POOL_MAX_SIZE,
+            max_lifetime=settings.DB_POOL_MAX_LIFETIME_SEC,
+            timeout=settings.DB_POOL_TIMEOUT_SEC,
+            ping_after=settings.DB_POOL_PING_AFTER_SEC,
+        )
+        # Blocking driver calls run here so async handlers never stall the event loop.
+        # Sized to the pool: more threads than connections would only queue on the pool.
+        self.max_workers = settings.DB_EXECUTOR_WORKERS or settings.DB_POOL_MAX_SIZE
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def open(self):
+        """Prepare the backend and pre-open pooled connections"""
+        self.backend.open()
+        self.pool.open()
+
+    def close(self):
+        """Release pooled connections and stop the executor threads"""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False)
+        self.pool.close()
+        self.backend.close()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Bounded thread pool for blocking database calls (created lazily)"""
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="db"
+                    )
+        return self._executor
+
+    async def run(self, func, *args, **kwargs):
+        """Run a blocking callable on the database executor and await its result"""
+        loop = asyncio.get_running_loop()
+        # Carry the request context (Server-Timing) into the worker thread
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(context.run, func, *args, **kwargs)
+        )
+
     @contextmanager
     def get_connection(self):
-        """Context manager for database connections"""
-        conn = None
-        try:
-            conn = pyodbc.connect(self.connection_string)
+        """Context manager that checks a connection out of the pool"""
+        with self.pool.connection() as conn:
             yield conn
-        except Exception as e:
-            if conn:
-                conn.rollback()
-            raise e
-        finally:
-            if conn:
-                conn.close()
-    
+
     def execute_query(self, query: str, params: Optional[tuple] = None):
         """Execute SELECT query and return results"""
-        with self.get_connection() as conn:
+        columns, rows = self.execute_query_tuples(query, params)
+        return [dict(zip(columns, row)) for row in rows]
+
+    def execute_query_tuples(self, query: str, params: Optional[tuple] = None) -> Tuple[List[str], list]:
+        """Execute SELECT query and return (column names, row tuples), no per-row dicts"""
+        with self.get_connection() as conn, _QueryTimer(query, params) as timer:
             cursor = conn.cursor()
             if params:
                 cursor.execute(query, params)
             else:
                 cursor.execute(query)
-            
+
             columns = [column[0] for column in cursor.description]
-            results = []
-            for row in cursor.fetchall():
-                results.append(dict(zip(columns, row)))
-            
-            return results
-    
+            rows = cursor.fetchall()
+            timer.rows = len(rows)
+            cursor.close()
+            return columns, rows
+
+    def execute_query_columns(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        kinds: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Execute SELECT query and return {column: typed array} (see app.columns).
+        ``kinds`` maps columns to SCHEMA types; others are inferred.
+        """
+        columns, rows = self.execute_query_tuples(query, params)
+        return to_columns(columns, rows, kinds)
+
     def execute_scalar(self, query: str, params: Optional[tuple] = None):
         """Execute query and return single value"""
-        with self.get_connection() as conn:
+        with self.get_connection() as conn, _QueryTimer(query, params) as timer:
             cursor = conn.cursor()
             if params:
                 cursor.execute(query, params)
             else:
                 cursor.execute(query)
-            
+
             result = cursor.fetchone()
+            timer.rows = 1 if result else 0
+            cursor.close()
             return result[0] if result else None
 
-db = Database()
\ No newline at end of file
+    def open_stream(self, query: str, params: Optional[tuple] = None, batch_size: int = 5000) -> QueryStream:
+        """Execute query and return a QueryStream to read it in batches"""
+        return QueryStream(self.pool, query, params, batch_size)
+
+    def iter_batches(self, query: str, params: Optional[tuple] = None, batch_size: int = 5000):
+        """Generator of row-tuple batches read with fetchmany (blocking)"""
+        stream = self.open_stream(query, params, batch_size)
+        try:
+            while True:
+                rows = stream.fetch()
+                if not rows:
+                    return
+                yield rows
+        finally:
+            stream.close()
+
+    async def stream_async(self, query: str, params: Optional[tuple] = None, batch_size: int = 5000):
+        """
+        Async generator of row batches. Each fetchmany runs on the database executor;
+        stopping iteration early closes the cursor and frees the connection.
+        """
+        stream = await self.run(self.open_stream, query, params, batch_size)
+        try:
+            while True:
+                rows = await self.run(stream.fetch)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            # Don't await: this also runs when the consuming task is cancelled
+            self.executor.submit(stream.close)
+
+    async def execute_query_async(self, query: str, params: Optional[tuple] = None):
+        """Non-blocking execute_query for use inside async handlers"""
+        return await self.run(self.execute_query, query, params)
+
+    async def execute_query_tuples_async(self, query: str, params: Optional[tuple] = None):
+        """Non-blocking execute_query_tuples"""
+        return await self.run(self.execute_query_tuples, query, params)
+
+    async def execute_query_columns_async(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        kinds: Optional[Dict[str, str]] = None
+    ):
+        """Non-blocking execute_query_columns"""
+        return await self.run(self.execute_query_columns, query, params, kinds)
+
+    async def execute_scalar_async(self, query: str, params: Optional[tuple] = None):
+        """Non-blocking execute_scalar for use inside async handlers"""
+        return await self.run(self.execute_scalar, query, params)
+
+db = Database()
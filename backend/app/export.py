@@ -0,0 +1,32 @@
+"""
+Encoders for streamed exports.
+
+Each function turns one fetchmany batch of row tuples into a single bytes
+chunk, so a response body is built batch by batch and never holds more than
+one batch in memory.
+"""
+import csv
+import io
+from datetime import date, datetime
+from typing import Any, Sequence
+from app.serialization import dumps
+
+
+def csv_header(columns: Sequence[str]) -> bytes:
+    return csv_chunk(columns, [columns])
+
+
+def csv_chunk(columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> bytes:
+    """CSV lines for a batch of rows (NULL is written as an empty field)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerows(
+        [v.isoformat() if isinstance(v, (datetime, date)) else v for v in row]
+        for row in rows
+    )
+    return buffer.getvalue().encode("utf-8")
+
+
+def ndjson_chunk(columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> bytes:
+    """One JSON object per line for a batch of rows"""
+    return b"".join(dumps(dict(zip(columns, row))) + b"\n" for row in rows)
@@ -0,0 +1,398 @@
+"""
+In-process columnar copy of the small aggregate tables.
+
+agg_daily_metrics (~7k rows) and agg_daily_borough_metrics (~50k rows) are
+loaded into NumPy column arrays so /api/aggregates/daily and /api/summary can
+be answered with vectorized filters and bincount sums instead of a database
+round trip. Enabled with INMEMORY_AGGREGATES=true; NumPy is optional and the
+routers fall back to SQL whenever the store is not loaded.
+"""
+import logging
+import time
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from app.columns import to_columns
+from app.query_builder import SCHEMA
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+logger = logging.getLogger(__name__)
+
+DAILY_QUERY = """
+    SELECT metric_date, service_type, total_trips, total_revenue,
+           avg_trip_distance, avg_trip_duration_sec, avg_fare_amount
+    FROM agg_daily_metrics
+"""
+
+BOROUGH_QUERY = """
+    SELECT metric_date, service_type, pickup_borough,
+           total_trips, total_revenue, total_distance, distance_trips
+    FROM agg_daily_borough_metrics
+"""
+
+DAILY_COLUMNS = (
+    "metric_date", "service_type", "total_trips", "total_revenue",
+    "avg_trip_distance", "avg_trip_duration_sec", "avg_fare_amount",
+)
+BOROUGH_COLUMNS = (
+    "metric_date", "service_type", "pickup_borough",
+    "total_trips", "total_revenue", "total_distance", "distance_trips",
+)
+AVG_COLUMNS = ("avg_trip_distance", "avg_trip_duration_sec", "avg_fare_amount")
+# Written as 0.0 placeholders for FHV (not NULL), so summary means leave FHV out
+FHV_PLACEHOLDER_COLUMNS = ("avg_trip_distance", "avg_fare_amount")
+
+
+def _floats(values):
+    """Float64 array (column_array already maps NULL to NaN)"""
+    return np.asarray(values, dtype=np.float64)
+
+
+def _counts(values):
+    """Int64 array with NULL (NaN) counted as 0, like ``or 0``"""
+    return np.nan_to_num(np.asarray(values, dtype=np.float64)).astype(np.int64)
+
+
+def _codes(values: Sequence[Any]) -> Tuple[List[str], Any]:
+    """Dictionary-encode strings; categories are sorted so codes sort like names"""
+    categories = sorted({v for v in values if v is not None})
+    lookup = {name: i for i, name in enumerate(categories)}
+    return categories, np.array([lookup.get(v, -1) for v in values], dtype=np.int32)
+
+
+def _bucket_starts(dates, granularity: str):
+    """First day of the week (Monday), month or year containing each datetime64[D]"""
+    if granularity == "day":
+        return dates
+    if granularity == "week":
+        days = dates.astype(np.int64)
+        return (days - (days + 3) % 7).astype("datetime64[D]")  # 1970-01-01 was a Thursday
+    unit = {"month": "M", "year": "Y"}[granularity]
+    return dates.astype(f"datetime64[{unit}]").astype("datetime64[D]")
+
+
+def _records(columns: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Row dicts from daily-shaped columns, NaN averages as None"""
+    rows = []
+    dates = columns["metric_date"].tolist()
+    services = columns["service_type"]
+    trips = columns["total_trips"].tolist()
+    revenue = columns["total_revenue"].tolist()
+    avgs = {c: columns[c].tolist() for c in AVG_COLUMNS}
+    for i in range(len(dates)):
+        row = {
+            "metric_date": dates[i],
+            "service_type": services[i],
+            "total_trips": trips[i],
+            "total_revenue": revenue[i],
+        }
+        for column in AVG_COLUMNS:
+            value = avgs[column][i]
+            row[column] = None if value != value else value  # NaN -> None
+        rows.append(row)
+    return rows
+
+
+def _rows_to_columns(rows: List[Dict[str, Any]], columns: Sequence[str], kinds: Dict[str, str]) -> Dict[str, Any]:
+    return to_columns(columns, [tuple(row[c] for c in columns) for row in rows], kinds)
+
+
+class _Snapshot:
+    """Immutable set of column arrays; swapped atomically on refresh"""
+
+    def __init__(self, columns: Dict[str, Any], categories: Dict[str, List[str]]):
+        self.columns = columns
+        self.categories = categories
+        self.rows = len(next(iter(columns.values()))) if columns else 0
+
+    def code(self, column: str, value: Optional[str]) -> Optional[int]:
+        """Code for a category value, -2 if unknown (matches nothing), None for no filter"""
+        if value is None:
+            return None
+        try:
+            return self.categories[column].index(value)
+        except ValueError:
+            return -2
+
+    def mask(self, start_date: date, end_date: date, service_type: Optional[str]):
+        dates = self.columns["metric_date"]
+        mask = (dates >= np.datetime64(start_date, "D")) & (dates <= np.datetime64(end_date, "D"))
+        code = self.code("service_type", service_type)
+        if code is not None:
+            mask &= self.columns["service_type"] == code
+        return mask
+
+
+class InMemoryAggregates:
+    """Columnar copies of agg_daily_metrics and agg_daily_borough_metrics"""
+
+    def __init__(self):
+        self._daily: Optional[_Snapshot] = None
+        self._borough: Optional[_Snapshot] = None
+        self.loaded_at: Optional[datetime] = None
+        self.load_seconds: Optional[float] = None
+
+    @property
+    def available(self) -> bool:
+        return np is not None
+
+    @property
+    def ready(self) -> bool:
+        return self._daily is not None and self._borough is not None
+
+    # ------------------------------------------------------------------ #
+    # Loading
+    # ------------------------------------------------------------------ #
+
+    def refresh(self, database):
+        """Reload both tables through ``database`` (blocking; run on the DB executor)"""
+        started = time.perf_counter()
+        # Column arrays straight from the row tuples, no per-row dicts
+        daily = database.execute_query_columns(DAILY_QUERY, kinds=SCHEMA["agg_daily_metrics"])
+        borough = database.execute_query_columns(BOROUGH_QUERY, kinds=SCHEMA["agg_daily_borough_metrics"])
+        self.load_columns(daily, borough)
+        self.load_seconds = round(time.perf_counter() - started, 3)
+        logger.info(
+            "In-memory aggregates loaded: %d daily rows, %d borough rows in %.3fs",
+            self._daily.rows, self._borough.rows, self.load_seconds
+        )
+
+    def load(self, daily_rows: List[Dict[str, Any]], borough_rows: List[Dict[str, Any]]):
+        """Build new snapshots from row dicts and swap them in"""
+        if np is None:
+            raise RuntimeError("numpy is required for the in-memory aggregate store")
+        self.load_columns(
+            _rows_to_columns(daily_rows, DAILY_COLUMNS, SCHEMA["agg_daily_metrics"]),
+            _rows_to_columns(borough_rows, BOROUGH_COLUMNS, SCHEMA["agg_daily_borough_metrics"])
+        )
+
+    def load_columns(self, daily: Dict[str, Any], borough: Dict[str, Any]):
+        """Build new snapshots from app.columns arrays and swap them in"""
+        if np is None:
+            raise RuntimeError("numpy is required for the in-memory aggregate store")
+
+        services, service_codes = _codes(daily["service_type"])
+        dates = np.asarray(daily["metric_date"], dtype="datetime64[D]")
+        # Pre-sort like the SQL endpoint: metric_date DESC, service_type ASC
+        order = np.lexsort((service_codes, -dates.astype(np.int64)))
+        daily_columns = {
+            "metric_date": dates[order],
+            "service_type": service_codes[order],
+            "total_trips": _counts(daily["total_trips"])[order],
+            "total_revenue": _floats(daily["total_revenue"])[order],
+        }
+        for column in AVG_COLUMNS:
+            daily_columns[column] = _floats(daily[column])[order]
+
+        borough_services, borough_service_codes = _codes(borough["service_type"])
+        boroughs, borough_codes = _codes(borough["pickup_borough"])
+        borough_columns = {
+            "metric_date": np.asarray(borough["metric_date"], dtype="datetime64[D]"),
+            "service_type": borough_service_codes,
+            "pickup_borough": borough_codes,
+            "total_trips": _counts(borough["total_trips"]),
+            "total_revenue": _floats(borough["total_revenue"]),
+            "total_distance": _floats(borough["total_distance"]),
+            "distance_trips": _counts(borough["distance_trips"]),
+        }
+
+        self._daily = _Snapshot(daily_columns, {"service_type": services})
+        self._borough = _Snapshot(
+            borough_columns,
+            {"service_type": borough_services, "pickup_borough": boroughs}
+        )
+        self.loaded_at = datetime.utcnow()
+
+    # ------------------------------------------------------------------ #
+    # Queries
+    # ------------------------------------------------------------------ #
+
+    def daily_columns(
+        self,
+        start_date: date,
+        end_date: date,
+        service_type: Optional[str],
+        offset: int,
+        limit: int
+    ) -> Tuple[int, Dict[str, Any]]:
+        """(total_records, columns) for one page; NumPy arrays except service_type names"""
+        snap = self._daily
+        idx = np.flatnonzero(snap.mask(start_date, end_date, service_type))
+        page = idx[offset:offset + limit]
+        cols = snap.columns
+        services = snap.categories["service_type"]
+
+        columns = {name: values[page] for name, values in cols.items()}
+        columns["service_type"] = [services[code] for code in columns["service_type"].tolist()]
+        return len(idx), columns
+
+    def daily_page(
+        self,
+        start_date: date,
+        end_date: date,
+        service_type: Optional[str],
+        offset: int,
+        limit: int
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """(total_records, rows) for one page of daily aggregates"""
+        total, cols = self.daily_columns(start_date, end_date, service_type, offset, limit)
+        return total, _records(cols)
+
+    def rollup_columns(
+        self,
+        start_date: date,
+        end_date: date,
+        service_type: Optional[str],
+        granularity: str,
+        offset: int,
+        limit: int
+    ) -> Tuple[int, Dict[str, Any]]:
+        """
+        (total_buckets, columns) for one page of week/month/year rollups, in
+        the daily page order. metric_date is the bucket's first day; averages
+        are weighted by total_trips over the days where they are not NULL.
+        """
+        snap = self._daily
+        mask = snap.mask(start_date, end_date, service_type)
+        cols = snap.columns
+        services = snap.categories["service_type"]
+        codes = cols["service_type"][mask].astype(np.int64)
+        buckets = _bucket_starts(cols["metric_date"][mask], granularity)
+        trips = cols["total_trips"][mask].astype(np.float64)
+
+        # One group per (bucket, service): unique keys, then bincount sums per group
+        width = max(len(services), 1)
+        keys = buckets.astype(np.int64) * width + codes
+        groups, inverse = np.unique(keys, return_inverse=True)
+        n = len(groups)
+        columns = {
+            "metric_date": (groups // width).astype("datetime64[D]"),
+            "service_type": groups % width,
+            "total_trips": np.bincount(inverse, weights=trips, minlength=n).astype(np.int64),
+            "total_revenue": np.bincount(inverse, weights=np.nan_to_num(cols["total_revenue"][mask]), minlength=n),
+        }
+        for column in AVG_COLUMNS:
+            values = cols[column][mask]
+            present = ~np.isnan(values)
+            weighted = np.bincount(inverse, weights=np.where(present, values * trips, 0.0), minlength=n)
+            weight = np.bincount(inverse, weights=np.where(present, trips, 0.0), minlength=n)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                columns[column] = np.where(weight > 0, weighted / weight, np.nan)
+
+        # Same order as daily pages: newest bucket first, then service name
+        order = np.lexsort((columns["service_type"], -columns["metric_date"].astype(np.int64)))
+        page = order[offset:offset + limit]
+        columns = {name: values[page] for name, values in columns.items()}
+        columns["service_type"] = [services[code] for code in columns["service_type"].tolist()]
+        return n, columns
+
+    def rollup_page(
+        self,
+        start_date: date,
+        end_date: date,
+        service_type: Optional[str],
+        granularity: str,
+        offset: int,
+        limit: int
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """(total_buckets, rows) for one page of rollups"""
+        total, cols = self.rollup_columns(start_date, end_date, service_type, granularity, offset, limit)
+        return total, _records(cols)
+
+    def summary_rows(
+        self,
+        start_date: date,
+        end_date: date,
+        service_type: Optional[str]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Same rows the SQL summary path returns: GROUPING SETS rows (per service
+        plus is_total) with trip-weighted means over non-NULL days, and
+        per-borough rows.
+        """
+        snap = self._daily
+        mask = snap.mask(start_date, end_date, service_type)
+        cols = snap.columns
+        codes = cols["service_type"][mask]
+        trips = cols["total_trips"][mask].astype(np.float64)
+        n_services = len(snap.categories["service_type"])
+
+        sums = {
+            "total_trips": np.bincount(codes, weights=trips, minlength=n_services),
+            "total_revenue": np.bincount(codes, weights=np.nan_to_num(cols["total_revenue"][mask]), minlength=n_services),
+        }
+        categories = snap.categories["service_type"]
+        fhv = codes == categories.index("fhv") if "fhv" in categories else np.zeros(len(codes), dtype=bool)
+        weights = {}
+        for column in AVG_COLUMNS:
+            # Days with a NULL average are left out of numerator and denominator
+            values = cols[column][mask]
+            known = ~np.isnan(values)
+            if column in FHV_PLACEHOLDER_COLUMNS:
+                known &= ~fhv
+            sums[column] = np.bincount(codes, weights=np.where(known, values * trips, 0.0), minlength=n_services)
+            weights[column] = np.bincount(codes, weights=np.where(known, trips, 0.0), minlength=n_services)
+
+        def make_row(service: Optional[str], picks) -> Dict[str, Any]:
+            def mean(column: str) -> Optional[float]:
+                weight = float(picks(weights, column))
+                return float(picks(sums, column)) / weight if weight else None
+
+            return {
+                "service_type": service,
+                "is_total": 1 if service is None else 0,
+                "total_trips": int(picks(sums, "total_trips")),
+                "total_revenue": float(picks(sums, "total_revenue")),
+                "avg_distance": mean("avg_trip_distance"),
+                "avg_duration_sec": mean("avg_trip_duration_sec"),
+                "avg_fare": mean("avg_fare_amount"),
+            }
+
+        present = np.unique(codes).tolist()
+        summary = [
+            make_row(snap.categories["service_type"][code], lambda table, c, code=code: table[c][code])
+            for code in present
+        ]
+        summary.append(make_row(None, lambda table, c: table[c].sum()))
+
+        bsnap = self._borough
+        bmask = bsnap.mask(start_date, end_date, service_type)
+        bcols = bsnap.columns
+        bcodes = bcols["pickup_borough"][bmask]
+        n_boroughs = len(bsnap.categories["pickup_borough"])
+        btrips = np.bincount(bcodes, weights=bcols["total_trips"][bmask].astype(np.float64), minlength=n_boroughs)
+        brevenue = np.bincount(bcodes, weights=np.nan_to_num(bcols["total_revenue"][bmask]), minlength=n_boroughs)
+        bdistance = np.bincount(bcodes, weights=np.nan_to_num(bcols["total_distance"][bmask]), minlength=n_boroughs)
+        # distance_trips counts measured distances only: the rollup builds leave out
+        # FHV, whose trip_distance the notebook writes as a 0.0 placeholder
+        bdistance_trips = np.bincount(
+            bcodes, weights=bcols["distance_trips"][bmask].astype(np.float64), minlength=n_boroughs
+        )
+
+        by_borough = [
+            {
+                "pickup_borough": bsnap.categories["pickup_borough"][code],
+                "trip_count": int(btrips[code]),
+                "total_revenue": float(brevenue[code]),
+                "avg_distance": float(bdistance[code] / bdistance_trips[code]) if bdistance_trips[code] else None,
+            }
+            for code in np.unique(bcodes).tolist()
+        ]
+        by_borough.sort(key=lambda row: row["trip_count"], reverse=True)
+        return summary, by_borough
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "available": self.available,
+            "ready": self.ready,
+            "daily_rows": self._daily.rows if self._daily else 0,
+            "borough_rows": self._borough.rows if self._borough else 0,
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+            "load_seconds": self.load_seconds,
+        }
+
+
+memory_store = InMemoryAggregates()
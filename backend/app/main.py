@@ -1,17 +1,108 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordRequestForm
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from datetime import timedelta
 from app.config import settings
-from app.auth import authenticate_user, create_access_token, get_current_active_user
+from app.database import db, recent_slow_queries
+from app.cache import result_cache, single_flight
+from app.compression import CompressionMiddleware
+from app.inmemory import memory_store
+from app.metrics import CONTENT_TYPE, MetricsMiddleware, registry
+from app.timing import ServerTimingMiddleware, timed
+from app.query_builder import SCHEMA, schema_mismatches
+from app.versioning import data_version
+from app.warmup import cache_warmer
+from app.auth import (
+    LoginBusyError,
+    create_access_token,
+    get_current_active_user,
+    password_verifier,
+    token_cache
+)
 from app.models import Token, User
-from app.routers import aggregates, trips, statistics, summary
+from app.routers import aggregates, trips, statistics, summary, dashboard
+
+logger = logging.getLogger(__name__)
+
+async def verify_schema():
+    """Log tables/columns the routers query that the live database does not have"""
+    tables = list(SCHEMA)
+    try:
+        rows = await db.execute_query_async(
+            "SELECT TABLE_NAME, COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS "
+            f"WHERE TABLE_NAME IN ({', '.join('?' for _ in tables)})",
+            tuple(tables)
+        )
+    except Exception as e:
+        logger.warning("Could not verify database schema: %s", e)
+        return
+    actual = {}
+    for row in rows:
+        # Key case follows the backend (DuckDB returns table_name/column_name)
+        table, column = row.values()
+        actual.setdefault(table, set()).add(column)
+    for problem in schema_mismatches(actual):
+        logger.error("Database schema mismatch: %s", problem)
+
+async def refresh_memory_store():
+    """Load the in-memory aggregates now and every INMEMORY_REFRESH_SEC after"""
+    while True:
+        try:
+            await db.run(memory_store.refresh, db)
+        except Exception as e:
+            logger.warning("In-memory aggregate refresh failed: %s", e)
+        await asyncio.sleep(settings.INMEMORY_REFRESH_SEC)
+
+async def poll_data_version():
+    """Re-read the data watermark every DATA_VERSION_POLL_SEC (ETags and cache keys follow it)"""
+    while True:
+        try:
+            await db.run(data_version.refresh, db)
+        except Exception as e:
+            logger.warning("Data version check failed: %s", e)
+        await asyncio.sleep(settings.DATA_VERSION_POLL_SEC)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the database connection pool on startup and drain it on shutdown"""
+    await db.run(db.open)
+    await verify_schema()
+    
+    version_poller = asyncio.create_task(poll_data_version())
+    
+    # Fill the result cache for the default dashboard filters without delaying readiness
+    warmer = None
+    if settings.CACHE_WARMUP:
+        warmer = asyncio.create_task(cache_warmer.run())
+    else:
+        cache_warmer.state = "disabled"
+    
+    refresher = None
+    if settings.INMEMORY_AGGREGATES:
+        if memory_store.available:
+            refresher = asyncio.create_task(refresh_memory_store())
+        else:
+            logger.warning("INMEMORY_AGGREGATES is set but numpy is not installed")
+    
+    yield
+    
+    version_poller.cancel()
+    if warmer:
+        warmer.cancel()
+    if refresher:
+        refresher.cancel()
+    password_verifier.close()
+    db.close()
 
 # Create FastAPI app
 app = FastAPI(
     title=settings.API_TITLE,
     version=settings.API_VERSION,
-    description="NYC TLC Trip Analytics Platform - Backend API"
+    description="NYC TLC Trip Analytics Platform - Backend API",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -24,11 +115,49 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/brotli for large JSON/CSV/Arrow bodies; cached entries arrive pre-compressed
+app.add_middleware(CompressionMiddleware)
+
+# Server-Timing: auth / db / serialize phases and the total until the response starts
+if settings.SERVER_TIMING:
+    app.add_middleware(ServerTimingMiddleware)
+
+# Outermost, so route latency includes compression and the other middleware
+app.add_middleware(MetricsMiddleware)
+
+# Stats the app already keeps, read on each /metrics scrape
+registry.register_stats(
+    "cache",
+    {"result": result_cache.stats, "auth_token": token_cache.stats},
+    label="cache",
+    gauges=("entries", "bytes", "hit_ratio"),
+    counters=("hits", "misses", "evictions", "expirations")
+)
+registry.register_stats(
+    "cache_single_flight",
+    {None: single_flight.stats},
+    gauges=("in_flight",),
+    counters=("executions", "coalesced")
+)
+registry.register_stats(
+    "db_pool",
+    {None: db.pool.stats},
+    gauges=("size", "idle", "in_use", "waiting"),
+    counters=("checkouts", "created", "recycled", "failed_pings", "timeouts")
+)
+registry.register_stats(
+    "login_pool",
+    {None: password_verifier.stats},
+    gauges=("running", "queued"),
+    counters=("completed", "rejected")
+)
+
 # Include routers
 app.include_router(aggregates.router)
 app.include_router(trips.router)
 app.include_router(statistics.router)
 app.include_router(summary.router)
+app.include_router(dashboard.router)
 
 # Authentication endpoint
 @app.post("/token", response_model=Token)
@@ -39,8 +168,19 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     Default credentials:
     - username: admin
     - password: secret
+    
+    Password checks run on a bounded worker pool; when too many logins are
+    already queued the request fails fast with 503 and Retry-After.
     """
-    user = authenticate_user(form_data.username, form_data.password)
+    try:
+        with timed("auth"):
+            user = await password_verifier.authenticate(form_data.username, form_data.password)
+    except LoginBusyError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent logins, retry shortly",
+            headers={"Retry-After": "1"},
+        )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -57,7 +197,30 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "version": settings.API_VERSION}
+    return {
+        "status": "healthy",
+        "version": settings.API_VERSION,
+        "backend": db.backend.stats(),
+        "database_pool": db.pool.stats(),
+        "cache": result_cache.stats(),
+        "single_flight": single_flight.stats(),
+        "cache_warmup": cache_warmer.stats(),
+        "data_version": data_version.stats(),
+        "auth_token_cache": token_cache.stats(),
+        "login_pool": password_verifier.stats(),
+        "inmemory_aggregates": memory_store.stats(),
+        "slow_queries": list(recent_slow_queries)
+    }
+
+# Prometheus scrape endpoint; per-route traffic is not for the public app unless METRICS_PUBLIC
+@app.get(
+    "/metrics",
+    include_in_schema=False,
+    dependencies=[] if settings.METRICS_PUBLIC else [Depends(get_current_active_user)]
+)
+async def metrics():
+    """Route latency, DB time and rows per query label, cache and pool stats (Prometheus text format)"""
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
 
 # Root endpoint
 @app.get("/")
@@ -71,7 +234,9 @@ async def root():
             "authentication": "/token",
             "daily_aggregates": "/api/aggregates/daily",
             "trips": "/api/trips",
-            "statistics": "/api/statistics"
+            "statistics": "/api/statistics",
+            "dashboard": "/api/dashboard",
+            "metrics": "/metrics"
         }
     }
 
@@ -0,0 +1,293 @@
+"""
+Prometheus metrics in the text exposition format, without a client library.
+
+Instrumented modules create their metrics on the shared ``registry``:
+
+    DB_QUERY_SECONDS = registry.histogram("db_query_duration_seconds", "...", ("query",))
+    DB_QUERY_SECONDS.observe(0.012, "select:fact_trip")
+
+Label values are passed positionally in declaration order. Recording is a
+lock, a dict lookup and an add, so it is cheap enough to leave on. Stats the
+app already keeps (pool, caches, login pool) are read when /metrics is
+scraped through ``register_stats`` instead of being counted twice.
+"""
+import bisect
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; spans cache hits (sub-millisecond) to multi-second trip scans
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, Any] = {}
+
+    def _key(self, values: Sequence[Any]) -> LabelValues:
+        if len(values) != len(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {values!r}")
+        return tuple(str(v) for v in values)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = self.header()
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set"""
+
+    kind = "counter"
+
+    def inc(self, *labels: Any, amount: float = 1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, *labels: Any) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """Value that goes up and down (e.g. requests in flight)"""
+
+    kind = "gauge"
+
+    def inc(self, *labels: Any, amount: float = 1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, *labels: Any, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, *labels: Any) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    """Bucketed observations; counts are stored per bucket and made cumulative on render"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: Any):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # [per-bucket counts (+Inf last), sum, count]
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self, *labels: Any) -> Optional[Dict[str, float]]:
+        """{"count", "sum"} for one label set, None if never observed"""
+        with self._lock:
+            series = self._values.get(self._key(labels))
+            return {"count": series[2], "sum": series[1]} if series else None
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(s[0]), s[1], s[2])) for key, s in self._values.items())
+        lines = self.header()
+        bounds = self.buckets + (float("inf"),)
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(bounds, counts):
+                cumulative += n
+                le = 'le="' + _format_value(float(bound)) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class _StatsCollector:
+    """Gauges/counters read from existing ``stats()`` dicts at scrape time"""
+
+    def __init__(
+        self,
+        prefix: str,
+        label: Optional[str],
+        sources: Dict[Optional[str], Callable[[], Dict[str, Any]]],
+        gauges: Sequence[str],
+        counters: Sequence[str],
+    ):
+        self.prefix = prefix
+        self.label = label
+        self.sources = sources
+        self.gauges = gauges
+        self.counters = counters
+
+    def render(self) -> List[str]:
+        snapshots = [(name, stats()) for name, stats in self.sources.items()]
+        labels = (self.label,) if self.label else ()
+        lines = []
+        for fields, kind, suffix in ((self.gauges, "gauge", ""), (self.counters, "counter", "_total")):
+            for field in fields:
+                metric = f"{self.prefix}_{field}{suffix}"
+                lines.append(f"# HELP {metric} {field.replace('_', ' ')} ({self.prefix})")
+                lines.append(f"# TYPE {metric} {kind}")
+                for name, stats in snapshots:
+                    values = (name,) if self.label else ()
+                    lines.append(f"{metric}{_format_labels(labels, values)} {_format_value(stats.get(field) or 0)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds every metric and renders them for /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labels))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def register_stats(
+        self,
+        prefix: str,
+        sources: Dict[Optional[str], Callable[[], Dict[str, Any]]],
+        label: Optional[str] = None,
+        gauges: Sequence[str] = (),
+        counters: Sequence[str] = (),
+    ):
+        """
+        Expose fields of ``stats()`` dicts: ``{prefix}_{field}`` for gauges and
+        ``{prefix}_{field}_total`` for counters, one series per source
+        (labelled ``label="<source name>"`` when ``label`` is given).
+        """
+        collector = _StatsCollector(prefix, label, sources, gauges, counters)
+        with self._lock:
+            if prefix in self._metrics:
+                raise ValueError(f"Metric already registered: {prefix}")
+            self._metrics[prefix] = collector
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds",
+    "Time from request start to the last response byte, by route template",
+    ("method", "route", "status")
+)
+HTTP_REQUESTS_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight",
+    "Requests currently being handled",
+    ("method",)
+)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency per route template
+    (``/api/trips``, never the raw path) and the in-flight gauge.
+    Unmatched paths share one ``route="unmatched"`` series.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = {"code": 500}
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc(method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec(method)
+            # The router stores the matched route on the (shared) scope
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                method,
+                getattr(route, "path", "unmatched"),
+                status["code"]
+            )
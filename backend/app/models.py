@@ -9,6 +9,21 @@ class ServiceType(str, Enum):
     FHV = "fhv"
     FHVHV = "fhvhv"
 
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+class ResponseFormat(str, Enum):
+    JSON = "json"
+    ARROW = "arrow"
+    PARQUET = "parquet"
+
+class Granularity(str, Enum):
+    DAY = "day"
+    WEEK = "week"  # ISO weeks, labelled by their Monday
+    MONTH = "month"
+    YEAR = "year"
+
 class PaginationParams(BaseModel):
     page: int = Field(default=1, ge=1, description="Page number")
     page_size: int = Field(default=100, ge=1, le=1000, description="Items per page")
@@ -19,6 +34,11 @@ class PaginationResponse(BaseModel):
     total_records: int
     total_pages: int
 
+class CursorPaginationResponse(BaseModel):
+    page_size: int
+    next_cursor: Optional[str] = None
+    has_more: bool
+
 class DailyAggregate(BaseModel):
     metric_date: date
     service_type: str
@@ -47,7 +67,7 @@ class Trip(BaseModel):
 
 class TripsResponse(BaseModel):
     data: List[Trip]
-    pagination: PaginationResponse
+    pagination: CursorPaginationResponse
 
 class ServiceTypeStats(BaseModel):
     service_type: str
@@ -61,6 +81,7 @@ class StatisticsResponse(BaseModel):
     total_revenue: float
     date_range: dict
     by_service_type: List[ServiceTypeStats]
+    refreshed_at: Optional[datetime] = None
 
 class SummaryStats(BaseModel):
     total_trips: int
@@ -71,6 +92,11 @@ class SummaryStats(BaseModel):
     by_service_type: List[dict]
     by_borough: List[dict]
 
+class DashboardResponse(BaseModel):
+    summary: SummaryStats
+    daily: DailyAggregatesResponse
+    trips: TripsResponse
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -82,6 +108,7 @@ class User(BaseModel):
     username: str
     email: Optional[str] = None
     disabled: Optional[bool] = None
+    is_admin: bool = False  # Operational endpoints (e.g. POST /api/aggregates/reload)
 
 class UserInDB(User):
     hashed_password: str
\ No newline at end of file
@@ -0,0 +1,24 @@
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def encode_cursor(dropoff_datetime: datetime, trip_id: int) -> str:
+    """Encode the sort key of the last row on a page as an opaque token"""
+    payload = json.dumps([dropoff_datetime.isoformat(), int(trip_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a token produced by encode_cursor back into (dropoff_datetime, trip_id)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        dropoff, trip_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(dropoff), int(trip_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor!r}") from e
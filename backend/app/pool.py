@@ -0,0 +1,270 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes available within the wait timeout"""
+
+
+class PoolClosedError(Exception):
+    """Raised when a connection is requested from a closed pool"""
+
+
+class _PooledConnection:
+    """A raw DB-API connection plus the bookkeeping the pool needs"""
+
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn: Any):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of DB-API connections.
+
+    Works with any DB-API driver: pass a zero-argument ``connect`` callable
+    (``lambda: pyodbc.connect(dsn)`` in production, ``sqlite3.connect`` in tests).
+
+    - ``min_size`` connections are opened by ``open()`` and kept around
+    - at most ``max_size`` connections exist at any time; callers wait up to
+      ``timeout`` seconds for one to be returned before ``PoolTimeoutError``
+    - connections older than ``max_lifetime`` seconds are closed and replaced
+    - connections idle for longer than ``ping_after`` seconds are checked with
+      ``ping_query`` on checkout and replaced if the check fails
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        min_size: int = 1,
+        max_size: int = 10,
+        max_lifetime: float = 1800,
+        timeout: float = 30,
+        ping_after: float = 30,
+        ping_query: str = "SELECT 1",
+    ):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self.ping_query = ping_query
+
+        self._cond = threading.Condition()
+        self._idle: List[_PooledConnection] = []
+        self._size = 0  # open connections, idle + checked out + being created
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+
+        # Counters exposed through stats()
+        self._checkouts = 0
+        self._created = 0
+        self._recycled = 0
+        self._failed_pings = 0
+        self._timeouts = 0
+        self._wait_time_total = 0.0
+
+    # ------------------------------------------------------------------ #
+    # Lifecycle
+    # ------------------------------------------------------------------ #
+
+    def open(self):
+        """Pre-open ``min_size`` connections (errors are logged, not raised)"""
+        with self._cond:
+            self._closed = False
+            missing = self.min_size - self._size
+            self._size += max(missing, 0)
+
+        for _ in range(max(missing, 0)):
+            try:
+                entry = self._create()
+            except Exception as e:
+                logger.warning("Could not pre-open pooled connection: %s", e)
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                continue
+            with self._cond:
+                self._idle.append(entry)
+                self._cond.notify()
+
+    def close(self):
+        """Close all idle connections; checked-out ones are closed on return"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for entry in idle:
+            self._close_quietly(entry)
+
+    # ------------------------------------------------------------------ #
+    # Checkout / return
+    # ------------------------------------------------------------------ #
+
+    def acquire(self, timeout: Optional[float] = None) -> _PooledConnection:
+        """Check out a connection, waiting up to ``timeout`` seconds"""
+        started = time.monotonic()
+        deadline = started + (self.timeout if timeout is None else timeout)
+        entry = None
+
+        with self._cond:
+            self._waiting += 1
+            try:
+                while True:
+                    if self._closed:
+                        raise PoolClosedError("Connection pool is closed")
+                    if self._idle:
+                        # LIFO: reuse the most recently returned (warmest) connection
+                        entry = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1  # reserve a slot, connect outside the lock
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeoutError(
+                            f"No database connection available within "
+                            f"{self.timeout if timeout is None else timeout}s "
+                            f"(max_size={self.max_size})"
+                        )
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+
+        try:
+            if entry is None:
+                entry = self._create()
+            else:
+                entry = self._check(entry)
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._in_use += 1
+            self._checkouts += 1
+            self._wait_time_total += time.monotonic() - started
+        return entry
+
+    def release(self, entry: _PooledConnection, discard: bool = False):
+        """Return a connection to the pool, or close it if ``discard`` is set"""
+        now = time.monotonic()
+        with self._cond:
+            self._in_use -= 1
+            keep = not (discard or self._closed or self._expired(entry, now))
+            if keep:
+                entry.last_used = now
+                self._idle.append(entry)
+            else:
+                self._size -= 1
+            self._cond.notify()
+
+        if not keep:
+            self._close_quietly(entry)
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """
+        Context manager yielding a raw connection.
+
+        On error the transaction is rolled back; if the rollback itself fails
+        the connection is assumed broken and discarded instead of reused.
+        """
+        entry = self.acquire(timeout)
+        discard = False
+        try:
+            yield entry.conn
+        except Exception:
+            try:
+                entry.conn.rollback()
+            except Exception:
+                discard = True
+            raise
+        finally:
+            self.release(entry, discard=discard)
+
+    # ------------------------------------------------------------------ #
+    # Introspection
+    # ------------------------------------------------------------------ #
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pool sizes and counters"""
+        with self._cond:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "waiting": self._waiting,
+                "checkouts": self._checkouts,
+                "created": self._created,
+                "recycled": self._recycled,
+                "failed_pings": self._failed_pings,
+                "timeouts": self._timeouts,
+                "avg_wait_ms": round(
+                    self._wait_time_total / self._checkouts * 1000, 3
+                ) if self._checkouts else 0.0,
+                "closed": self._closed,
+            }
+
+    # ------------------------------------------------------------------ #
+    # Internals
+    # ------------------------------------------------------------------ #
+
+    def _create(self) -> _PooledConnection:
+        entry = _PooledConnection(self._connect())
+        with self._cond:
+            self._created += 1
+        return entry
+
+    def _expired(self, entry: _PooledConnection, now: float) -> bool:
+        return self.max_lifetime > 0 and now - entry.created_at >= self.max_lifetime
+
+    def _check(self, entry: _PooledConnection) -> _PooledConnection:
+        """Recycle expired connections and ping ones that sat idle too long"""
+        now = time.monotonic()
+        if self._expired(entry, now):
+            self._close_quietly(entry)
+            with self._cond:
+                self._recycled += 1
+            return self._create()
+
+        if now - entry.last_used >= self.ping_after:
+            try:
+                cursor = entry.conn.cursor()
+                cursor.execute(self.ping_query)
+                cursor.fetchone()
+                cursor.close()
+            except Exception as e:
+                logger.info("Discarding dead pooled connection: %s", e)
+                self._close_quietly(entry)
+                with self._cond:
+                    self._failed_pings += 1
+                return self._create()
+
+        return entry
+
+    @staticmethod
+    def _close_quietly(entry: _PooledConnection):
+        try:
+            entry.conn.close()
+        except Exception:
+            pass
@@ -0,0 +1,244 @@
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Tables and columns the API is allowed to query, mirroring the DDL in
+# 01_Data_Processing _Notebook.ipynb. Types decide how date bounds are bound.
+SCHEMA: Dict[str, Dict[str, str]] = {
+    "fact_trip": {
+        "trip_id": "int",
+        "service_type": "str",
+        "pickup_datetime": "datetime",
+        "dropoff_datetime": "datetime",
+        "pickup_location_id": "int",
+        "dropoff_location_id": "int",
+        "pickup_borough": "str",
+        "pickup_zone": "str",
+        "dropoff_borough": "str",
+        "dropoff_zone": "str",
+        "trip_distance": "float",
+        "total_amount": "float",
+        "trip_duration_sec": "int",
+        "pickup_date": "date",
+        "is_valid": "bool",
+        "created_at": "datetime",
+    },
+    "agg_daily_metrics": {
+        "metric_date": "date",
+        "service_type": "str",
+        "total_trips": "int",
+        "total_revenue": "float",
+        "avg_trip_distance": "float",
+        "avg_trip_duration_sec": "float",
+        "avg_fare_amount": "float",
+        "created_at": "datetime",
+    },
+    "agg_daily_borough_metrics": {
+        "metric_date": "date",
+        "service_type": "str",
+        "pickup_borough": "str",
+        "total_trips": "int",
+        "total_revenue": "float",
+        "total_distance": "float",
+        "distance_trips": "int",
+        "total_duration_sec": "int",
+        "created_at": "datetime",
+    },
+    "agg_service_stats": {
+        "service_type": "str",
+        "total_trips": "int",
+        "valid_trips": "int",
+        "total_revenue": "float",
+        "min_pickup_date": "date",
+        "max_pickup_date": "date",
+        "max_trip_id": "int",
+        "refreshed_at": "datetime",
+    },
+    "dim_taxi_zone": {
+        "location_id": "int",
+        "borough": "str",
+        "zone_name": "str",
+        "service_zone": "str",
+    },
+}
+
+
+# SQL dialects QueryBuilder can emit (see app.backends)
+DIALECTS = ("tsql", "duckdb")
+
+
+class SchemaError(ValueError):
+    """Raised when a query references a table or column not in SCHEMA"""
+
+
+def check_columns(table: str, columns: Sequence[str]):
+    """Raise SchemaError unless every column exists on the declared table"""
+    if table not in SCHEMA:
+        raise SchemaError(f"Unknown table: {table}")
+    unknown = [c for c in columns if c not in SCHEMA[table]]
+    if unknown:
+        raise SchemaError(f"Unknown column(s) on {table}: {', '.join(unknown)}")
+
+
+def schema_mismatches(actual: Dict[str, set]) -> List[str]:
+    """
+    Compare SCHEMA with the live database's columns ({table: {column, ...}}).
+    Returns human-readable problems; empty when everything is present.
+    """
+    problems = []
+    for table, columns in SCHEMA.items():
+        if table not in actual:
+            problems.append(f"missing table {table}")
+            continue
+        for column in columns:
+            if column not in actual[table]:
+                problems.append(f"missing column {table}.{column}")
+    return problems
+
+
+class QueryBuilder:
+    """
+    Small SELECT builder shared by the routers.
+
+    Every value is bound as a ``?`` parameter (including TOP and OFFSET/FETCH),
+    every column is checked against SCHEMA, and date filters are emitted as
+    half-open ranges so they can seek on the column's index. Row limits are
+    written as TOP / OFFSET-FETCH for ``tsql`` and LIMIT / OFFSET for ``duckdb``.
+
+        sql, params = (
+            QueryBuilder("agg_daily_metrics")
+            .select("metric_date", "total_trips")
+            .where_date_range("metric_date", start_date, end_date)
+            .where_equals("service_type", "yellow")
+            .order_by("metric_date DESC")
+            .build()
+        )
+    """
+
+    def __init__(self, table: str, dialect: str = "tsql"):
+        check_columns(table, [])
+        if dialect not in DIALECTS:
+            raise ValueError(f"Unknown SQL dialect: {dialect}")
+        self.table = table
+        self.dialect = dialect
+        self._select: List[str] = []
+        self._where: List[str] = []
+        self._where_params: List[Any] = []
+        self._order_by: List[str] = []
+        self._top: Optional[int] = None
+        self._offset: Optional[Tuple[int, int]] = None
+
+    def select(self, *columns: str) -> "QueryBuilder":
+        """Select plain columns; use ``column AS alias`` to rename"""
+        for column in columns:
+            name, _, alias = column.partition(" AS ")
+            check_columns(self.table, [name.strip()])
+            self._select.append(column)
+        return self
+
+    def select_expr(self, expression: str, alias: str) -> "QueryBuilder":
+        """Select a SQL expression (aggregate, CASE, ...) under an alias"""
+        self._select.append(f"{expression} AS {alias}")
+        return self
+
+    def where_date_range(self, column: str, start: date, end: date) -> "QueryBuilder":
+        """Inclusive date range on a DATE or DATETIME2 column as ``>= start AND < end + 1 day``"""
+        check_columns(self.table, [column])
+        lower, upper = start, end + timedelta(days=1)
+        if SCHEMA[self.table][column] == "datetime":
+            lower = datetime.combine(lower, time.min)
+            upper = datetime.combine(upper, time.min)
+        self._where.append(f"{column} >= ? AND {column} < ?")
+        self._where_params.extend([lower, upper])
+        return self
+
+    def where_equals(self, column: str, value: Any) -> "QueryBuilder":
+        """Equality filter; skipped when value is None"""
+        check_columns(self.table, [column])
+        if value is not None:
+            self._where.append(f"{column} = ?")
+            self._where_params.append(value)
+        return self
+
+    def where_before(self, columns: Sequence[str], values: Optional[Sequence[Any]]) -> "QueryBuilder":
+        """Keyset predicate: rows that sort strictly after ``values`` in DESC order on ``columns``"""
+        check_columns(self.table, columns)
+        if values is None:
+            return self
+        # (a, b, c) < (x, y, z)  ==>  a <= x AND (a < x OR b < y OR (b = y AND c < z))
+        # The redundant leading a <= x is a plain range the optimizer can seek on;
+        # the OR expansion alone is not sargable and deep pages would scan.
+        first = columns[0]
+        if len(columns) == 1:
+            self._where.append(f"{first} < ?")
+            self._where_params.append(values[0])
+            return self
+        clauses = [f"{first} < ?"]
+        params: List[Any] = [values[0], values[0]]
+        for i in range(1, len(columns)):
+            equal_prefix = [f"{prev} = ?" for prev in columns[1:i]]
+            clause = " AND ".join(equal_prefix + [f"{columns[i]} < ?"])
+            clauses.append(f"({clause})" if equal_prefix else clause)
+            params.extend(list(values[1:i]) + [values[i]])
+        self._where.append(f"{first} <= ? AND (" + " OR ".join(clauses) + ")")
+        self._where_params.extend(params)
+        return self
+
+    def order_by(self, *terms: str) -> "QueryBuilder":
+        """Order by ``column`` or ``column DESC``"""
+        for term in terms:
+            name, _, direction = term.partition(" ")
+            check_columns(self.table, [name])
+            if direction and direction.upper() not in ("ASC", "DESC"):
+                raise SchemaError(f"Invalid sort direction: {direction}")
+            self._order_by.append(term)
+        return self
+
+    def top(self, n: int) -> "QueryBuilder":
+        self._top = n
+        return self
+
+    def paginate(self, offset: int, fetch: int) -> "QueryBuilder":
+        """OFFSET/FETCH paging (requires order_by)"""
+        self._offset = (offset, fetch)
+        return self
+
+    def where_sql(self) -> Tuple[str, Tuple[Any, ...]]:
+        """The WHERE predicate and its parameters, for hand-written aggregate queries"""
+        return (" AND ".join(self._where) or "1=1"), tuple(self._where_params)
+
+    def build(self) -> Tuple[str, Tuple[Any, ...]]:
+        """Return (sql, params) for the SELECT"""
+        if not self._select:
+            raise SchemaError("No columns selected")
+        tsql = self.dialect == "tsql"
+        params: List[Any] = []
+        sql = "SELECT "
+        if self._top is not None and tsql:
+            sql += "TOP (?) "
+            params.append(self._top)
+        sql += ", ".join(self._select) + f" FROM {self.table}"
+
+        where, where_params = self.where_sql()
+        sql += f" WHERE {where}"
+        params.extend(where_params)
+
+        if self._order_by:
+            sql += " ORDER BY " + ", ".join(self._order_by)
+        if self._offset is not None:
+            if not self._order_by:
+                raise SchemaError("OFFSET/FETCH requires ORDER BY")
+            if tsql:
+                sql += " OFFSET ? ROWS FETCH NEXT ? ROWS ONLY"
+                params.extend(self._offset)
+            else:
+                sql += " LIMIT ? OFFSET ?"
+                params.extend((self._offset[1], self._offset[0]))
+        elif self._top is not None and not tsql:
+            sql += " LIMIT ?"
+            params.append(self._top)
+        return sql, tuple(params)
+
+    def build_count(self) -> Tuple[str, Tuple[Any, ...]]:
+        """Return (sql, params) for COUNT(*) over the same filters"""
+        where, where_params = self.where_sql()
+        return f"SELECT COUNT(*) FROM {self.table} WHERE {where}", where_params
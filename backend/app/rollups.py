@@ -0,0 +1,144 @@
+"""
+Rollup tables derived from fact_trip.
+
+The load pipeline (notebook) builds them in bulk and merges new trips into
+agg_service_stats at the end of every load. For fact_trip changes made
+outside the notebook, refresh them in place:
+
+    python -m app.rollups --start 2024-11-01 --end 2024-11-30
+
+- agg_daily_borough_metrics: the given pickup-date range is rebuilt
+- agg_service_stats: only trips above the stored max_trip_id watermark are
+  folded in (``--full`` rebuilds it, e.g. after is_valid fixes)
+"""
+import argparse
+from datetime import date, timedelta
+from typing import Optional
+from app.database import Database, db
+
+BOROUGH_ROLLUP_DELETE = """
+    DELETE FROM agg_daily_borough_metrics
+    WHERE metric_date >= ? AND metric_date < ?
+"""
+
+BOROUGH_ROLLUP_INSERT = """
+    INSERT INTO agg_daily_borough_metrics
+        (metric_date, service_type, pickup_borough,
+         total_trips, total_revenue, total_distance, distance_trips, total_duration_sec)
+    SELECT
+        pickup_date,
+        service_type,
+        COALESCE(pickup_borough, 'Unknown'),
+        COUNT_BIG(*),
+        SUM(total_amount),
+        SUM(trip_distance),
+        COUNT_BIG(CASE WHEN service_type <> 'fhv' THEN trip_distance END),  -- FHV distance is a 0.0 placeholder
+        SUM(CAST(trip_duration_sec AS BIGINT))
+    FROM fact_trip
+    WHERE is_valid = 1
+      AND pickup_date >= ? AND pickup_date < ?
+    GROUP BY pickup_date, service_type, COALESCE(pickup_borough, 'Unknown')
+"""
+
+# Folds trips newer than the watermark into the per-service snapshot
+# (the notebook's "Refresh Statistics Snapshot" cell runs the same statement)
+SERVICE_STATS_MERGE = """
+    MERGE agg_service_stats AS t
+    USING (
+        SELECT
+            service_type,
+            COUNT_BIG(*) AS total_trips,
+            SUM(CAST(is_valid AS BIGINT)) AS valid_trips,
+            COALESCE(SUM(CASE WHEN is_valid = 1 THEN total_amount END), 0) AS total_revenue,
+            MIN(CASE WHEN is_valid = 1 THEN pickup_date END) AS min_pickup_date,
+            MAX(CASE WHEN is_valid = 1 THEN pickup_date END) AS max_pickup_date,
+            MAX(trip_id) AS max_trip_id
+        FROM fact_trip
+        WHERE trip_id > COALESCE((SELECT MAX(max_trip_id) FROM agg_service_stats), 0)
+        GROUP BY service_type
+    ) AS d
+    ON t.service_type = d.service_type
+    WHEN MATCHED THEN UPDATE SET
+        total_trips = t.total_trips + d.total_trips,
+        valid_trips = t.valid_trips + d.valid_trips,
+        total_revenue = t.total_revenue + d.total_revenue,
+        min_pickup_date = CASE WHEN t.min_pickup_date IS NULL OR d.min_pickup_date < t.min_pickup_date
+                               THEN d.min_pickup_date ELSE t.min_pickup_date END,
+        max_pickup_date = CASE WHEN t.max_pickup_date IS NULL OR d.max_pickup_date > t.max_pickup_date
+                               THEN d.max_pickup_date ELSE t.max_pickup_date END,
+        max_trip_id = d.max_trip_id
+    WHEN NOT MATCHED THEN INSERT
+        (service_type, total_trips, valid_trips, total_revenue,
+         min_pickup_date, max_pickup_date, max_trip_id)
+    VALUES
+        (d.service_type, d.total_trips, d.valid_trips, d.total_revenue,
+         d.min_pickup_date, d.max_pickup_date, d.max_trip_id);
+"""
+
+SERVICE_STATS_TOUCH = "UPDATE agg_service_stats SET refreshed_at = SYSUTCDATETIME()"
+
+# Bounds used for a full rebuild (the pipeline only loads 2020-2024)
+MIN_DATE = date(1900, 1, 1)
+MAX_DATE = date(9999, 12, 30)
+
+
+def refresh_borough_rollup(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    database: Database = db
+) -> int:
+    """
+    Rebuild agg_daily_borough_metrics for [start_date, end_date] (inclusive) in
+    one transaction. Omit both dates to rebuild everything. Returns rows written.
+    """
+    lower = start_date or MIN_DATE
+    upper = (end_date + timedelta(days=1)) if end_date else MAX_DATE
+
+    with database.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(BOROUGH_ROLLUP_DELETE, (lower, upper))
+        cursor.execute(BOROUGH_ROLLUP_INSERT, (lower, upper))
+        inserted = cursor.rowcount
+        conn.commit()
+        cursor.close()
+    return inserted
+
+
+def refresh_service_stats(full: bool = False, database: Database = db) -> int:
+    """
+    Bring agg_service_stats up to date with fact_trip in one transaction.
+
+    Incremental by default: only trips with trip_id above the stored watermark
+    are scanned. ``full=True`` clears the snapshot first so every trip is
+    recounted. Returns the number of service rows merged.
+    """
+    with database.get_connection() as conn:
+        cursor = conn.cursor()
+        if full:
+            cursor.execute("DELETE FROM agg_service_stats")
+        cursor.execute(SERVICE_STATS_MERGE)
+        merged = cursor.rowcount
+        cursor.execute(SERVICE_STATS_TOUCH)
+        conn.commit()
+        cursor.close()
+    return merged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh rollup tables from fact_trip")
+    parser.add_argument("--start", type=date.fromisoformat, help="First pickup date to rebuild (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Last pickup date to rebuild (YYYY-MM-DD)")
+    parser.add_argument("--full", action="store_true", help="Rebuild the statistics snapshot from scratch")
+    args = parser.parse_args()
+    if db.dialect != "tsql":
+        parser.error(f"Rollups are maintained in Azure SQL; the {db.backend.name} backend rebuilds them on startup")
+
+    rows = refresh_borough_rollup(args.start, args.end)
+    print(f"✅ agg_daily_borough_metrics refreshed: {rows:,} rows")
+
+    merged = refresh_service_stats(full=args.full)
+    print(f"✅ agg_service_stats refreshed: {merged:,} service types updated")
+
+
+if __name__ == "__main__":
+    main()
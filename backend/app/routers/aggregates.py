@@ -1,20 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from typing import Optional
 from datetime import date
 import math
-import hashlib
-import json
-from functools import lru_cache
+from app.config import settings
 from app.database import db
+from app.cache import cached, result_cache
+from app.columnar import (
+    MEDIA_TYPES,
+    arrow_available,
+    batch_from_columns,
+    batch_from_rows,
+    negotiate_format,
+    serialize,
+    table_schema
+)
+from app.inmemory import memory_store
+from app.versioning import data_version
+from app.query_builder import QueryBuilder, check_columns
+from app.serialization import json_response, records
 from app.models import (
     DailyAggregatesResponse, 
-    DailyAggregate, 
+    Granularity,
     PaginationResponse,
+    ResponseFormat,
     ServiceType,
-    User,
     SummaryStats
 )
-from app.auth import get_current_active_user
+from app.auth import get_current_active_user, get_current_admin_user
 
 router = APIRouter(
     prefix="/api/aggregates",
@@ -22,23 +34,64 @@ router = APIRouter(
     dependencies=[Depends(get_current_active_user)]
 )
 
-# Simple in-memory cache for aggregate queries
-aggregate_cache = {}
-MAX_CACHE_SIZE = 100
+AGGREGATE_COLUMNS = (
+    "metric_date",
+    "service_type",
+    "total_trips",
+    "total_revenue",
+    "avg_trip_distance",
+    "avg_trip_duration_sec",
+    "avg_fare_amount",
+)
+check_columns("agg_daily_metrics", AGGREGATE_COLUMNS)
+
+# First day of the bucket containing metric_date, per SQL dialect. Weeks start
+# on Monday (T-SQL: 1900-01-01 was one, independent of the session's DATEFIRST;
+# DuckDB: ISO weeks).
+BUCKET_EXPRESSIONS = {
+    "tsql": {
+        Granularity.WEEK: "DATEADD(day, DATEDIFF(day, '19000101', metric_date) / 7 * 7, CAST('19000101' AS DATE))",
+        Granularity.MONTH: "DATEFROMPARTS(YEAR(metric_date), MONTH(metric_date), 1)",
+        Granularity.YEAR: "DATEFROMPARTS(YEAR(metric_date), 1, 1)",
+    },
+    "duckdb": {
+        Granularity.WEEK: "CAST(date_trunc('week', metric_date) AS DATE)",
+        Granularity.MONTH: "CAST(date_trunc('month', metric_date) AS DATE)",
+        Granularity.YEAR: "CAST(date_trunc('year', metric_date) AS DATE)",
+    },
+}
 
-def get_cache_key(start_date: date, end_date: date, service_type: Optional[str]) -> str:
-    """Generate cache key for aggregate queries"""
-    return hashlib.md5(f"{start_date}:{end_date}:{service_type}".encode()).hexdigest()
+# Sums per bucket; averages re-weighted by the trips of the days that have them
+ROLLUP_QUERY = """
+    SELECT
+        {bucket} AS metric_date,
+        service_type,
+        SUM(CAST(total_trips AS BIGINT)) AS total_trips,
+        SUM(total_revenue) AS total_revenue,
+        {averages}
+    FROM agg_daily_metrics
+    WHERE {where}
+    GROUP BY {bucket}, service_type
+    ORDER BY metric_date DESC, service_type
+"""
+ROLLUP_AVERAGES = ",\n        ".join(
+    f"SUM({column} * total_trips) / "
+    f"NULLIF(SUM(CASE WHEN {column} IS NOT NULL THEN CAST(total_trips AS DOUBLE PRECISION) END), 0) AS {column}"
+    for column in ("avg_trip_distance", "avg_trip_duration_sec", "avg_fare_amount")
+)
 
 @router.get("/daily", response_model=DailyAggregatesResponse)
+@cached("aggregates:daily", ttl=300, cache_control="private, max-age=300", vary="Accept")
 async def get_daily_aggregates(
+    request: Request,
     response: Response,
     start_date: date = Query(..., description="Start date (YYYY-MM-DD)"),
     end_date: date = Query(..., description="End date (YYYY-MM-DD)"),
     service_type: Optional[ServiceType] = Query(None, description="Filter by service type"),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(100, ge=1, le=10000, description="Items per page"),
-    current_user: User = Depends(get_current_active_user)
+    granularity: Granularity = Query(Granularity.DAY, description="Roll days up into weeks, months or years"),
+    response_format: ResponseFormat = Depends(negotiate_format)
 ):
     """
     Get daily aggregated metrics for NYC taxi trips.
@@ -49,91 +102,133 @@ async def get_daily_aggregates(
     - avg_trip_distance: Average trip distance
     - avg_trip_duration_sec: Average trip duration in seconds
     - avg_fare_amount: Average fare amount
+    
+    With `Accept: application/vnd.apache.arrow.stream` or `?format=arrow|parquet`
+    the page is returned as one columnar table and the total row count is
+    in the `X-Total-Count` header.
+    
+    `granularity=week|month|year` returns one row per bucket and service,
+    dated by the bucket's first day: trips and revenue are summed and the
+    averages weighted by trips. Five years are ~20 yearly rows instead of
+    ~7,000 daily ones; each granularity is cached separately.
     """
     
     # Validate date range
     if start_date > end_date:
         raise HTTPException(status_code=400, detail="start_date must be before end_date")
     
-    # Add cache headers (5 minutes for aggregates)
-    response.headers["Cache-Control"] = "private, max-age=300"
-    
-    # Check cache
-    cache_key = get_cache_key(start_date, end_date, service_type.value if service_type else None)
-    cache_entry_key = f"{cache_key}:{page}:{page_size}"
-    
-    if cache_entry_key in aggregate_cache:
-        return aggregate_cache[cache_entry_key]
+    columnar = response_format != ResponseFormat.JSON
+    if columnar and not arrow_available():
+        raise HTTPException(status_code=501, detail="pyarrow is not installed")
     
-    # Build query
-    where_clauses = ["metric_date BETWEEN ? AND ?"]
-    params = [start_date, end_date]
-    
-    if service_type:
-        where_clauses.append("service_type = ?")
-        params.append(service_type.value)
-    
-    where_sql = " AND ".join(where_clauses)
+    service = service_type.value if service_type else None
+    offset = (page - 1) * page_size
     
-    # Get total count
-    count_query = f"""
-        SELECT COUNT(*) 
-        FROM agg_daily_metrics 
-        WHERE {where_sql}
-    """
-    total_records = db.execute_scalar(count_query, tuple(params))
+    rollup = granularity != Granularity.DAY
     
-    if total_records == 0:
-        return DailyAggregatesResponse(
-            data=[],
-            pagination=PaginationResponse(
-                page=page,
-                page_size=page_size,
-                total_records=0,
-                total_pages=0
+    if memory_store.ready and columnar:
+        if rollup:
+            total_records, columns = memory_store.rollup_columns(
+                start_date, end_date, service, granularity.value, offset, page_size
+            )
+        else:
+            total_records, columns = memory_store.daily_columns(
+                start_date, end_date, service, offset, page_size
+            )
+        schema = table_schema("agg_daily_metrics", AGGREGATE_COLUMNS)
+        return _columnar_response(response_format, schema, [batch_from_columns(schema, columns)], total_records)
+    
+    if memory_store.ready:
+        # Served from the in-process columnar copy, no DB round trip
+        if rollup:
+            total_records, results = memory_store.rollup_page(
+                start_date, end_date, service, granularity.value, offset, page_size
+            )
+        else:
+            total_records, results = memory_store.daily_page(
+                start_date, end_date, service, offset, page_size
             )
+    elif rollup:
+        # At most a few hundred buckets: group in SQL, page the result here
+        where, where_params = (
+            QueryBuilder("agg_daily_metrics", db.dialect)
+            .where_date_range("metric_date", start_date, end_date)
+            .where_equals("service_type", service)
+            .where_sql()
         )
-    
-    # Calculate pagination
-    total_pages = math.ceil(total_records / page_size)
-    offset = (page - 1) * page_size
-    
-    # Get paginated data
-    data_query = f"""
-        SELECT 
-            metric_date,
-            service_type,
-            total_trips,
-            total_revenue,
-            avg_trip_distance,
-            avg_trip_duration_sec,
-            avg_fare_amount
-        FROM agg_daily_metrics
-        WHERE {where_sql}
-        ORDER BY metric_date DESC, service_type
-        OFFSET ? ROWS
-        FETCH NEXT ? ROWS ONLY
-    """
-    
-    results = db.execute_query(data_query, tuple(params + [offset, page_size]))
-    
-    # Convert to response model
-    aggregates = [DailyAggregate(**row) for row in results]
-    
-    result = DailyAggregatesResponse(
-        data=aggregates,
-        pagination=PaginationResponse(
-            page=page,
-            page_size=page_size,
-            total_records=total_records,
-            total_pages=total_pages
+        query = ROLLUP_QUERY.format(
+            bucket=BUCKET_EXPRESSIONS[db.dialect][granularity],
+            averages=ROLLUP_AVERAGES,
+            where=where
+        )
+        _, rows = await db.execute_query_tuples_async(query, where_params)
+        total_records = len(rows)
+        page_rows = rows[offset:offset + page_size]
+        
+        if columnar:
+            schema = table_schema("agg_daily_metrics", AGGREGATE_COLUMNS)
+            batches = [batch_from_rows(schema, page_rows)] if page_rows else []
+            return _columnar_response(response_format, schema, batches, total_records)
+        results = records(AGGREGATE_COLUMNS, page_rows)
+    else:
+        # Build query
+        builder = (
+            QueryBuilder("agg_daily_metrics", db.dialect)
+            .select(*AGGREGATE_COLUMNS)
+            .where_date_range("metric_date", start_date, end_date)
+            .where_equals("service_type", service)
+            .order_by("metric_date DESC", "service_type")
         )
+        
+        # Get total count
+        count_query, count_params = builder.build_count()
+        total_records = await db.execute_scalar_async(count_query, count_params)
+        
+        if columnar:
+            # A record batch straight from the row tuples, no row dicts or models
+            schema = table_schema("agg_daily_metrics", AGGREGATE_COLUMNS)
+            batches = []
+            if total_records:
+                data_query, data_params = builder.paginate(offset, page_size).build()
+                _, rows = await db.execute_query_tuples_async(data_query, data_params)
+                batches = [batch_from_rows(schema, rows)] if rows else []
+            return _columnar_response(response_format, schema, batches, total_records)
+        
+        # Get paginated data as plain rows; no per-row model objects
+        results = []
+        if total_records:
+            data_query, data_params = builder.paginate(offset, page_size).build()
+            _, rows = await db.execute_query_tuples_async(data_query, data_params)
+            results = records(AGGREGATE_COLUMNS, rows)
+    
+    # Same JSON as DailyAggregatesResponse, encoded in one pass
+    pagination = PaginationResponse(
+        page=page,
+        page_size=page_size,
+        total_records=total_records or 0,
+        total_pages=math.ceil(total_records / page_size) if total_records else 0
     )
-    
-    # Store in cache (limit cache size)
-    if len(aggregate_cache) >= MAX_CACHE_SIZE:
-        # Remove oldest entry
-        aggregate_cache.pop(next(iter(aggregate_cache)))
-    aggregate_cache[cache_entry_key] = result
-    
-    return result
\ No newline at end of file
+    return json_response({"data": results, "pagination": pagination.model_dump()})
+
+def _columnar_response(response_format: ResponseFormat, schema, batches, total_records: int) -> Response:
+    return Response(
+        content=serialize(response_format, schema, batches),
+        media_type=MEDIA_TYPES[response_format],
+        headers={"X-Total-Count": str(total_records or 0)}
+    )
+
+@router.post("/reload", dependencies=[Depends(get_current_admin_user)])
+async def reload_in_memory_aggregates():
+    """
+    Reload the in-memory copy of the aggregate tables (e.g. right after an ETL run)
+    and drop cached responses built from the old data. Admins only: a reload
+    re-reads both tables and sends every cached query back to the database.
+    """
+    if not settings.INMEMORY_AGGREGATES:
+        raise HTTPException(status_code=409, detail="In-memory aggregates are disabled")
+    if not memory_store.available:
+        raise HTTPException(status_code=501, detail="numpy is not installed")
+    await db.run(memory_store.refresh, db)
+    await db.run(data_version.refresh, db)
+    result_cache.clear()
+    return memory_store.stats()
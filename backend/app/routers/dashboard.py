@@ -0,0 +1,87 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from typing import Any, Optional
+import asyncio
+from datetime import date
+from pydantic import BaseModel
+from app.routers import aggregates, summary, trips
+from app.models import DashboardResponse, Granularity, ResponseFormat, ServiceType
+from app.auth import get_current_active_user
+
+router = APIRouter(
+    prefix="/api/dashboard",
+    tags=["dashboard"],
+    dependencies=[Depends(get_current_active_user)]
+)
+
+def _json_bytes(result: Any) -> bytes:
+    """Encoded body of a part: fast-path Responses as-is, models via Pydantic"""
+    if isinstance(result, Response):
+        return result.body
+    if isinstance(result, BaseModel):
+        return result.model_dump_json().encode()
+    raise TypeError(f"Unexpected dashboard part: {type(result).__name__}")
+
+@router.get("", response_model=DashboardResponse)
+async def get_dashboard(
+    start_date: date = Query(..., description="Start date (YYYY-MM-DD)"),
+    end_date: date = Query(..., description="End date (YYYY-MM-DD)"),
+    service_type: Optional[ServiceType] = Query(None, description="Filter by service type"),
+    borough: Optional[str] = Query(None, description="Filter trips by pickup borough"),
+    daily_page_size: int = Query(10000, ge=1, le=10000, description="Daily aggregate rows"),
+    granularity: Granularity = Query(Granularity.DAY, description="Bucket size of the chart series"),
+    trips_page_size: int = Query(100, ge=1, le=1000, description="Trips on the first page")
+):
+    """
+    Everything the dashboard needs for one filter in a single request:
+    the summary cards, daily aggregates for the charts and the first page of trips.
+    
+    The three parts run concurrently (each through its own endpoint, so they
+    share that endpoint's cache entries), so a cold load takes as long as the
+    slowest query rather than the sum. Use `trips.pagination.next_cursor` with
+    `/api/trips` for further pages.
+    """
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be before end_date")
+    
+    # request=None: parts are always returned in full (no 304) and uncompressed;
+    # the middleware compresses the combined body
+    summary_part, daily_part, trips_part = await asyncio.gather(
+        summary.get_summary_stats(
+            request=None,
+            response=Response(),
+            start_date=start_date,
+            end_date=end_date,
+            service_type=service_type,
+            response_format=ResponseFormat.JSON
+        ),
+        aggregates.get_daily_aggregates(
+            request=None,
+            response=Response(),
+            start_date=start_date,
+            end_date=end_date,
+            service_type=service_type,
+            page=1,
+            page_size=daily_page_size,
+            granularity=granularity,
+            response_format=ResponseFormat.JSON
+        ),
+        trips.get_trips(
+            request=None,
+            response=Response(),
+            start_date=start_date,
+            end_date=end_date,
+            service_type=service_type,
+            borough=borough,
+            cursor=None,
+            page_size=trips_page_size
+        )
+    )
+    
+    # Splice the already-encoded parts instead of decoding and re-encoding them
+    body = (
+        b'{"summary":' + _json_bytes(summary_part)
+        + b',"daily":' + _json_bytes(daily_part)
+        + b',"trips":' + _json_bytes(trips_part)
+        + b'}'
+    )
+    return Response(content=body, media_type="application/json")
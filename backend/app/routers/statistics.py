@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 from typing import List
 from app.database import db
-from app.models import StatisticsResponse, ServiceTypeStats, User
+from app.cache import cached
+from app.query_builder import QueryBuilder, check_columns
+from app.models import StatisticsResponse, ServiceTypeStats
 from app.auth import get_current_active_user
 
 router = APIRouter(
@@ -10,48 +12,64 @@ router = APIRouter(
     dependencies=[Depends(get_current_active_user)]
 )
 
+SNAPSHOT_COLUMNS = (
+    "service_type",
+    "total_trips",
+    "valid_trips",
+    "total_revenue",
+    "min_pickup_date",
+    "max_pickup_date",
+    "refreshed_at",
+)
+check_columns("agg_service_stats", SNAPSHOT_COLUMNS)
+
 @router.get("", response_model=StatisticsResponse)
+@cached("statistics", ttl=600, cache_control="private, max-age=600")
 async def get_statistics(
-    current_user: User = Depends(get_current_active_user)
+    request: Request,
+    response: Response
 ):
     """
     Get overall statistics for all taxi trip data.
-    """
     
-    # Overall statistics
-    overall_query = """
-        SELECT 
-            COUNT(*) as total_trips,
-            COALESCE(SUM(total_amount), 0) as total_revenue,
-            MIN(pickup_date) as start_date,
-            MAX(pickup_date) as end_date
-        FROM fact_trip
-        WHERE is_valid = 1
+    Served from the agg_service_stats snapshot (one row per service type),
+    which the load pipeline refreshes incrementally after each load.
+    `refreshed_at` tells how current the snapshot is.
     """
-    overall_result = db.execute_query(overall_query)[0]
     
-    # Statistics by service type
-    by_service_query = """
-        SELECT 
-            service_type,
-            COUNT(*) as total_trips,
-            SUM(CASE WHEN is_valid = 1 THEN 1 ELSE 0 END) as valid_trips,
-            CAST(SUM(CASE WHEN is_valid = 1 THEN 1 ELSE 0 END) AS FLOAT) / COUNT(*) * 100 as data_quality_pct,
-            COALESCE(SUM(CASE WHEN is_valid = 1 THEN total_amount ELSE 0 END), 0) as total_revenue
-        FROM fact_trip
-        GROUP BY service_type
-        ORDER BY service_type
-    """
-    by_service_results = db.execute_query(by_service_query)
+    query, params = (
+        QueryBuilder("agg_service_stats", db.dialect)
+        .select(*SNAPSHOT_COLUMNS)
+        .order_by("service_type")
+        .build()
+    )
+    rows = await db.execute_query_async(query, params)
     
-    service_stats = [ServiceTypeStats(**row) for row in by_service_results]
+    service_stats = [
+        ServiceTypeStats(
+            service_type=row['service_type'],
+            total_trips=int(row['total_trips'] or 0),
+            valid_trips=int(row['valid_trips'] or 0),
+            data_quality_pct=(
+                float(row['valid_trips'] or 0) / row['total_trips'] * 100
+                if row['total_trips'] else 0.0
+            ),
+            total_revenue=float(row['total_revenue'] or 0)
+        )
+        for row in rows
+    ]
+    start_dates = [row['min_pickup_date'] for row in rows if row['min_pickup_date']]
+    end_dates = [row['max_pickup_date'] for row in rows if row['max_pickup_date']]
+    refreshed = [row['refreshed_at'] for row in rows if row['refreshed_at']]
     
+    # Overall figures cover valid trips only
     return StatisticsResponse(
-        total_trips=overall_result['total_trips'],
-        total_revenue=float(overall_result['total_revenue']),
+        total_trips=sum(stats.valid_trips for stats in service_stats),
+        total_revenue=sum(stats.total_revenue for stats in service_stats),
         date_range={
-            "start": overall_result['start_date'].isoformat(),
-            "end": overall_result['end_date'].isoformat()
+            "start": min(start_dates).isoformat() if start_dates else None,
+            "end": max(end_dates).isoformat() if end_dates else None
         },
-        by_service_type=service_stats
-    )
\ No newline at end of file
+        by_service_type=service_stats,
+        refreshed_at=min(refreshed) if refreshed else None
+    )
@@ -1,8 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from typing import Optional
+import asyncio
 from datetime import date
 from app.database import db
-from app.models import ServiceType, User, SummaryStats
+from app.cache import cached
+from app.columnar import (
+    MEDIA_TYPES,
+    arrow_available,
+    batch_from_columns,
+    batch_from_rows,
+    negotiate_format,
+    schema_for,
+    serialize
+)
+from app.inmemory import memory_store
+from app.query_builder import QueryBuilder
+from app.models import ResponseFormat, ServiceType, SummaryStats
 from app.auth import get_current_active_user
 
 router = APIRouter(
@@ -11,75 +24,130 @@ router = APIRouter(
     dependencies=[Depends(get_current_active_user)]
 )
 
-# Simple cache
-summary_cache = {}
-MAX_CACHE_SIZE = 50
+# Columns of the per-service summary query, in SELECT order
+SUMMARY_FIELDS = (
+    ("service_type", "str"),
+    ("is_total", "bool"),
+    ("total_trips", "int"),
+    ("total_revenue", "float"),
+    ("avg_distance", "float"),
+    ("avg_duration_sec", "float"),
+    ("avg_fare", "float"),
+)
 
 @router.get("", response_model=SummaryStats)
+@cached("summary", ttl=300, cache_control="private, max-age=300", vary="Accept")
 async def get_summary_stats(
+    request: Request,
     response: Response,
     start_date: date = Query(..., description="Start date (YYYY-MM-DD)"),
     end_date: date = Query(..., description="End date (YYYY-MM-DD)"),
     service_type: Optional[ServiceType] = Query(None, description="Filter by service type"),
-    current_user: User = Depends(get_current_active_user)
+    response_format: ResponseFormat = Depends(negotiate_format)
 ):
     """
     Get summary statistics for the dashboard cards.
     Provides aggregated metrics across the selected date range.
+    
+    With `Accept: application/vnd.apache.arrow.stream` or `?format=arrow|parquet`
+    the per-service rows (plus the `is_total` row) are returned as a columnar table.
     """
     # Validate date range
     if start_date > end_date:
         raise HTTPException(status_code=400, detail="start_date must be before end_date")
     
-    # Add cache headers (5 minutes)
-    response.headers["Cache-Control"] = "private, max-age=300"
-    
-    # Check cache
-    cache_key = f"summary:{start_date}:{end_date}:{service_type.value if service_type else None}"
-    if cache_key in summary_cache:
-        return summary_cache[cache_key]
-    
-    # Build query
-    where_clauses = ["metric_date BETWEEN ? AND ?"]
-    params = [start_date, end_date]
+    columnar = response_format != ResponseFormat.JSON
+    if columnar and not arrow_available():
+        raise HTTPException(status_code=501, detail="pyarrow is not installed")
     
-    if service_type:
-        where_clauses.append("service_type = ?")
-        params.append(service_type.value)
-    
-    where_sql = " AND ".join(where_clauses)
+    # Build filter
+    where_sql, params = (
+        QueryBuilder("agg_daily_metrics", db.dialect)
+        .where_date_range("metric_date", start_date, end_date)
+        .where_equals("service_type", service_type.value if service_type else None)
+        .where_sql()
+    )
     
-    # Get overall summary
+    # Overall and per-service totals in one pass. Means are weighted by each
+    # day's trip count (averaging the daily averages would over-weight quiet days),
+    # and days with a NULL average are left out of both sides, as in ROLLUP_AVERAGES.
+    # FHV distance and fare are 0.0 placeholders in the source data, not NULL, so
+    # those two means leave FHV out explicitly (its durations are real).
     summary_query = f"""
         SELECT 
-            SUM(total_trips) as total_trips,
+            service_type,
+            GROUPING(service_type) as is_total,
+            SUM(CAST(total_trips AS BIGINT)) as total_trips,
             SUM(total_revenue) as total_revenue,
-            AVG(avg_trip_distance) as avg_distance,
-            AVG(avg_trip_duration_sec) as avg_duration_sec,
-            AVG(avg_fare_amount) as avg_fare
+            SUM(CASE WHEN service_type <> 'fhv' THEN CAST(avg_trip_distance AS DOUBLE PRECISION) * total_trips END)
+                / NULLIF(SUM(CASE WHEN service_type <> 'fhv' AND avg_trip_distance IS NOT NULL
+                                  THEN CAST(total_trips AS DOUBLE PRECISION) END), 0) as avg_distance,
+            SUM(CAST(avg_trip_duration_sec AS DOUBLE PRECISION) * total_trips)
+                / NULLIF(SUM(CASE WHEN avg_trip_duration_sec IS NOT NULL
+                                  THEN CAST(total_trips AS DOUBLE PRECISION) END), 0) as avg_duration_sec,
+            SUM(CASE WHEN service_type <> 'fhv' THEN CAST(avg_fare_amount AS DOUBLE PRECISION) * total_trips END)
+                / NULLIF(SUM(CASE WHEN service_type <> 'fhv' AND avg_fare_amount IS NOT NULL
+                                  THEN CAST(total_trips AS DOUBLE PRECISION) END), 0) as avg_fare
         FROM agg_daily_metrics
         WHERE {where_sql}
+        GROUP BY GROUPING SETS ((service_type), ())
     """
     
-    summary_result = db.execute_query(summary_query, tuple(params))
-    summary = summary_result[0] if summary_result else {}
-    
-    # Get by service type
-    service_query = f"""
+    # By borough, from the pre-aggregated rollup (fact_trip is too large to scan per request)
+    borough_where_sql, borough_params = (
+        QueryBuilder("agg_daily_borough_metrics", db.dialect)
+        .where_date_range("metric_date", start_date, end_date)
+        .where_equals("service_type", service_type.value if service_type else None)
+        .where_sql()
+    )
+    borough_query = f"""
         SELECT 
-            service_type,
-            SUM(total_trips) as total_trips,
-            SUM(total_revenue) as total_revenue
-        FROM agg_daily_metrics
-        WHERE {where_sql}
-        GROUP BY service_type
-        ORDER BY total_trips DESC
+            pickup_borough,
+            SUM(CAST(total_trips AS BIGINT)) as trip_count,
+            SUM(total_revenue) as total_revenue,
+            CAST(SUM(total_distance) AS DOUBLE PRECISION) / NULLIF(SUM(distance_trips), 0) as avg_distance
+        FROM agg_daily_borough_metrics
+        WHERE {borough_where_sql}
+        GROUP BY pickup_borough
+        ORDER BY trip_count DESC
     """
     
-    by_service = db.execute_query(service_query, tuple(params))
+    if columnar:
+        schema = schema_for(SUMMARY_FIELDS)
+        if memory_store.ready:
+            summary_rows, _ = memory_store.summary_rows(
+                start_date, end_date, service_type.value if service_type else None
+            )
+            columns = {name: [row[name] for row in summary_rows] for name, _ in SUMMARY_FIELDS}
+            batches = [batch_from_columns(schema, columns)]
+        else:
+            batches = [
+                batch_from_rows(schema, rows)
+                async for rows in db.stream_async(summary_query, params)
+            ]
+        return Response(
+            content=serialize(response_format, schema, batches),
+            media_type=MEDIA_TYPES[response_format]
+        )
+    
+    if memory_store.ready:
+        # Same rows, computed from the in-process columnar copy
+        summary_rows, by_borough = memory_store.summary_rows(
+            start_date, end_date, service_type.value if service_type else None
+        )
+    else:
+        # Both queries run concurrently on the database executor
+        summary_rows, by_borough = await asyncio.gather(
+            db.execute_query_async(summary_query, params),
+            db.execute_query_async(borough_query, borough_params)
+        )
     
-    # Skip borough query for performance - fact_trips table is too large (159.5M records)
-    # This was causing timeouts
+    summary = next((row for row in summary_rows if row['is_total']), {})
+    by_service = sorted(
+        (row for row in summary_rows if not row['is_total']),
+        key=lambda row: row['total_trips'] or 0,
+        reverse=True
+    )
     
     result = SummaryStats(
         total_trips=int(summary.get('total_trips', 0) or 0),
@@ -87,13 +155,23 @@ async def get_summary_stats(
         avg_distance=round(float(summary.get('avg_distance', 0) or 0), 2),
         avg_duration_minutes=round(float(summary.get('avg_duration_sec', 0) or 0) / 60, 1),
         avg_fare=round(float(summary.get('avg_fare', 0) or 0), 2),
-        by_service_type=[dict(row) for row in by_service],
-        by_borough=[]  # Empty for performance
+        by_service_type=[
+            {
+                "service_type": row['service_type'],
+                "total_trips": int(row['total_trips'] or 0),
+                "total_revenue": float(row['total_revenue'] or 0)
+            }
+            for row in by_service
+        ],
+        by_borough=[
+            {
+                "pickup_borough": row['pickup_borough'],
+                "trip_count": int(row['trip_count'] or 0),
+                "total_revenue": float(row['total_revenue'] or 0),
+                "avg_distance": round(float(row['avg_distance'] or 0), 2)
+            }
+            for row in by_borough
+        ]
     )
     
-    # Cache result
-    if len(summary_cache) >= MAX_CACHE_SIZE:
-        summary_cache.pop(next(iter(summary_cache)))
-    summary_cache[cache_key] = result
-    
     return result
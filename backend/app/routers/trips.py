@@ -1,15 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from typing import Optional
 from datetime import date
-import math
-import hashlib
+import logging
+from app.config import settings
 from app.database import db
+from app.cache import cached
+from app.query_builder import QueryBuilder, check_columns
+from app.export import csv_header, csv_chunk, ndjson_chunk
+from app.pagination import encode_cursor, decode_cursor, InvalidCursorError
+from app.serialization import json_response
+from app.timing import timed
 from app.models import (
     TripsResponse,
-    Trip,
-    PaginationResponse,
-    ServiceType,
-    User
+    CursorPaginationResponse,
+    ExportFormat,
+    ServiceType
 )
 from app.auth import get_current_active_user
 
@@ -19,112 +25,171 @@ router = APIRouter(
     dependencies=[Depends(get_current_active_user)]
 )
 
+logger = logging.getLogger(__name__)
+
+TRIP_COLUMNS = (
+    "trip_id",
+    "service_type",
+    "pickup_datetime",
+    "dropoff_datetime",
+    "pickup_borough",
+    "pickup_zone",
+    "dropoff_borough",
+    "dropoff_zone",
+    "trip_distance",
+    "total_amount",
+    "trip_duration_sec",
+)
+# Fail at startup, not per request, if the router drifts from the schema
+check_columns("fact_trip", TRIP_COLUMNS)
+
 @router.get("", response_model=TripsResponse)
+@cached("trips", ttl=120, cache_control="private, max-age=120")
 async def get_trips(
+    request: Request,
     response: Response,
     start_date: date = Query(..., description="Start date (YYYY-MM-DD)"),
     end_date: date = Query(..., description="End date (YYYY-MM-DD)"),
     service_type: Optional[ServiceType] = Query(None, description="Filter by service type"),
     borough: Optional[str] = Query(None, description="Filter by pickup borough"),
-    page: int = Query(1, ge=1, description="Page number"),
-    page_size: int = Query(100, ge=1, le=1000, description="Items per page"),
-    current_user: User = Depends(get_current_active_user)
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page's next_cursor"),
+    page_size: int = Query(100, ge=1, le=1000, description="Items per page")
 ):
     """
-    Get sample trip records (limited to 500 for performance).
+    Get trip records, most recent drop-off first.
     
-    Returns sample data to give a glimpse of individual trip details.
-    Limited to most recent 500 records to maintain performance.
+    Uses keyset pagination: pass `pagination.next_cursor` from one response as
+    `cursor` to fetch the next page. Every page is a single index seek on
+    (dropoff_datetime, trip_id), so cost stays constant at any depth.
     """
     
-    try:
-        # Build query to get actual trip records from fact_trips table
-        # Limited to first 500 records for performance (table has 159.5M records)
-        where_clauses = ["1=1"]
-        params = []
-        
-        # Add date filter
-        if start_date and end_date:
-            where_clauses.append("CAST(tpep_dropoff_datetime AS DATE) BETWEEN ? AND ?")
-            params.extend([start_date, end_date])
-        
-        # Add service type filter
-        if service_type:
-            where_clauses.append("service_type = ?")
-            params.append(service_type.value)
-        
-        where_sql = " AND ".join(where_clauses)
-        
-        # Get total count (approximate - limited to 500 for performance)
-        count_query = f"SELECT COUNT(*) as total FROM (SELECT TOP 500 1 FROM fact_trips WHERE {where_sql}) AS t"
-        total_records = db.execute_scalar(count_query, tuple(params))
-        total_records = min(total_records if total_records else 0, 500)  # Cap at 500
-        
-        # Get actual trip records (limited to first 500)
-        offset = (page - 1) * page_size
-        query = f"""
-            SELECT TOP 500
-                trip_id,
-                service_type,
-                tpep_pickup_datetime as pickup_datetime,
-                tpep_dropoff_datetime as dropoff_datetime,
-                pickup_borough,
-                pickup_zone,
-                dropoff_borough,
-                dropoff_zone,
-                trip_distance,
-                total_amount,
-                CAST(DATEDIFF(SECOND, tpep_pickup_datetime, tpep_dropoff_datetime) AS INT) as trip_duration_sec
-            FROM fact_trips 
-            WHERE {where_sql}
-            ORDER BY tpep_dropoff_datetime DESC
-            OFFSET {offset} ROWS FETCH NEXT {page_size} ROWS ONLY
-        """
-        
-        result = db.execute_query(query, tuple(params))
-        
-        # Convert to Trip objects
-        trips_data = []
+    # Validate date range
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be before end_date")
+    
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    # Fetch one extra row to know whether another page exists
+    query, params = (
+        QueryBuilder("fact_trip", db.dialect)
+        .select(*TRIP_COLUMNS)
+        .where_date_range("dropoff_datetime", start_date, end_date)
+        .where_equals("service_type", service_type.value if service_type else None)
+        .where_equals("pickup_borough", borough)
+        .where_before(("dropoff_datetime", "trip_id"), after)
+        .order_by("dropoff_datetime DESC", "trip_id DESC")
+        .top(page_size + 1)
+        .build()
+    )
+    
+    # At most page_size + 1 rows, fetched in one call
+    _, result = await db.execute_query_tuples_async(query, params)
+    has_more = len(result) > page_size
+    result = result[:page_size]
+    
+    trips_data = []
+    with timed("serialize"):
         for row in result:
-            try:
-                trip = Trip(
-                    trip_id=int(row['trip_id']) if row['trip_id'] else 0,
-                    service_type=row['service_type'],
-                    pickup_datetime=row['pickup_datetime'],
-                    dropoff_datetime=row['dropoff_datetime'],
-                    pickup_borough=row.get('pickup_borough'),
-                    pickup_zone=row.get('pickup_zone'),
-                    dropoff_borough=row.get('dropoff_borough'),
-                    dropoff_zone=row.get('dropoff_zone'),
-                    trip_distance=float(row['trip_distance']) if row.get('trip_distance') else 0.0,
-                    total_amount=float(row['total_amount']) if row.get('total_amount') else 0.0,
-                    trip_duration_sec=int(row['trip_duration_sec']) if row.get('trip_duration_sec') else 0
-                )
-                trips_data.append(trip)
-            except (KeyError, ValueError, TypeError) as e:
-                print(f"Skipping row: {e}")
+            trip = _trip_record(row)
+            if trip is None:
+                logger.warning("Skipping malformed trip row %s", row[0])
                 continue
-        
-        return TripsResponse(
-            data=trips_data,
-            pagination=PaginationResponse(
-                page=page,
-                page_size=page_size,
-                total_records=total_records,
-                total_pages=math.ceil(total_records / page_size) if page_size > 0 else 0
-            )
-        )
-    except Exception as e:
-        print(f"Error fetching trips: {e}")
-        import traceback
-        traceback.print_exc()
-        # If query fails, return empty gracefully
-        return TripsResponse(
-            data=[],
-            pagination=PaginationResponse(
-                page=page,
-                page_size=page_size,
-                total_records=0,
-                total_pages=0
-            )
-        )
\ No newline at end of file
+            trips_data.append(trip)
+    
+    next_cursor = None
+    if has_more and result:
+        last = dict(zip(TRIP_COLUMNS, result[-1]))
+        next_cursor = encode_cursor(last['dropoff_datetime'], last['trip_id'])
+    
+    # Same JSON as TripsResponse, without a Trip model per row
+    pagination = CursorPaginationResponse(
+        page_size=page_size,
+        next_cursor=next_cursor,
+        has_more=has_more
+    )
+    return json_response({"data": trips_data, "pagination": pagination.model_dump()})
+
+def _trip_record(row) -> Optional[dict]:
+    """Trip fields from a TRIP_COLUMNS row, with the Trip model's defaults; None if unusable"""
+    (trip_id, service_type, pickup_datetime, dropoff_datetime, pickup_borough, pickup_zone,
+     dropoff_borough, dropoff_zone, trip_distance, total_amount, trip_duration_sec) = row
+    if service_type is None or pickup_datetime is None or dropoff_datetime is None:
+        return None
+    return {
+        "trip_id": int(trip_id) if trip_id else 0,
+        "service_type": service_type,
+        "pickup_datetime": pickup_datetime,
+        "dropoff_datetime": dropoff_datetime,
+        "pickup_borough": pickup_borough,
+        "pickup_zone": pickup_zone,
+        "dropoff_borough": dropoff_borough,
+        "dropoff_zone": dropoff_zone,
+        "trip_distance": float(trip_distance) if trip_distance else 0.0,
+        "total_amount": float(total_amount) if total_amount else 0.0,
+        "trip_duration_sec": int(trip_duration_sec) if trip_duration_sec else 0,
+    }
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+    ExportFormat.NDJSON: "application/x-ndjson",
+}
+
+@router.get("/export")
+async def export_trips(
+    request: Request,
+    start_date: date = Query(..., description="Start date (YYYY-MM-DD)"),
+    end_date: date = Query(..., description="End date (YYYY-MM-DD)"),
+    service_type: Optional[ServiceType] = Query(None, description="Filter by service type"),
+    borough: Optional[str] = Query(None, description="Filter by pickup borough"),
+    export_format: ExportFormat = Query(ExportFormat.CSV, alias="format", description="csv or ndjson"),
+    limit: Optional[int] = Query(None, ge=1, description="Maximum rows to export")
+):
+    """
+    Stream every matching trip as CSV or NDJSON, most recent drop-off first.
+    
+    Rows are read with fetchmany in EXPORT_BATCH_SIZE batches and written out
+    one batch per chunk, so memory use does not grow with the export size.
+    The query is cancelled and its connection released if the client disconnects.
+    """
+    
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be before end_date")
+    
+    builder = (
+        QueryBuilder("fact_trip", db.dialect)
+        .select(*TRIP_COLUMNS)
+        .where_date_range("dropoff_datetime", start_date, end_date)
+        .where_equals("service_type", service_type.value if service_type else None)
+        .where_equals("pickup_borough", borough)
+        .order_by("dropoff_datetime DESC", "trip_id DESC")
+    )
+    if limit is not None:
+        builder.top(limit)
+    query, params = builder.build()
+    
+    encode = csv_chunk if export_format == ExportFormat.CSV else ndjson_chunk
+    
+    async def body():
+        if export_format == ExportFormat.CSV:
+            yield csv_header(TRIP_COLUMNS)
+        batches = db.stream_async(query, params, settings.EXPORT_BATCH_SIZE)
+        try:
+            async for rows in batches:
+                if await request.is_disconnected():
+                    logger.info("Trip export cancelled by client")
+                    break
+                yield encode(TRIP_COLUMNS, rows)
+        finally:
+            await batches.aclose()
+    
+    filename = f"trips_{start_date.isoformat()}_{end_date.isoformat()}.{export_format.value}"
+    return StreamingResponse(
+        body(),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -0,0 +1,46 @@
+"""
+Fast JSON path for large responses.
+
+Row tuples from the cursor are turned into plain dicts and encoded with orjson
+in one call, producing the same JSON the Pydantic response models would,
+without building and re-validating a model object per row. orjson is optional;
+the standard json module is used when it is missing.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Sequence
+from fastapi import Response
+from app.timing import timed
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _default(value: Any):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> bytes:
+    """Compact JSON bytes; DECIMAL values are written as numbers, dates as ISO 8601"""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default)
+    return json.dumps(value, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def records(columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> List[Dict[str, Any]]:
+    """Row tuples to dicts keyed by column name"""
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def json_response(value: Any) -> Response:
+    """Pre-encoded JSON response (FastAPI skips response_model validation for it)"""
+    with timed("serialize"):
+        content = dumps(value)
+    return Response(content=content, media_type="application/json")
@@ -0,0 +1,110 @@
+"""
+Per-request phase timings, sent back in a ``Server-Timing`` header.
+
+ServerTimingMiddleware puts a RequestTiming in a context variable for each
+request; auth, the database layer and the serializers add their time to it
+with ``add_timing`` / ``timed``. Database calls run on executor threads, so
+Database.run copies the context into them. The header is written when the
+response starts, e.g.:
+
+    Server-Timing: auth;dur=0.4, db;dur=812.3;desc="2 queries", serialize;dur=35.0, total;dur=851.2
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+# Phases in header order
+PHASES = ("auth", "db", "serialize")
+
+
+class RequestTiming:
+    """Milliseconds and call counts per phase for one request (thread-safe)"""
+
+    __slots__ = ("method", "path", "started", "_lock", "_ms", "_counts")
+
+    def __init__(self, method: str = "", path: str = ""):
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._ms: Dict[str, float] = {}
+        self._counts: Dict[str, int] = {}
+
+    def add(self, phase: str, seconds: float, calls: int = 1):
+        with self._lock:
+            self._ms[phase] = self._ms.get(phase, 0.0) + seconds * 1000
+            self._counts[phase] = self._counts.get(phase, 0) + calls
+
+    def phases(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._ms)
+
+    def header(self) -> str:
+        """Server-Timing value: the recorded phases and the time so far as ``total``"""
+        with self._lock:
+            ms = dict(self._ms)
+            counts = dict(self._counts)
+        entries: List[str] = []
+        for phase in PHASES + tuple(sorted(set(ms) - set(PHASES))):
+            if phase not in ms:
+                continue
+            entry = f"{phase};dur={ms[phase]:.1f}"
+            if phase == "db":
+                entry += f';desc="{counts[phase]} {"query" if counts[phase] == 1 else "queries"}"'
+            entries.append(entry)
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+
+_current: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+
+def current_timing() -> Optional[RequestTiming]:
+    """The RequestTiming of the request being handled, if any"""
+    return _current.get()
+
+
+def add_timing(phase: str, seconds: float, calls: int = 1):
+    """Add time to a phase of the current request (no-op outside a request)"""
+    timing = _current.get()
+    if timing is not None:
+        timing.add(phase, seconds, calls)
+
+
+@contextmanager
+def timed(phase: str):
+    """Time the block into ``phase`` of the current request"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_timing(phase, time.perf_counter() - started)
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware that tracks phase timings and adds the Server-Timing header"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming(scope["method"], scope["path"])
+        token = _current.set(timing)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timing.header().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
@@ -0,0 +1,128 @@
+"""
+Data-version watermark for conditional responses.
+
+The API's data only changes when the ETL loads trips or the rollups are
+refreshed, so two probes identify the current state of every table the
+routers read: MAX(trip_id), and agg_service_stats.refreshed_at, which the
+notebook and app.rollups touch after rewriting the aggregate tables (the
+aggregates' own created_at columns do not survive a Spark overwrite).
+The watermark is polled in the background (DATA_VERSION_POLL_SEC) and folded
+into ETags and cache keys: a new load produces new ETags and bypasses cached
+bodies, while an unchanged version lets conditional requests be answered
+with 304 without any database work. If the probe fails the version is
+dropped, so no ETags are sent until it can be read again.
+"""
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_QUERY = """
+    SELECT
+        (SELECT MAX(trip_id) FROM fact_trip) AS max_trip_id,
+        (SELECT MAX(refreshed_at) FROM agg_service_stats) AS stats_refreshed_at
+"""
+
+# For backends whose fact_trip is a view over files (DuckDB/Parquet), where
+# MAX(trip_id) would scan every file at each poll. agg_service_stats is built
+# from the same view and already stores each service's max_trip_id.
+STATS_WATERMARK_QUERY = """
+    SELECT
+        (SELECT MAX(max_trip_id) FROM agg_service_stats) AS max_trip_id,
+        (SELECT MAX(refreshed_at) FROM agg_service_stats) AS stats_refreshed_at
+"""
+
+
+class DataVersion:
+    """Current data watermark as a short opaque string (None until first probed)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version: Optional[str] = None
+        self._watermark: Optional[Dict[str, Any]] = None
+        self.checked_at: Optional[datetime] = None
+        self.changed_at: Optional[datetime] = None
+
+    @property
+    def current(self) -> Optional[str]:
+        return self._version
+
+    def refresh(self, database) -> bool:
+        """
+        Probe the watermark through ``database`` (blocking); True if it changed.
+        A failed probe clears the version before the error propagates.
+        """
+        backend = getattr(database, "backend", None)
+        try:
+            rows = database.execute_query(getattr(backend, "watermark_query", WATERMARK_QUERY))
+        except Exception:
+            self.invalidate()
+            raise
+        return self.update(rows[0] if rows else {})
+
+    def invalidate(self):
+        """Forget the version: no ETags or versioned cache keys until the next successful probe"""
+        with self._lock:
+            if self._version is not None:
+                logger.warning("Data version %s dropped until the watermark can be read again", self._version)
+            self._version = None
+            self._watermark = None
+
+    def update(self, watermark: Dict[str, Any]) -> bool:
+        """Set the version from watermark values; True if it changed"""
+        digest = hashlib.sha256(
+            repr(sorted(watermark.items())).encode()
+        ).hexdigest()[:16]
+        now = datetime.utcnow()
+        with self._lock:
+            self.checked_at = now
+            if digest == self._version:
+                return False
+            if self._version is not None:
+                logger.info("Data version changed: %s -> %s", self._version, digest)
+            self._version = digest
+            self._watermark = watermark
+            self.changed_at = now
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "version": self._version,
+                "watermark": {k: str(v) if v is not None else None for k, v in (self._watermark or {}).items()},
+                "checked_at": self.checked_at.isoformat() if self.checked_at else None,
+                "changed_at": self.changed_at.isoformat() if self.changed_at else None,
+            }
+
+
+def make_etag(key: str, version: str) -> str:
+    """Strong ETag for a cache key at a data version"""
+    return '"' + hashlib.sha256(f"{version}|{key}".encode()).hexdigest()[:32] + '"'
+
+
+def _opaque(tag: str) -> str:
+    """Validator without the W/ prefix or a content-coding suffix ("abc-gzip" -> "abc")"""
+    tag = tag[2:] if tag.startswith("W/") else tag
+    for suffix in ('-gzip"', '-br"'):
+        if tag.endswith(suffix):
+            return tag[:-len(suffix)] + '"'
+    return tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    RFC 9110 If-None-Match comparison (weak comparison, as the spec requires).
+    Validators of compressed variants match the identity ETag they derive from.
+    """
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    if "*" in candidates:
+        return True
+    return any(_opaque(c) == _opaque(etag) for c in candidates)
+
+
+data_version = DataVersion()
@@ -0,0 +1,128 @@
+"""
+Background cache warm-up after startup.
+
+A fresh process starts with an empty result cache, so the first dashboard
+loads pay full database latency. The warmer runs the dashboard endpoint for
+the default filters (the last CACHE_WARMUP_DAYS days of data, for every
+service type and for all services) so the summary, daily aggregate and first
+trips page entries are already cached. It runs as a background task from the
+lifespan, never delays readiness, and reports progress on /health.
+"""
+import asyncio
+import logging
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from app.config import settings
+from app.database import db
+from app.models import Granularity, ServiceType
+from app.routers import dashboard
+from app.versioning import data_version
+
+logger = logging.getLogger(__name__)
+
+# Ranges end at the newest loaded day rather than today (loads lag behind)
+ANCHOR_QUERY = "SELECT MAX(metric_date) FROM agg_daily_metrics"
+
+Target = Tuple[date, date, Optional[ServiceType]]
+
+
+def warmup_targets(anchor: date, days: Sequence[int]) -> List[Target]:
+    """(start_date, end_date, service_type) for each range and service; None is all services"""
+    services: List[Optional[ServiceType]] = [None] + list(ServiceType)
+    return [
+        (anchor - timedelta(days=n - 1), anchor, service)
+        for n in days
+        for service in services
+    ]
+
+
+class CacheWarmer:
+    """Runs the warm-up targets with bounded concurrency and tracks progress"""
+
+    def __init__(self, days: Sequence[int], concurrency: int, trips_page_size: int):
+        self.days = list(days)
+        self.concurrency = max(1, concurrency)
+        self.trips_page_size = trips_page_size
+        self.state = "pending"
+        self.total = 0
+        self.completed = 0
+        self.failed = 0
+        self.started_at: Optional[datetime] = None
+        self.seconds: Optional[float] = None
+
+    async def anchor_date(self, database=db) -> date:
+        """Newest metric_date, or today when the table is empty or unreachable"""
+        try:
+            latest = await database.execute_scalar_async(ANCHOR_QUERY)
+        except Exception as e:
+            logger.warning("Cache warm-up could not read the latest metric date: %s", e)
+            latest = None
+        if isinstance(latest, datetime):
+            latest = latest.date()
+        elif isinstance(latest, str):
+            latest = date.fromisoformat(latest[:10])
+        return latest or date.today()
+
+    async def warm(self, start_date: date, end_date: date, service_type: Optional[ServiceType]):
+        """Load one dashboard filter through the cached endpoints"""
+        await dashboard.get_dashboard(
+            start_date=start_date,
+            end_date=end_date,
+            service_type=service_type,
+            borough=None,
+            daily_page_size=10000,
+            granularity=Granularity.DAY,
+            trips_page_size=self.trips_page_size
+        )
+
+    async def run(self, database=db):
+        """Warm every target; failures are counted and logged, never raised"""
+        self.state = "running"
+        self.started_at = datetime.utcnow()
+        started = time.perf_counter()
+        try:
+            # Cache keys include the data version, so it must be known first
+            if data_version.current is None:
+                await database.run(data_version.refresh, database)
+            targets = warmup_targets(await self.anchor_date(database), self.days)
+        except Exception as e:
+            logger.warning("Cache warm-up could not start: %s", e)
+            self.state = "failed"
+            return
+        self.total = len(targets)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def one(target: Target):
+            async with semaphore:
+                try:
+                    await self.warm(*target)
+                    self.completed += 1
+                except Exception as e:
+                    self.failed += 1
+                    logger.warning("Cache warm-up failed for %s..%s %s: %s",
+                                   target[0], target[1], target[2] and target[2].value, e)
+
+        await asyncio.gather(*(one(target) for target in targets))
+        self.seconds = round(time.perf_counter() - started, 3)
+        self.state = "done"
+        logger.info("Cache warm-up finished: %d/%d filters in %.3fs (%d failed)",
+                    self.completed, self.total, self.seconds, self.failed)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "total": self.total,
+            "completed": self.completed,
+            "failed": self.failed,
+            "progress_pct": round(100.0 * (self.completed + self.failed) / self.total, 1) if self.total else 0.0,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "seconds": self.seconds,
+        }
+
+
+cache_warmer = CacheWarmer(
+    days=settings.CACHE_WARMUP_DAYS,
+    concurrency=settings.CACHE_WARMUP_CONCURRENCY,
+    trips_page_size=settings.CACHE_WARMUP_TRIPS_PAGE_SIZE
+)
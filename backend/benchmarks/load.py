@@ -0,0 +1,392 @@
+"""
+HTTP load test with latency percentiles per endpoint.
+
+Builds the SQLite stand-in database (benchmarks.standin), starts the API on it
+in a separate uvicorn process, and drives concurrent authenticated traffic
+that mirrors the dashboard: each virtual user logs in once, then repeatedly
+loads /api/dashboard for a common filter, pages through trips with the
+returned cursor, and sometimes calls /api/statistics or the aggregates
+endpoint directly. Throughput and p50/p95/p99 per endpoint are written as
+JSON (plus the server's cache and pool stats), so runs can be compared
+across commits:
+
+    python -m benchmarks.load --duration 30 --concurrency 16 --output load-report.json
+
+Point it at a running server instead (no stand-in database is built):
+
+    python -m benchmarks.load --url http://localhost:8000 --username admin --password secret
+"""
+import argparse
+import gzip
+import http.client
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks import standin
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# (days, weight): the dashboard's common ranges, ending at --anchor
+RANGES = ((7, 30), (30, 30), (90, 20), (365, 12), (1826, 8))
+SERVICES = (None, None, None, None) + standin.SERVICES  # "All services" is the usual view
+
+
+def chart_granularity(days: int) -> str:
+    """Bucket the dashboard asks for (same thresholds as the frontend)"""
+    if days <= 180:
+        return "day"
+    return "month" if days <= 365 else "year"
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+# ---------------------------------------------------------------------- #
+# Server
+# ---------------------------------------------------------------------- #
+
+def serve(db_path: str, port: int):
+    """Run the API on the stand-in database (child process entry point)"""
+    for name, value in (("DB_SERVER", "standin"), ("DB_NAME", "standin"), ("DB_USER", "standin"),
+                        ("DB_PASSWORD", "standin"), ("SECRET_KEY", "load-test")):
+        os.environ.setdefault(name, value)
+    # GROUPING SETS / DATEFROMPARTS paths need the in-memory store on SQLite
+    os.environ["INMEMORY_AGGREGATES"] = "true"
+
+    import uvicorn
+    import app.database
+
+    # Installed before app.main is imported, so the routers, the warm-up and
+    # the db_pool metrics all bind to the stand-in database's pool
+    app.database.db = app.database.Database(standin.StandInBackend(db_path))
+    from app.main import app as api
+    uvicorn.run(api, host="127.0.0.1", port=port, log_level="warning")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(base_url: str, timeout: float, need_store: bool) -> Dict[str, Any]:
+    """Poll /health until it answers (and the in-memory store is loaded, if required)"""
+    deadline = time.monotonic() + timeout
+    last_error = None
+    while time.monotonic() < deadline:
+        try:
+            status, body = Connection(base_url).request("GET", "/health")[:2]
+            if status == 200:
+                health = json.loads(body)
+                if not need_store or health.get("inmemory_aggregates", {}).get("ready"):
+                    return health
+        except OSError as e:
+            last_error = e
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} not ready after {timeout:.0f}s ({last_error})")
+
+
+# ---------------------------------------------------------------------- #
+# Client
+# ---------------------------------------------------------------------- #
+
+class Connection:
+    """Keep-alive HTTP connection for one virtual user"""
+
+    def __init__(self, base_url: str, timeout: float = 60):
+        parts = urlsplit(base_url)
+        self._factory = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self._host = parts.netloc
+        self._timeout = timeout
+        self._conn = None
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        headers: Optional[Dict[str, str]] = None,
+        body: Optional[bytes] = None
+    ) -> Tuple[int, bytes, float]:
+        """(status, decoded body, seconds); reconnects once if the kept-alive socket was dropped"""
+        headers = {"Accept-Encoding": "gzip", **(headers or {})}
+        for attempt in (1, 2):
+            if self._conn is None:
+                self._conn = self._factory(self._host, timeout=self._timeout)
+            started = time.perf_counter()
+            try:
+                self._conn.request(method, path, body=body, headers=headers)
+                response = self._conn.getresponse()
+                payload = response.read()
+            except (http.client.HTTPException, OSError):
+                self._conn.close()
+                self._conn = None
+                if attempt == 2:
+                    raise
+                continue
+            elapsed = time.perf_counter() - started
+            if response.getheader("Content-Encoding") == "gzip":
+                payload = gzip.decompress(payload)
+            return response.status, payload, elapsed
+        raise AssertionError("unreachable")
+
+
+class Recorder:
+    """Latency samples per endpoint for one worker (merged after the run)"""
+
+    def __init__(self, measure_from: float):
+        self.measure_from = measure_from
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def record(self, endpoint: str, status: int, seconds: float):
+        if time.monotonic() < self.measure_from:
+            return  # Warm-up traffic
+        self.samples.setdefault(endpoint, []).append(seconds * 1000)
+        if status >= 400:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+
+class VirtualUser(threading.Thread):
+    """Logs in once, then loops over dashboard-like page views until the deadline"""
+
+    def __init__(self, index: int, args, measure_from: float, deadline: float):
+        super().__init__(name=f"user-{index}", daemon=True)
+        self.args = args
+        self.rng = random.Random(args.seed * 1000 + index)
+        self.deadline = deadline
+        self.recorder = Recorder(measure_from)
+        self.conn = Connection(args.url)
+        self.headers: Dict[str, str] = {}
+        self.failure: Optional[BaseException] = None
+
+    def call(self, endpoint: str, path: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> Tuple[int, bytes]:
+        query = "?" + urlencode({k: v for k, v in params.items() if v is not None}) if params else ""
+        method = endpoint.split(" ", 1)[0]
+        status, body, seconds = self.conn.request(method, path + query, headers={**self.headers, **kwargs.pop("headers", {})}, **kwargs)
+        self.recorder.record(endpoint, status, seconds)
+        return status, body
+
+    def login(self):
+        status, body = self.call(
+            "POST /token", "/token",
+            body=urlencode({"username": self.args.username, "password": self.args.password}).encode(),
+            headers={"Content-Type": "application/x-www-form-urlencoded"}
+        )
+        if status != 200:
+            raise RuntimeError(f"Login failed with HTTP {status}: {body[:200]!r}")
+        self.headers = {"Authorization": f"Bearer {json.loads(body)['access_token']}"}
+
+    def page_view(self):
+        days = self.rng.choices([d for d, _ in RANGES], weights=[w for _, w in RANGES])[0]
+        end = self.args.anchor
+        start = end - timedelta(days=days - 1)
+        service = self.rng.choice(SERVICES)
+        granularity = chart_granularity(days)
+        filters = {"start_date": start.isoformat(), "end_date": end.isoformat(), "service_type": service}
+
+        status, body = self.call(
+            "GET /api/dashboard", "/api/dashboard",
+            {**filters, "trips_page_size": 50, "granularity": granularity}
+        )
+        cursor = json.loads(body)["trips"]["pagination"]["next_cursor"] if status == 200 else None
+
+        # Paging through the trips table
+        if cursor and self.rng.random() < 0.4:
+            for _ in range(self.rng.randint(1, 3)):
+                status, body = self.call("GET /api/trips", "/api/trips", {**filters, "page_size": 50, "cursor": cursor})
+                cursor = json.loads(body)["pagination"]["next_cursor"] if status == 200 else None
+                if not cursor:
+                    break
+
+        if self.rng.random() < 0.15:
+            self.call("GET /api/aggregates/daily", "/api/aggregates/daily",
+                      {**filters, "page_size": 10000, "granularity": granularity})
+        if self.rng.random() < 0.1:
+            self.call("GET /api/statistics", "/api/statistics")
+
+    def run(self):
+        try:
+            self.login()
+            while time.monotonic() < self.deadline:
+                self.page_view()
+                if self.args.think_ms:
+                    time.sleep(self.rng.uniform(0, self.args.think_ms) / 1000)
+        except BaseException as e:  # Reported by the main thread
+            self.failure = e
+
+
+# ---------------------------------------------------------------------- #
+# Report
+# ---------------------------------------------------------------------- #
+
+def build_report(users: List[VirtualUser], args, measured_sec: float, dataset: Optional[dict], health: Dict[str, Any]) -> dict:
+    samples: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    for user in users:
+        for endpoint, values in user.recorder.samples.items():
+            samples.setdefault(endpoint, []).extend(values)
+        for endpoint, count in user.recorder.errors.items():
+            errors[endpoint] = errors.get(endpoint, 0) + count
+
+    endpoints = {}
+    for endpoint in sorted(samples):
+        ordered = sorted(samples[endpoint])
+        endpoints[endpoint] = {
+            "requests": len(ordered),
+            "errors": errors.get(endpoint, 0),
+            "throughput_rps": round(len(ordered) / measured_sec, 2),
+            "mean_ms": round(sum(ordered) / len(ordered), 2),
+            "p50_ms": round(percentile(ordered, 50), 2),
+            "p95_ms": round(percentile(ordered, 95), 2),
+            "p99_ms": round(percentile(ordered, 99), 2),
+            "max_ms": round(ordered[-1], 2),
+        }
+    total = sum(e["requests"] for e in endpoints.values())
+
+    return {
+        "meta": {
+            "started_at": args.started_at,
+            "commit": git_commit(),
+            "target": args.url,
+            "standin": dataset is not None,
+            "dataset": dataset,
+            "concurrency": args.concurrency,
+            "duration_sec": args.duration,
+            "warmup_sec": args.warmup,
+            "think_ms": args.think_ms,
+            "seed": args.seed,
+            "python": platform.python_version(),
+        },
+        "totals": {
+            "requests": total,
+            "errors": sum(e["errors"] for e in endpoints.values()),
+            "throughput_rps": round(total / measured_sec, 2),
+        },
+        "endpoints": endpoints,
+        "server": {key: health.get(key) for key in ("cache", "single_flight", "database_pool")},
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report: dict):
+    print(f"\n{'endpoint':<30}{'reqs':>8}{'err':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for endpoint, row in report["endpoints"].items():
+        print(f"{endpoint:<30}{row['requests']:>8}{row['errors']:>6}{row['throughput_rps']:>9.1f}"
+              f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}")
+    totals = report["totals"]
+    print(f"{'total':<30}{totals['requests']:>8}{totals['errors']:>6}{totals['throughput_rps']:>9.1f}   (ms)")
+
+
+# ---------------------------------------------------------------------- #
+# Main
+# ---------------------------------------------------------------------- #
+
+def run(args) -> dict:
+    args.started_at = datetime.utcnow().isoformat(timespec="seconds") + "Z"
+    server = None
+    dataset = None
+    workdir = None
+    try:
+        if args.url is None:
+            workdir = tempfile.mkdtemp(prefix="tlc-load-")
+            db_path = args.db or os.path.join(workdir, "standin.sqlite")
+            if not (args.db and os.path.exists(args.db)):
+                dataset = standin.populate(db_path, args.days, args.trips_per_day, end=args.anchor, seed=args.seed)
+                print(f"Stand-in database: {', '.join(f'{t} {n:,}' for t, n in dataset.items())}")
+            else:
+                dataset = {"path": args.db}
+            port = free_port()
+            args.url = f"http://127.0.0.1:{port}"
+            server = subprocess.Popen(
+                [sys.executable, "-m", "benchmarks.load", "--serve", db_path, "--port", str(port)],
+                cwd=BACKEND_DIR, env={**os.environ, **args.server_env}
+            )
+        wait_ready(args.url, args.ready_timeout, need_store=server is not None)
+
+        now = time.monotonic()
+        measure_from = now + args.warmup
+        deadline = measure_from + args.duration
+        users = [VirtualUser(i, args, measure_from, deadline) for i in range(args.concurrency)]
+        print(f"Driving {args.concurrency} users against {args.url} for {args.warmup}s warm-up + {args.duration}s ...")
+        for user in users:
+            user.start()
+        for user in users:
+            user.join()
+        failures = [u.failure for u in users if u.failure is not None]
+        if failures:
+            raise RuntimeError(f"{len(failures)} virtual user(s) failed: {failures[0]!r}")
+
+        health = json.loads(Connection(args.url).request("GET", "/health")[1])
+        return build_report(users, args, args.duration, dataset, health)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+        if workdir and not args.db:
+            for name in os.listdir(workdir):
+                os.remove(os.path.join(workdir, name))
+            os.rmdir(workdir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the API with a dashboard-like traffic mix")
+    parser.add_argument("--url", help="Test a running server instead of starting one on the stand-in database")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="secret")
+    parser.add_argument("--concurrency", type=int, default=8, help="Virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="Seconds of traffic before measuring")
+    parser.add_argument("--think-ms", type=float, default=0, help="Max random pause between page views")
+    parser.add_argument("--anchor", type=date.fromisoformat, default=date(2024, 12, 31), help="Last day of the dashboard ranges")
+    parser.add_argument("--days", type=int, default=1826, help="Stand-in: days of trips")
+    parser.add_argument("--trips-per-day", type=int, default=100, help="Stand-in: trips per day")
+    parser.add_argument("--db", help="Stand-in: reuse (or keep) this SQLite file")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--ready-timeout", type=float, default=120)
+    parser.add_argument("--output", default="load-report.json", help="JSON report path")
+    parser.add_argument("--serve", metavar="DB_PATH", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port)
+        return
+
+    # Fixed server settings keep runs comparable; the warm-up would skew the first seconds
+    args.server_env = {"CACHE_WARMUP": "false"}
+    report = run(args)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print_report(report)
+    print(f"\n✅ Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
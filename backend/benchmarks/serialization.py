@@ -0,0 +1,119 @@
+"""
+Response serialization benchmark.
+
+Compares the old per-row Pydantic path (model per row, FastAPI response_model
+validation, JSONResponse) with the fast path (row tuples -> dicts -> one
+orjson call) for /api/aggregates/daily and /api/trips pages. No database is
+needed; rows are synthetic tuples shaped like the pyodbc results.
+
+    python -m benchmarks.serialization --rows 10000 --repeat 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from app.models import (
+    CursorPaginationResponse,
+    DailyAggregate,
+    DailyAggregatesResponse,
+    PaginationResponse,
+    Trip,
+    TripsResponse
+)
+from app.routers.aggregates import AGGREGATE_COLUMNS
+from app.routers.trips import _trip_record
+from app.serialization import dumps, records
+
+
+def daily_rows(n):
+    start = date(2024, 12, 31)
+    return [
+        (start - timedelta(days=i // 4), ("fhv", "fhvhv", "green", "yellow")[i % 4], 1000 + i,
+         Decimal("25000.50"), Decimal("3.12"), Decimal("912.4"), Decimal("18.75"))
+        for i in range(n)
+    ]
+
+
+def trip_rows(n):
+    start = datetime(2024, 12, 31, 23, 59)
+    return [
+        (n - i, "yellow", start - timedelta(minutes=i + 15), start - timedelta(minutes=i),
+         "Manhattan", "Midtown Center", "Queens", "Astoria",
+         Decimal("2.40"), Decimal("17.80"), 900)
+        for i in range(n)
+    ]
+
+
+def pydantic_daily(rows):
+    data = [DailyAggregate(**row) for row in records(AGGREGATE_COLUMNS, rows)]
+    pagination = PaginationResponse(page=1, page_size=len(rows), total_records=len(rows), total_pages=1)
+    return DailyAggregatesResponse(data=data, pagination=pagination)
+
+
+def pydantic_trips(rows):
+    data = [Trip(**record) for record in (_trip_record(row) for row in rows)]
+    return TripsResponse(data=data, pagination=CursorPaginationResponse(page_size=len(rows), has_more=False))
+
+
+def fast_daily(rows):
+    pagination = PaginationResponse(page=1, page_size=len(rows), total_records=len(rows), total_pages=1)
+    return dumps({"data": records(AGGREGATE_COLUMNS, rows), "pagination": pagination.model_dump()})
+
+
+def fast_trips(rows):
+    pagination = CursorPaginationResponse(page_size=len(rows), has_more=False)
+    return dumps({"data": [_trip_record(row) for row in rows], "pagination": pagination.model_dump()})
+
+
+def before(build, response_model, rows):
+    """What FastAPI does for a model returned from a route with response_model"""
+    field = create_response_field(name="response", type_=response_model)
+    content = asyncio.run(serialize_response(field=field, response_content=build(rows), is_coroutine=True))
+    return JSONResponse(content).body
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark response serialization")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    cases = [
+        ("aggregates/daily", daily_rows(args.rows), pydantic_daily, DailyAggregatesResponse, fast_daily),
+        ("trips", trip_rows(args.rows), pydantic_trips, TripsResponse, fast_trips),
+    ]
+    report = {}
+    for name, rows, build, model, fast in cases:
+        slow_s, slow_body = timed(lambda: before(build, model, rows), args.repeat)
+        fast_s, fast_body = timed(lambda: fast(rows), args.repeat)
+        assert json.loads(slow_body) == json.loads(fast_body), f"{name}: outputs differ"
+        report[name] = {
+            "rows": args.rows,
+            "pydantic_ms": round(slow_s * 1000, 2),
+            "fast_ms": round(fast_s * 1000, 2),
+            "speedup": round(slow_s / fast_s, 1),
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
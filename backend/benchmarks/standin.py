@@ -0,0 +1,330 @@
+"""
+Local SQLite stand-in for the Azure SQL database.
+
+Creates the tables the API reads (fact_trip, agg_daily_metrics,
+agg_daily_borough_metrics, agg_service_stats, dim_taxi_zone) in a SQLite file
+and fills them with deterministic synthetic trips; the aggregate tables are
+derived from fact_trip the way the notebook and app.rollups build them, so
+every endpoint agrees with every other.
+
+``connect(path)`` returns a DB-API connection that accepts the T-SQL the
+routers emit: ``TOP (?)`` and ``OFFSET ? ROWS FETCH NEXT ? ROWS ONLY`` are
+rewritten to LIMIT/OFFSET (moving their parameters) and ``COUNT_BIG`` to
+COUNT; ``StandInBackend(path)`` plugs it into app.database.Database.
+GROUPING SETS and DATEFROMPARTS have no SQLite equivalent, so the summary
+and rollup SQL paths need the in-memory aggregate store
+(INMEMORY_AGGREGATES=true), which the load harness turns on.
+
+    python -m benchmarks.standin --output /tmp/tlc.sqlite --days 365 --trips-per-day 200
+"""
+import argparse
+import functools
+import os
+import random
+import re
+import sqlite3
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Optional, Sequence, Tuple
+
+from app.backends import Backend
+
+SERVICES = ("yellow", "green", "fhv", "fhvhv")
+
+# (location_id, borough, zone_name, service_zone)
+ZONES = (
+    (4, "Manhattan", "Alphabet City", "Yellow Zone"),
+    (43, "Manhattan", "Central Park", "Yellow Zone"),
+    (161, "Manhattan", "Midtown Center", "Yellow Zone"),
+    (230, "Manhattan", "Times Sq/Theatre District", "Yellow Zone"),
+    (7, "Queens", "Astoria", "Boro Zone"),
+    (132, "Queens", "JFK Airport", "Airports"),
+    (138, "Queens", "LaGuardia Airport", "Airports"),
+    (61, "Brooklyn", "Crown Heights North", "Boro Zone"),
+    (181, "Brooklyn", "Park Slope", "Boro Zone"),
+    (69, "Bronx", "East Concourse/Concourse Village", "Boro Zone"),
+    (206, "Staten Island", "Saint George/New Brighton", "Boro Zone"),
+    (264, "Unknown", "NV", "N/A"),
+)
+
+# Column types follow the notebook DDL; DATE/TIMESTAMP come back as date/datetime
+SCHEMA_SQL = """
+CREATE TABLE dim_taxi_zone (
+    location_id INTEGER PRIMARY KEY,
+    borough TEXT,
+    zone_name TEXT,
+    service_zone TEXT
+);
+CREATE TABLE fact_trip (
+    trip_id INTEGER PRIMARY KEY,
+    service_type TEXT NOT NULL,
+    pickup_datetime TIMESTAMP NOT NULL,
+    dropoff_datetime TIMESTAMP NOT NULL,
+    pickup_location_id INTEGER,
+    dropoff_location_id INTEGER,
+    pickup_borough TEXT,
+    pickup_zone TEXT,
+    dropoff_borough TEXT,
+    dropoff_zone TEXT,
+    trip_distance REAL,
+    total_amount REAL,
+    trip_duration_sec INTEGER,
+    pickup_date DATE,
+    is_valid INTEGER DEFAULT 1,
+    created_at TIMESTAMP
+);
+CREATE INDEX IX_fact_trip_dropoff ON fact_trip (dropoff_datetime DESC, trip_id DESC);
+CREATE INDEX IX_fact_trip_pickup_date ON fact_trip (pickup_date);
+CREATE TABLE agg_daily_metrics (
+    metric_date DATE NOT NULL,
+    service_type TEXT NOT NULL,
+    total_trips INTEGER,
+    total_revenue REAL,
+    avg_trip_distance REAL,
+    avg_trip_duration_sec REAL,
+    avg_fare_amount REAL,
+    created_at TIMESTAMP,
+    PRIMARY KEY (metric_date, service_type)
+);
+CREATE TABLE agg_daily_borough_metrics (
+    metric_date DATE NOT NULL,
+    service_type TEXT NOT NULL,
+    pickup_borough TEXT NOT NULL,
+    total_trips INTEGER,
+    total_revenue REAL,
+    total_distance REAL,
+    distance_trips INTEGER,
+    total_duration_sec INTEGER,
+    created_at TIMESTAMP,
+    PRIMARY KEY (metric_date, service_type, pickup_borough)
+);
+CREATE TABLE agg_service_stats (
+    service_type TEXT PRIMARY KEY,
+    total_trips INTEGER,
+    valid_trips INTEGER,
+    total_revenue REAL,
+    min_pickup_date DATE,
+    max_pickup_date DATE,
+    max_trip_id INTEGER,
+    refreshed_at TIMESTAMP
+);
+"""
+
+ROLLUP_SQL = """
+INSERT INTO agg_daily_metrics
+SELECT pickup_date, service_type, COUNT(*), SUM(total_amount), AVG(trip_distance),
+       AVG(trip_duration_sec), AVG(total_amount), :now
+FROM fact_trip WHERE is_valid = 1
+GROUP BY pickup_date, service_type;
+
+INSERT INTO agg_daily_borough_metrics
+SELECT pickup_date, service_type, COALESCE(pickup_borough, 'Unknown'), COUNT(*),
+       SUM(total_amount), SUM(trip_distance),
+       COUNT(CASE WHEN service_type <> 'fhv' THEN trip_distance END), SUM(trip_duration_sec), :now
+FROM fact_trip WHERE is_valid = 1
+GROUP BY pickup_date, service_type, COALESCE(pickup_borough, 'Unknown');
+
+INSERT INTO agg_service_stats
+SELECT service_type, COUNT(*), SUM(is_valid),
+       COALESCE(SUM(CASE WHEN is_valid = 1 THEN total_amount END), 0),
+       MIN(CASE WHEN is_valid = 1 THEN pickup_date END),
+       MAX(CASE WHEN is_valid = 1 THEN pickup_date END),
+       MAX(trip_id), :now
+FROM fact_trip
+GROUP BY service_type;
+"""
+
+
+def _register_types():
+    # Explicit adapters/converters (the implicit ones are deprecated since 3.12)
+    sqlite3.register_adapter(date, date.isoformat)
+    sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+    sqlite3.register_converter("DATE", lambda raw: date.fromisoformat(raw.decode()))
+    sqlite3.register_converter("TIMESTAMP", lambda raw: datetime.fromisoformat(raw.decode()))
+
+
+_register_types()
+
+
+# ---------------------------------------------------------------------- #
+# Data
+# ---------------------------------------------------------------------- #
+
+def populate(path: str, days: int = 365, trips_per_day: int = 200, end: date = date(2024, 12, 31), seed: int = 7) -> dict:
+    """Create a fresh stand-in database at ``path``; returns row counts"""
+    if os.path.exists(path):
+        os.remove(path)
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript(SCHEMA_SQL)
+        conn.executemany("INSERT INTO dim_taxi_zone VALUES (?, ?, ?, ?)", ZONES)
+
+        now = datetime(end.year, end.month, end.day) + timedelta(days=1)
+        batch = []
+        trip_id = 0
+        start = end - timedelta(days=days - 1)
+        for day in range(days):
+            pickup_date = start + timedelta(days=day)
+            # Weekly seasonality so charts and rollups are not flat
+            volume = int(trips_per_day * (1.15 if pickup_date.weekday() in (4, 5) else 0.95))
+            for _ in range(volume):
+                trip_id += 1
+                service = rng.choices(SERVICES, weights=(45, 10, 15, 30))[0]
+                pickup_zone = rng.choice(ZONES)
+                dropoff_zone = rng.choice(ZONES)
+                pickup = datetime(pickup_date.year, pickup_date.month, pickup_date.day) + timedelta(seconds=rng.randrange(86400))
+                duration = rng.randrange(180, 3600)
+                distance = round(rng.lognormvariate(0.8, 0.6), 2)
+                amount = round(3.0 + distance * 2.6 + duration / 120 + rng.random() * 5, 2)
+                if service == "fhv":
+                    distance, amount = 0.0, 0.0  # Placeholders, as the notebook writes FHV
+                batch.append((
+                    trip_id, service, pickup, pickup + timedelta(seconds=duration),
+                    pickup_zone[0], dropoff_zone[0], pickup_zone[1], pickup_zone[2],
+                    dropoff_zone[1], dropoff_zone[2], distance, amount, duration,
+                    pickup_date, 0 if rng.random() < 0.02 else 1, now,
+                ))
+            if len(batch) >= 50_000:
+                conn.executemany(f"INSERT INTO fact_trip VALUES ({', '.join('?' * 16)})", batch)
+                batch = []
+        if batch:
+            conn.executemany(f"INSERT INTO fact_trip VALUES ({', '.join('?' * 16)})", batch)
+
+        for statement in ROLLUP_SQL.split(";"):
+            if statement.strip():
+                conn.execute(statement, {"now": now})
+        conn.commit()
+
+        counts = {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("fact_trip", "agg_daily_metrics", "agg_daily_borough_metrics", "agg_service_stats", "dim_taxi_zone")
+        }
+    finally:
+        conn.close()
+    return counts
+
+
+# ---------------------------------------------------------------------- #
+# T-SQL compatible connection
+# ---------------------------------------------------------------------- #
+
+_TOP = re.compile(r"^(\s*SELECT\s+)TOP\s*\(\?\)\s*", re.IGNORECASE)
+_OFFSET_FETCH = re.compile(r"\s+OFFSET \? ROWS FETCH NEXT \? ROWS ONLY\s*$", re.IGNORECASE)
+_COUNT_BIG = re.compile(r"\bCOUNT_BIG\(", re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=512)
+def _translate_sql(query: str) -> Tuple[str, bool, bool]:
+    """(sqlite sql, had TOP, had OFFSET/FETCH) for one T-SQL statement"""
+    sql, top = _TOP.subn(r"\1", query)
+    sql, offset = _OFFSET_FETCH.subn(" LIMIT ? OFFSET ?", sql)
+    sql = _COUNT_BIG.sub("COUNT(", sql)
+    if top:
+        sql = sql.rstrip() + " LIMIT ?"
+    return sql, bool(top), bool(offset)
+
+
+def translate(query: str, params: Optional[Sequence[Any]] = None) -> Tuple[str, Tuple[Any, ...]]:
+    """
+    Rewrite the T-SQL subset the app uses for SQLite, reordering parameters:
+    TOP's leading ``?`` moves to the trailing LIMIT, and OFFSET/FETCH's
+    (offset, fetch) become LIMIT fetch OFFSET offset.
+    """
+    sql, top, offset = _translate_sql(query)
+    params = tuple(params or ())
+    if offset:
+        params = params[:-2] + (params[-1], params[-2])
+    if top:
+        params = params[1:] + params[:1]
+    return sql, params
+
+
+class _Cursor:
+    def __init__(self, cursor: sqlite3.Cursor):
+        self._cursor = cursor
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def execute(self, query: str, params: Optional[Sequence[Any]] = None):
+        self._cursor.execute(*translate(query, params))
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size: int):
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def close(self):
+        self._cursor.close()
+
+
+class StandInConnection:
+    """Thin DB-API wrapper over sqlite3 that accepts the app's T-SQL"""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(
+            path,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,  # The pool hands connections to executor threads
+        )
+
+    def cursor(self) -> _Cursor:
+        return _Cursor(self._conn.cursor())
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+
+def connect(path: str) -> StandInConnection:
+    return StandInConnection(path)
+
+
+class StandInBackend(Backend):
+    """app.database backend serving pool connections from the stand-in file"""
+
+    name = "standin"
+    dialect = "tsql"  # translate() rewrites the T-SQL per query
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def connect(self) -> StandInConnection:
+        return connect(self.path)
+
+    def stats(self) -> dict:
+        return {**super().stats(), "path": self.path}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the SQLite stand-in database")
+    parser.add_argument("--output", default="standin.sqlite", help="SQLite file to (re)create")
+    parser.add_argument("--days", type=int, default=365, help="Days of trips ending 2024-12-31")
+    parser.add_argument("--trips-per-day", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    counts = populate(args.output, args.days, args.trips_per_day, seed=args.seed)
+    print(f"✅ {args.output} built in {time.perf_counter() - started:.1f}s: "
+          + ", ".join(f"{table} {rows:,}" for table, rows in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,19 +5,24 @@ CREATE NONCLUSTERED INDEX idx_agg_daily_metrics_date_service
 ON agg_daily_metrics (metric_date DESC, service_type)
 INCLUDE (total_trips, total_revenue, avg_trip_distance, avg_trip_duration_sec, avg_fare_amount);
 
--- Index on fact_trips for date range filtering (pickup)
-CREATE NONCLUSTERED INDEX idx_fact_trips_pickup_datetime 
-ON fact_trips (pickup_datetime DESC)
+-- Index on fact_trip for date range filtering (pickup)
+CREATE NONCLUSTERED INDEX idx_fact_trip_pickup_datetime 
+ON fact_trip (pickup_datetime DESC)
 INCLUDE (service_type, trip_distance, trip_duration_sec, total_amount);
 
--- Index on fact_trips for service type filtering
-CREATE NONCLUSTERED INDEX idx_fact_trips_service_type 
-ON fact_trips (service_type, pickup_datetime DESC);
+-- Index on fact_trip for service type filtering
+CREATE NONCLUSTERED INDEX idx_fact_trip_service_type 
+ON fact_trip (service_type, pickup_datetime DESC);
 
 -- Composite index for common query pattern (date + service type)
-CREATE NONCLUSTERED INDEX idx_fact_trips_date_service 
-ON fact_trips (pickup_datetime DESC, service_type)
-INCLUDE (pickup_location_id, dropoff_location_id, trip_distance, trip_duration_sec, fare_amount, total_amount);
+CREATE NONCLUSTERED INDEX idx_fact_trip_date_service 
+ON fact_trip (pickup_datetime DESC, service_type)
+INCLUDE (pickup_location_id, dropoff_location_id, trip_distance, trip_duration_sec, total_amount);
+
+-- Keyset pagination for /api/trips: half-open dropoff range + ORDER BY dropoff DESC, trip_id DESC
+CREATE NONCLUSTERED INDEX idx_fact_trip_dropoff_keyset 
+ON fact_trip (dropoff_datetime DESC, trip_id DESC)
+INCLUDE (service_type, pickup_datetime, pickup_borough, pickup_zone, dropoff_borough, dropoff_zone, trip_distance, total_amount, trip_duration_sec);
 
 -- Check index usage statistics (run after some time)
 -- SELECT 
@@ -30,5 +35,5 @@ INCLUDE (pickup_location_id, dropoff_location_id, trip_distance, trip_duration_s
 --     s.last_user_scan
 -- FROM sys.dm_db_index_usage_stats s
 -- INNER JOIN sys.indexes i ON s.object_id = i.object_id AND s.index_id = i.index_id
--- WHERE OBJECT_NAME(s.object_id) IN ('fact_trips', 'agg_daily_metrics')
+-- WHERE OBJECT_NAME(s.object_id) IN ('fact_trip', 'agg_daily_metrics')
 -- ORDER BY s.user_seeks + s.user_scans + s.user_lookups DESC;
@@ -0,0 +1,47 @@
+-- Pre-aggregated rollups for NYC TLC Analytics
+-- Same table is created by the notebook DDL; this script is for existing databases.
+
+-- Daily x service_type x pickup_borough rollup (feeds /api/summary by_borough)
+IF OBJECT_ID('agg_daily_borough_metrics', 'U') IS NULL
+CREATE TABLE agg_daily_borough_metrics (
+    metric_date DATE NOT NULL,
+    service_type VARCHAR(10) NOT NULL,
+    pickup_borough VARCHAR(50) NOT NULL,
+    total_trips BIGINT,
+    total_revenue DECIMAL(18,2),
+    total_distance DECIMAL(18,2),
+    distance_trips BIGINT,
+    total_duration_sec BIGINT,
+    created_at DATETIME2 DEFAULT GETDATE(),
+    PRIMARY KEY (metric_date, service_type, pickup_borough)
+);
+
+-- Trips with a measured distance (avg_distance divides by this, not total_trips);
+-- FHV rows carry a 0.0 placeholder and are not counted.
+-- Tables created before it existed: add it, then rebuild with python -m app.rollups
+IF COL_LENGTH('agg_daily_borough_metrics', 'distance_trips') IS NULL
+ALTER TABLE agg_daily_borough_metrics ADD distance_trips BIGINT;
+
+-- Initial population (or run: python -m app.rollups)
+-- INSERT INTO agg_daily_borough_metrics
+--     (metric_date, service_type, pickup_borough, total_trips, total_revenue, total_distance, distance_trips, total_duration_sec)
+-- SELECT pickup_date, service_type, COALESCE(pickup_borough, 'Unknown'),
+--        COUNT_BIG(*), SUM(total_amount), SUM(trip_distance), COUNT_BIG(CASE WHEN service_type <> 'fhv' THEN trip_distance END), SUM(CAST(trip_duration_sec AS BIGINT))
+-- FROM fact_trip
+-- WHERE is_valid = 1
+-- GROUP BY pickup_date, service_type, COALESCE(pickup_borough, 'Unknown');
+
+-- Per-service statistics snapshot (feeds /api/statistics)
+-- max_trip_id is the watermark for incremental refreshes, merged by the notebook
+-- after every load (or: python -m app.rollups)
+IF OBJECT_ID('agg_service_stats', 'U') IS NULL
+CREATE TABLE agg_service_stats (
+    service_type VARCHAR(10) PRIMARY KEY,
+    total_trips BIGINT,
+    valid_trips BIGINT,
+    total_revenue DECIMAL(18,2),
+    min_pickup_date DATE,
+    max_pickup_date DATE,
+    max_trip_id BIGINT,
+    refreshed_at DATETIME2
+);
@@ -73,9 +73,11 @@ echo ""
 # Test 6: Get Trips
 echo -e "${YELLOW}TEST 6: Get Trip Records${NC}"
 echo "GET $API_BASE/api/trips?start_date=2024-01-01&end_date=2024-01-31"
-curl -X GET "$API_BASE/api/trips?start_date=2024-01-01&end_date=2024-01-31&page=1&page_size=5" \
+TRIPS_PAGE_1=$(curl -s -X GET "$API_BASE/api/trips?start_date=2024-01-01&end_date=2024-01-31&page_size=5" \
   -H "Authorization: Bearer $TOKEN" \
-  -H "Content-Type: application/json" | jq .
+  -H "Content-Type: application/json")
+echo "$TRIPS_PAGE_1" | jq .
+NEXT_CURSOR=$(echo "$TRIPS_PAGE_1" | jq -r '.pagination.next_cursor // empty')
 echo ""
 echo ""
 
@@ -97,12 +99,17 @@ curl -X GET "$API_BASE/api/aggregates/daily?start_date=2024-01-01&end_date=2024-
 echo ""
 echo ""
 
-# Test 9: Test Pagination
-echo -e "${YELLOW}TEST 9: Test Pagination (Page 2)${NC}"
-echo "GET $API_BASE/api/trips?page=2"
-curl -X GET "$API_BASE/api/trips?start_date=2024-01-01&end_date=2024-01-31&page=2&page_size=5" \
-  -H "Authorization: Bearer $TOKEN" \
-  -H "Content-Type: application/json" | jq .
+# Test 9: Test Pagination (keyset cursor from Test 6)
+echo -e "${YELLOW}TEST 9: Test Pagination (Next Page)${NC}"
+if [ -n "$NEXT_CURSOR" ]; then
+  echo "GET $API_BASE/api/trips?cursor=<next_cursor from test 6>"
+  curl -X GET "$API_BASE/api/trips?start_date=2024-01-01&end_date=2024-01-31&page_size=5" \
+    --data-urlencode "cursor=$NEXT_CURSOR" -G \
+    -H "Authorization: Bearer $TOKEN" \
+    -H "Content-Type: application/json" | jq .
+else
+  echo "No next_cursor in test 6 (fewer than 5 trips in range), skipping"
+fi
 echo ""
 echo ""
 
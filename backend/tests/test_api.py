@@ -211,6 +211,43 @@ class TestStatisticsAPI:
             print("✅ Statistics endpoint test passed - database error (check connection)")
 
 
+class TestDashboardAPI:
+    """Test the composite dashboard endpoint"""
+    
+    @pytest.fixture
+    def auth_headers(self):
+        """Get authentication headers"""
+        login_response = client.post(
+            "/token",
+            data={"username": TEST_USERNAME, "password": TEST_PASSWORD}
+        )
+        token = login_response.json()["access_token"]
+        return {"Authorization": f"Bearer {token}"}
+    
+    def test_dashboard_returns_all_parts(self, auth_headers):
+        """Test summary, daily and trips come back together"""
+        response = client.get(
+            "/api/dashboard",
+            headers=auth_headers,
+            params={
+                "start_date": "2024-01-01",
+                "end_date": "2024-01-31",
+                "trips_page_size": 10
+            }
+        )
+        assert response.status_code in [200, 500]
+        
+        if response.status_code == 200:
+            data = response.json()
+            assert set(data) == {"summary", "daily", "trips"}
+            assert "total_trips" in data["summary"]
+            assert "pagination" in data["daily"]
+            assert len(data["trips"]["data"]) <= 10
+            print("✅ Dashboard endpoint test passed - data found")
+        else:
+            print("✅ Dashboard endpoint test passed - database error (check connection)")
+
+
 def run_all_tests():
     """Run all tests and print summary"""
     print("\n" + "="*60)
@@ -0,0 +1,112 @@
+"""
+Authentication Tests
+Tests the verified-token cache used by get_current_user
+"""
+import asyncio
+import sys
+import os
+import time
+from datetime import timedelta
+import pytest
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import HTTPException
+from app import auth
+from app.auth import create_access_token, get_current_admin_user, get_current_user, token_cache
+from app.models import User
+
+
+@pytest.fixture
+def decode_calls(monkeypatch):
+    """Count jwt.decode calls and start from an empty cache"""
+    token_cache.clear()
+    calls = []
+    real_decode = auth.jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(1)
+        return real_decode(*args, **kwargs)
+
+    monkeypatch.setattr(auth.jwt, "decode", counting_decode)
+    yield calls
+    token_cache.clear()
+
+
+class TestTokenCache:
+    """Test that verified tokens are decoded once until they expire"""
+
+    def test_token_decoded_once(self, decode_calls):
+        """Repeat requests with the same token skip jwt.decode"""
+        token = create_access_token({"sub": "admin"}, expires_delta=timedelta(minutes=5))
+        first = asyncio.run(get_current_user(token))
+        second = asyncio.run(get_current_user(token))
+        assert first.username == second.username == "admin"
+        assert len(decode_calls) == 1
+
+    def test_entry_expires_with_token(self, decode_calls):
+        """Once exp passes the token is decoded again and rejected"""
+        token = create_access_token({"sub": "admin"}, expires_delta=timedelta(seconds=1))
+        asyncio.run(get_current_user(token))
+        time.sleep(2.1)  # exp has one-second resolution
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(get_current_user(token))
+        assert exc.value.status_code == 401
+        assert len(decode_calls) == 2
+
+    def test_invalid_token_not_cached(self, decode_calls):
+        """Rejected tokens are never stored"""
+        for _ in range(2):
+            with pytest.raises(HTTPException):
+                asyncio.run(get_current_user("not-a-jwt"))
+        assert len(decode_calls) == 2
+        assert len(token_cache) == 0
+
+
+class TestAdminUser:
+    """Test the admin-only dependency"""
+
+    def test_non_admin_forbidden(self):
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(get_current_admin_user(User(username="analyst", disabled=False)))
+        assert exc.value.status_code == 403
+        admin = User(username="admin", disabled=False, is_admin=True)
+        assert asyncio.run(get_current_admin_user(admin)) is admin
+
+
+class TestPasswordVerifier:
+    """Test the bounded login worker pool"""
+
+    def test_authenticate_off_loop(self):
+        """Valid and invalid credentials are checked on the worker pool"""
+        verifier = auth.PasswordVerifier(workers=1, max_pending=4)
+
+        async def run():
+            good = await verifier.authenticate("admin", "secret")
+            bad = await verifier.authenticate("admin", "wrong")
+            return good, bad
+
+        good, bad = asyncio.run(run())
+        verifier.close()
+        assert good.username == "admin"
+        assert bad is False
+        stats = verifier.stats()
+        assert stats["completed"] == 2
+        assert stats["queued"] == 0
+
+    def test_rejects_when_saturated(self, monkeypatch):
+        """Logins beyond max_pending fail fast instead of queueing"""
+        monkeypatch.setattr(auth, "authenticate_user", lambda u, p: time.sleep(0.2) or False)
+        verifier = auth.PasswordVerifier(workers=1, max_pending=2)
+
+        async def run():
+            return await asyncio.gather(
+                *(verifier.authenticate("admin", "x") for _ in range(3)),
+                return_exceptions=True
+            )
+
+        results = asyncio.run(run())
+        verifier.close()
+        assert sum(isinstance(r, auth.LoginBusyError) for r in results) == 1
+        assert verifier.stats()["rejected"] == 1
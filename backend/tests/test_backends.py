@@ -0,0 +1,222 @@
+"""
+Storage Backend Tests
+Tests the DuckDB/Parquet backend, dialect-specific SQL and backend settings
+"""
+import sys
+import os
+import pytest
+from datetime import date, datetime
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+duckdb = pytest.importorskip("duckdb")
+
+from app.backends import DuckDBBackend, MSSQLBackend, create_backend
+from app.config import Settings
+from app.database import Database
+from app.models import Granularity
+from app.query_builder import QueryBuilder
+from app.routers.aggregates import BUCKET_EXPRESSIONS, ROLLUP_AVERAGES, ROLLUP_QUERY
+from app.versioning import DataVersion
+
+ZONES_CSV = """LocationID,Borough,Zone,service_zone
+1,EWR,Newark Airport,EWR
+132,Queens,JFK Airport,Airports
+161,Manhattan,Midtown Center,Yellow Zone
+"""
+
+# Columns the notebook writes to validated/<service> (timestamps as strings after the ADF fix)
+TRIP_SELECT = """
+    SELECT
+        '{service}' AS service_type,
+        strftime(TIMESTAMP '{day} 08:00:00' + INTERVAL (i) HOUR, '%Y-%m-%d %H:%M:%S') AS pickup_datetime,
+        strftime(TIMESTAMP '{day} 08:20:00' + INTERVAL (i) HOUR, '%Y-%m-%d %H:%M:%S') AS dropoff_datetime,
+        {pickup} AS pickup_location_id,
+        CAST(132 AS INTEGER) AS dropoff_location_id,
+        CAST(2.0 AS DOUBLE) AS trip_distance,
+        CAST(10.0 AS DOUBLE) AS total_amount,
+        CAST(1200 AS INTEGER) AS trip_duration_sec,
+        DATE '{day}' AS pickup_date,
+        {borough} AS pickup_borough,
+        {zone} AS pickup_zone,
+        {dropoff_borough} AS dropoff_borough,
+        {dropoff_zone} AS dropoff_zone,
+        CAST(1 AS TINYINT) AS is_valid
+    FROM range({rows}) AS r(i)
+"""
+
+
+def write_trips(conn, path, service, day, rows, pickup="CAST(161 AS INTEGER)", enriched=True):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    names = ("'Manhattan'", "'Midtown Center'", "'Queens'", "'JFK Airport'") if enriched else ("CAST(NULL AS VARCHAR)",) * 4
+    query = TRIP_SELECT.format(
+        service=service, day=day, rows=rows, pickup=pickup,
+        borough=names[0], zone=names[1], dropoff_borough=names[2], dropoff_zone=names[3]
+    )
+    conn.execute(f"COPY ({query}) TO '{path}' (FORMAT PARQUET)")
+
+
+@pytest.fixture
+def parquet_root(tmp_path):
+    """validated/ layout with two yellow files, one fhv file (no zones) and no green folder"""
+    validated = tmp_path / "validated"
+    conn = duckdb.connect()
+    write_trips(conn, str(validated / "yellow_taxi" / "part-00000.parquet"), "yellow", "2024-03-04", 3)
+    write_trips(conn, str(validated / "yellow_taxi" / "part-00001.parquet"), "yellow", "2024-03-11", 2)
+    write_trips(conn, str(validated / "fhv" / "part-00000.parquet"), "fhv", "2024-03-05", 4,
+                pickup="CASE WHEN i = 0 THEN CAST(NULL AS INTEGER) ELSE CAST(161 AS INTEGER) END",
+                enriched=False)
+    conn.close()
+    (tmp_path / "zones.csv").write_text(ZONES_CSV)
+    return tmp_path
+
+
+@pytest.fixture
+def backend(parquet_root):
+    backend = DuckDBBackend(str(parquet_root), zones_csv=str(parquet_root / "zones.csv"), threads=2)
+    backend.open()
+    yield backend
+    backend.close()
+
+
+class TestDuckDBBackend:
+    """Test fact_trip over Parquet and the derived aggregate tables"""
+
+    def test_fact_trip_view(self, backend):
+        conn = backend.connect()
+        rows = conn.execute(
+            "SELECT trip_id, service_type, pickup_datetime, pickup_date, is_valid FROM fact_trip ORDER BY trip_id"
+        ).fetchall()
+        assert len(rows) == 9
+        assert len({r[0] for r in rows}) == 9  # Unique, and stable per file/row
+        assert isinstance(rows[0][2], datetime)
+        assert isinstance(rows[0][3], date)
+        assert backend.services == {"yellow": 2, "fhv": 1}
+        assert backend.stats()["dialect"] == "duckdb"
+
+    def test_fhv_zones_enriched_and_unknown_pickups_invalid(self, backend):
+        conn = backend.connect()
+        rows = conn.execute(
+            "SELECT pickup_location_id, pickup_borough, dropoff_zone, is_valid "
+            "FROM fact_trip WHERE service_type = 'fhv' ORDER BY trip_id"
+        ).fetchall()
+        assert rows[0] == (None, None, "JFK Airport", 0)
+        assert rows[1] == (161, "Manhattan", "JFK Airport", 1)
+
+    def test_aggregates_match_fact_trip(self, backend):
+        conn = backend.connect()
+        daily = conn.execute(
+            "SELECT metric_date, service_type, total_trips, total_revenue, avg_trip_duration_sec "
+            "FROM agg_daily_metrics ORDER BY metric_date"
+        ).fetchall()
+        assert [(r[0], r[1], r[2]) for r in daily] == [
+            (date(2024, 3, 4), "yellow", 3),
+            (date(2024, 3, 5), "fhv", 3),
+            (date(2024, 3, 11), "yellow", 2),
+        ]
+        assert float(daily[0][3]) == 30.0
+        assert float(daily[0][4]) == 1200.0
+
+        stats = dict(conn.execute("SELECT service_type, valid_trips FROM agg_service_stats").fetchall())
+        assert stats == {"yellow": 5, "fhv": 3}
+        boroughs = conn.execute(
+            "SELECT SUM(total_trips), SUM(distance_trips) FROM agg_daily_borough_metrics WHERE pickup_borough = 'Manhattan'"
+        ).fetchone()
+        assert boroughs == (8, 5)  # FHV's placeholder distances are not counted
+
+    def test_watermark_does_not_scan_fact_trip(self, backend):
+        """The data version probe reads agg_service_stats, not the Parquet view"""
+        database = Database(backend)
+        try:
+            assert "fact_trip" not in backend.watermark_query
+            version = DataVersion()
+            assert version.refresh(database)
+            watermark = version.stats()["watermark"]
+            max_trip_id = backend.connect().execute("SELECT MAX(trip_id) FROM fact_trip").fetchone()[0]
+            assert watermark["max_trip_id"] == str(max_trip_id)
+            assert watermark["stats_refreshed_at"] == str(backend.built_at)
+            assert not version.refresh(database)
+        finally:
+            database.close()
+
+    def test_no_parquet_files(self, tmp_path):
+        with pytest.raises(RuntimeError, match="No Parquet files"):
+            DuckDBBackend(str(tmp_path)).open()
+
+
+class TestDuckDBQueries:
+    """Test the routers' SQL through Database on the DuckDB backend"""
+
+    def test_trips_page_with_keyset(self, backend):
+        database = Database(backend)
+        try:
+            builder = (
+                QueryBuilder("fact_trip", database.dialect)
+                .select("trip_id", "dropoff_datetime")
+                .where_date_range("dropoff_datetime", date(2024, 3, 1), date(2024, 3, 31))
+                .where_equals("service_type", "yellow")
+                .order_by("dropoff_datetime DESC", "trip_id DESC")
+                .top(3)
+            )
+            first = database.execute_query(*builder.build())
+            assert len(first) == 3
+            last = first[-1]
+            rest = database.execute_query(*builder.where_before(
+                ("dropoff_datetime", "trip_id"), (last["dropoff_datetime"], last["trip_id"])
+            ).build())
+            assert len(rest) == 2
+            assert rest[0]["dropoff_datetime"] < last["dropoff_datetime"]
+        finally:
+            database.close()
+
+    def test_weekly_rollup(self, backend):
+        database = Database(backend)
+        try:
+            where, params = (
+                QueryBuilder("agg_daily_metrics", database.dialect)
+                .where_date_range("metric_date", date(2024, 3, 1), date(2024, 3, 31))
+                .where_sql()
+            )
+            query = ROLLUP_QUERY.format(
+                bucket=BUCKET_EXPRESSIONS["duckdb"][Granularity.WEEK], averages=ROLLUP_AVERAGES, where=where
+            )
+            rows = database.execute_query(query, params)
+            # 2024-03-04 and 03-05 share the week starting Monday 03-04
+            assert [(r["metric_date"], r["service_type"], r["total_trips"]) for r in rows] == [
+                (date(2024, 3, 11), "yellow", 2),
+                (date(2024, 3, 4), "fhv", 3),
+                (date(2024, 3, 4), "yellow", 3),
+            ]
+            assert rows[0]["avg_trip_distance"] == pytest.approx(2.0)
+        finally:
+            database.close()
+
+
+class TestBackendSettings:
+    """Test DB_BACKEND selection and required settings"""
+
+    def test_duckdb_does_not_need_sql_credentials(self, tmp_path):
+        settings = Settings(
+            _env_file=None, DB_BACKEND="duckdb", DUCKDB_PARQUET_PATH=str(tmp_path),
+            DB_SERVER=None, DB_NAME=None, DB_USER=None, DB_PASSWORD=None, SECRET_KEY="x"
+        )
+        backend = create_backend(settings)
+        assert isinstance(backend, DuckDBBackend)
+        assert backend.parquet_path == str(tmp_path)
+
+    def test_duckdb_requires_parquet_path(self):
+        with pytest.raises(ValueError, match="DUCKDB_PARQUET_PATH"):
+            Settings(_env_file=None, DB_BACKEND="duckdb", DUCKDB_PARQUET_PATH="", SECRET_KEY="x")
+
+    def test_mssql_requires_credentials(self):
+        with pytest.raises(ValueError, match="DB_SERVER"):
+            Settings(
+                _env_file=None, DB_BACKEND="mssql", DB_SERVER="", DB_NAME="n",
+                DB_USER="u", DB_PASSWORD="p", SECRET_KEY="x"
+            )
+        settings = Settings(
+            _env_file=None, DB_BACKEND="mssql", DB_SERVER="s", DB_NAME="n",
+            DB_USER="u", DB_PASSWORD="p", SECRET_KEY="x"
+        )
+        assert isinstance(create_backend(settings), MSSQLBackend)
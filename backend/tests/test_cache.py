@@ -0,0 +1,274 @@
+"""
+Result Cache Tests
+Tests LRU eviction, TTL expiry, byte limits and the cached() endpoint decorator
+"""
+import asyncio
+import sys
+import os
+import time
+import pytest
+from datetime import date
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import Response
+from app.cache import ResultCache, SingleFlight, cached, make_cache_key
+from app.models import ServiceType
+
+
+class TestResultCache:
+    """Test ResultCache semantics"""
+
+    def test_hit_and_miss_counters(self):
+        """get() counts hits and misses"""
+        cache = ResultCache(max_bytes=1024, default_ttl=60)
+        assert cache.get("a") is None
+        cache.set("a", "value")
+        assert cache.get("a") == "value"
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_ratio"] == 0.5
+
+    def test_ttl_expiry(self):
+        """Entries are dropped once their TTL passes"""
+        cache = ResultCache(max_bytes=1024, default_ttl=60)
+        cache.set("a", "value", ttl=0.01)
+        time.sleep(0.02)
+        assert cache.get("a") is None
+        assert cache.stats()["expirations"] == 1
+        assert cache.stats()["bytes"] == 0
+
+    def test_lru_eviction_by_bytes(self):
+        """The least recently used entry is evicted when the byte limit is hit"""
+        cache = ResultCache(max_bytes=30, default_ttl=60)
+        cache.set("a", "x" * 10)
+        cache.set("b", "x" * 10)
+        cache.get("a")  # "b" is now least recently used
+        cache.set("c", "x" * 10)
+        cache.set("d", "x" * 10)
+        assert "a" in cache
+        assert "b" not in cache
+        assert cache.stats()["bytes"] <= 30
+        assert cache.stats()["evictions"] == 1
+
+    def test_oversized_value_not_stored(self):
+        """Values larger than the whole cache are skipped"""
+        cache = ResultCache(max_bytes=10, default_ttl=60)
+        cache.set("big", "x" * 100)
+        assert "big" not in cache
+
+    def test_make_cache_key_is_order_independent(self):
+        """Keys depend on parameter values, not keyword order"""
+        a = make_cache_key("ns", start_date=date(2024, 1, 1), service_type=ServiceType.YELLOW)
+        b = make_cache_key("ns", service_type=ServiceType.YELLOW, start_date=date(2024, 1, 1))
+        assert a == b
+        assert "service_type=yellow" in a
+
+
+class TestCachedDecorator:
+    """Test the cached() decorator used by the routers"""
+
+    def test_second_call_served_from_cache(self):
+        """The wrapped function only runs once per distinct key"""
+        cache = ResultCache(max_bytes=1024, default_ttl=60)
+        calls = []
+
+        @cached("test", cache=cache, cache_control="private, max-age=60")
+        async def endpoint(response: Response, page: int = 1, current_user=None):
+            calls.append(page)
+            return {"page": page}
+
+        first = Response()
+        second = Response()
+        asyncio.run(endpoint(response=first, page=1, current_user="alice"))
+        result = asyncio.run(endpoint(response=second, page=1, current_user="bob"))
+
+        assert result == {"page": 1}
+        assert calls == [1]
+        assert first.headers["X-Cache"] == "MISS"
+        assert second.headers["X-Cache"] == "HIT"
+        assert second.headers["Cache-Control"] == "private, max-age=60"
+
+        asyncio.run(endpoint(response=Response(), page=2))
+        assert calls == [1, 2]
+
+    def test_response_results_get_fresh_copies(self):
+        """Endpoints returning a Response get a per-request copy with cache headers"""
+        cache = ResultCache(max_bytes=1024, default_ttl=60)
+
+        @cached("test", cache=cache, cache_control="private, max-age=60", vary="Accept")
+        async def endpoint(response: Response, fmt: str = "arrow"):
+            return Response(content=b"columnar", media_type="application/vnd.apache.arrow.stream")
+
+        first = asyncio.run(endpoint(response=Response()))
+        second = asyncio.run(endpoint(response=Response()))
+
+        assert first is not second
+        assert second.body == b"columnar"
+        assert second.headers["X-Cache"] == "HIT"
+        assert second.headers["Vary"] == "Accept"
+        assert second.media_type == "application/vnd.apache.arrow.stream"
+
+
+class TestConditionalRequests:
+    """Test ETag / If-None-Match handling in cached()"""
+
+    def make_request(self, if_none_match=None, accept_encoding=None):
+        from starlette.requests import Request
+        headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+        if accept_encoding:
+            headers.append((b"accept-encoding", accept_encoding.encode()))
+        return Request({"type": "http", "headers": headers})
+
+    def test_not_modified_skips_endpoint(self):
+        """A matching If-None-Match returns 304 without running the endpoint"""
+        from app.versioning import DataVersion
+        versions = DataVersion()
+        versions.update({"max_trip_id": 10})
+        cache = ResultCache(max_bytes=1024, default_ttl=60)
+        calls = []
+
+        @cached("test", cache=cache, versions=versions, cache_control="private, max-age=60")
+        async def endpoint(request, response: Response, page: int = 1):
+            calls.append(page)
+            return {"page": page}
+
+        first = Response()
+        asyncio.run(endpoint(request=self.make_request(), response=first, page=1))
+        etag = first.headers["ETag"]
+
+        result = asyncio.run(endpoint(request=self.make_request(etag), response=Response(), page=1))
+        assert result.status_code == 304
+        assert result.headers["ETag"] == etag
+        assert result.headers["Cache-Control"] == "private, max-age=60"
+        assert calls == [1]
+
+        # Other parameters have other validators
+        other = Response()
+        asyncio.run(endpoint(request=self.make_request(etag), response=other, page=2))
+        assert other.headers["ETag"] != etag
+        assert calls == [1, 2]
+
+    def test_not_modified_keeps_compressed_validator(self):
+        """Revalidating a gzip variant gets its "-gzip" ETag and Vary back on the 304"""
+        from app.versioning import DataVersion
+        versions = DataVersion()
+        versions.update({"max_trip_id": 10})
+
+        @cached("test", cache=ResultCache(max_bytes=1024, default_ttl=60), versions=versions)
+        async def endpoint(request, response: Response):
+            return {"n": 1}
+
+        first = Response()
+        asyncio.run(endpoint(request=self.make_request(), response=first))
+        gzip_etag = first.headers["ETag"][:-1] + '-gzip"'
+
+        result = asyncio.run(endpoint(
+            request=self.make_request(gzip_etag, accept_encoding="gzip"), response=Response()
+        ))
+        assert result.status_code == 304
+        assert result.headers["ETag"] == gzip_etag
+        assert result.headers["Vary"] == "Accept-Encoding"
+
+        identity = asyncio.run(endpoint(
+            request=self.make_request(first.headers["ETag"], accept_encoding="gzip"), response=Response()
+        ))
+        assert identity.headers["ETag"] == first.headers["ETag"]
+
+    def test_new_data_version_changes_etag_and_key(self):
+        """After a load the old ETag no longer matches and the cache is bypassed"""
+        from app.versioning import DataVersion
+        versions = DataVersion()
+        versions.update({"max_trip_id": 10})
+        cache = ResultCache(max_bytes=1024, default_ttl=60)
+        calls = []
+
+        @cached("test", cache=cache, versions=versions)
+        async def endpoint(request, response: Response):
+            calls.append(1)
+            return {"n": len(calls)}
+
+        first = Response()
+        asyncio.run(endpoint(request=self.make_request(), response=first))
+        assert versions.update({"max_trip_id": 11}) is True
+
+        second = Response()
+        result = asyncio.run(endpoint(request=self.make_request(first.headers["ETag"]), response=second))
+        assert result == {"n": 2}
+        assert second.headers["ETag"] != first.headers["ETag"]
+
+    def test_failed_probe_stops_etags(self):
+        """A watermark that cannot be read drops the version instead of keeping a stale one"""
+        from app.versioning import DataVersion
+
+        class BrokenDatabase:
+            def execute_query(self, query, params=None):
+                raise RuntimeError("Invalid column name 'refreshed_at'")
+
+        versions = DataVersion()
+        versions.update({"max_trip_id": 10})
+        cache = ResultCache(max_bytes=1024, default_ttl=60)
+
+        @cached("test", cache=cache, versions=versions)
+        async def endpoint(request, response: Response):
+            return {"n": 1}
+
+        first = Response()
+        asyncio.run(endpoint(request=self.make_request(), response=first))
+        with pytest.raises(RuntimeError):
+            versions.refresh(BrokenDatabase())
+        assert versions.current is None
+
+        second = Response()
+        result = asyncio.run(endpoint(request=self.make_request(first.headers["ETag"]), response=second))
+        assert result == {"n": 1}
+        assert "ETag" not in second.headers
+
+
+class TestSingleFlight:
+    """Test coalescing of concurrent identical misses"""
+
+    def test_concurrent_misses_share_one_call(self):
+        """Twenty simultaneous requests for one key run the endpoint once"""
+        cache = ResultCache(max_bytes=1024, default_ttl=60)
+        flight = SingleFlight()
+        calls = []
+
+        @cached("test", cache=cache, flight=flight)
+        async def endpoint(response: Response, page: int = 1):
+            calls.append(page)
+            await asyncio.sleep(0.05)
+            return {"page": page}
+
+        async def burst():
+            responses = [Response() for _ in range(20)]
+            results = await asyncio.gather(*(endpoint(response=r, page=1) for r in responses))
+            return responses, results
+
+        responses, results = asyncio.run(burst())
+        assert calls == [1]
+        assert all(r == {"page": 1} for r in results)
+        assert [r.headers["X-Cache"] for r in responses].count("COALESCED") == 19
+        assert flight.stats() == {"in_flight": 0, "executions": 1, "coalesced": 19}
+
+    def test_errors_reach_every_waiter_and_are_not_cached(self):
+        """A failing query fails all coalesced callers and the next call retries"""
+        cache = ResultCache(max_bytes=1024, default_ttl=60)
+        flight = SingleFlight()
+        calls = []
+
+        @cached("test", cache=cache, flight=flight)
+        async def endpoint(response: Response):
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise RuntimeError("db down")
+
+        async def burst():
+            return await asyncio.gather(*(endpoint(response=Response()) for _ in range(3)), return_exceptions=True)
+
+        assert all(isinstance(r, RuntimeError) for r in asyncio.run(burst()))
+        assert len(calls) == 1
+        asyncio.run(burst())
+        assert len(calls) == 2
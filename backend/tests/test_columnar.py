@@ -0,0 +1,95 @@
+"""
+Columnar Response Tests
+Tests Arrow/Parquet encoding and format negotiation for the aggregate routers
+"""
+import io
+import sys
+import os
+from datetime import date
+from decimal import Decimal
+import pytest
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.parquet as pq
+from starlette.requests import Request
+from app.columnar import (
+    ARROW_STREAM_MEDIA_TYPE,
+    batch_from_columns,
+    batch_from_rows,
+    negotiate_format,
+    schema_for,
+    serialize,
+    table_schema
+)
+from app.models import ResponseFormat
+
+COLUMNS = ("metric_date", "service_type", "total_trips", "total_revenue")
+ROWS = [
+    (date(2024, 1, 2), "yellow", 100, Decimal("1500.25")),
+    (date(2024, 1, 1), "green", 40, None),
+]
+
+
+def make_request(accept: str) -> Request:
+    return Request({"type": "http", "headers": [(b"accept", accept.encode())]})
+
+
+class TestRecordBatches:
+    """Test building record batches from driver rows"""
+
+    def test_rows_use_declared_types(self):
+        """Column types come from SCHEMA; DECIMAL values become float64"""
+        schema = table_schema("agg_daily_metrics", COLUMNS)
+        batch = batch_from_rows(schema, ROWS)
+        assert batch.schema.field("total_revenue").type == pa.float64()
+        assert batch.column(3).to_pylist() == [1500.25, None]
+        assert batch.column(0).to_pylist() == [date(2024, 1, 2), date(2024, 1, 1)]
+
+    def test_empty_batch(self):
+        """No rows still yields a batch with the full schema"""
+        schema = table_schema("agg_daily_metrics", COLUMNS)
+        assert batch_from_rows(schema, []).num_rows == 0
+
+    def test_int_flags_cast_to_bool(self):
+        """GROUPING() returns 0/1; it is cast to the declared bool column"""
+        schema = schema_for([("is_total", "bool")])
+        assert batch_from_rows(schema, [(0,), (1,)]).column(0).to_pylist() == [False, True]
+
+    def test_columns_nan_becomes_null(self):
+        """NaN from the in-memory arrays is written as null"""
+        schema = schema_for([("avg_fare_amount", "float")])
+        batch = batch_from_columns(schema, {"avg_fare_amount": [1.0, float("nan")]})
+        assert batch.column(0).to_pylist() == [1.0, None]
+
+
+class TestSerialize:
+    """Test Arrow IPC and Parquet output"""
+
+    def test_arrow_stream_round_trip(self):
+        schema = table_schema("agg_daily_metrics", COLUMNS)
+        body = serialize(ResponseFormat.ARROW, schema, [batch_from_rows(schema, ROWS)])
+        table = pa.ipc.open_stream(body).read_all()
+        assert table.num_rows == 2
+        assert table.column("service_type").to_pylist() == ["yellow", "green"]
+
+    def test_parquet_round_trip(self):
+        schema = table_schema("agg_daily_metrics", COLUMNS)
+        body = serialize(ResponseFormat.PARQUET, schema, [batch_from_rows(schema, ROWS)])
+        table = pq.read_table(io.BytesIO(body))
+        assert table.schema.equals(schema)
+        assert table.column("total_trips").to_pylist() == [100, 40]
+
+
+class TestNegotiation:
+    """Test choosing the format from ?format= and Accept"""
+
+    def test_accept_header(self):
+        assert negotiate_format(make_request(ARROW_STREAM_MEDIA_TYPE), None) == ResponseFormat.ARROW
+        assert negotiate_format(make_request("application/json"), None) == ResponseFormat.JSON
+
+    def test_query_parameter_wins(self):
+        request = make_request(ARROW_STREAM_MEDIA_TYPE)
+        assert negotiate_format(request, ResponseFormat.PARQUET) == ResponseFormat.PARQUET
@@ -0,0 +1,66 @@
+"""
+Column Fetch Mode Tests
+Tests conversion of row tuples into typed column arrays
+"""
+import sys
+import os
+from array import array
+from datetime import date, datetime
+from decimal import Decimal
+import pytest
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import columns as columns_module
+from app.columns import infer_kind, to_columns
+
+COLUMNS = ("metric_date", "service_type", "total_trips", "total_revenue")
+ROWS = [
+    (date(2024, 1, 2), "yellow", 100, Decimal("1500.25")),
+    (date(2024, 1, 1), "green", None, None),
+]
+
+
+class TestInferKind:
+    """Test kind inference from driver values"""
+
+    def test_kinds(self):
+        assert infer_kind([None, 3]) == "int"
+        assert infer_kind([Decimal("1.5")]) == "float"
+        assert infer_kind([datetime(2024, 1, 1, 8)]) == "datetime"
+        assert infer_kind([date(2024, 1, 1)]) == "date"
+        assert infer_kind([True]) == "bool"
+        assert infer_kind([None]) == "str"
+
+
+class TestToColumns:
+    """Test typed column output"""
+
+    def test_numpy_columns(self):
+        """Numbers and dates become typed NumPy arrays; NULLs become NaN/NaT"""
+        np = pytest.importorskip("numpy")
+        cols = to_columns(COLUMNS, ROWS, {"total_trips": "int"})
+        assert cols["metric_date"].dtype == np.dtype("datetime64[D]")
+        assert cols["service_type"] == ["yellow", "green"]
+        # An int column containing NULL is widened to float64 with NaN
+        assert cols["total_trips"].dtype == np.float64
+        assert np.isnan(cols["total_trips"][1])
+        assert cols["total_revenue"].tolist()[0] == 1500.25
+
+    def test_array_module_fallback(self, monkeypatch):
+        """Without NumPy numbers use array.array and other columns stay lists"""
+        monkeypatch.setattr(columns_module, "np", None)
+        cols = to_columns(("trip_id", "total_amount", "pickup_date"), [
+            (1, Decimal("9.50"), date(2024, 1, 1)),
+            (2, None, date(2024, 1, 2)),
+        ])
+        assert cols["trip_id"] == array("q", [1, 2])
+        assert cols["total_amount"].typecode == "d"
+        assert cols["pickup_date"] == [date(2024, 1, 1), date(2024, 1, 2)]
+
+    def test_no_rows(self):
+        """Every column is present even for an empty result"""
+        cols = to_columns(COLUMNS, [])
+        assert set(cols) == set(COLUMNS)
+        assert len(cols["total_trips"]) == 0
@@ -0,0 +1,113 @@
+"""
+Compression Tests
+Tests encoding negotiation, the compression middleware and pre-compressed cache entries
+"""
+import asyncio
+import gzip
+import sys
+import os
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import FastAPI, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+from app import compression
+from app.cache import ResultCache, cached
+from app.compression import CompressionMiddleware, choose_encoding, compressible
+
+BIG_JSON = b'{"data":[' + b",".join(b'{"service_type":"yellow"}' for _ in range(200)) + b']}'
+
+
+def make_app():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/big")
+    async def big():
+        return Response(content=BIG_JSON, media_type="application/json", headers={"ETag": '"v1"'})
+
+    @app.get("/small")
+    async def small():
+        return Response(content=b'{"ok":true}', media_type="application/json")
+
+    @app.get("/parquet")
+    async def parquet():
+        return Response(content=b"PAR1" * 500, media_type="application/vnd.apache.parquet")
+
+    @app.get("/stream")
+    async def stream():
+        async def body():
+            for i in range(50):
+                yield f"{i},yellow,2024-01-01\n".encode()
+        return StreamingResponse(body(), media_type="text/csv")
+
+    return app
+
+
+class TestNegotiation:
+    """Test Accept-Encoding parsing and the content-type policy"""
+
+    def test_choose_encoding(self, monkeypatch):
+        monkeypatch.setattr(compression, "brotli", None)
+        assert choose_encoding("gzip, deflate, br") == "gzip"
+        assert choose_encoding("gzip;q=0") is None
+        assert choose_encoding("identity") is None
+        assert choose_encoding(None) is None
+
+    def test_policy(self):
+        assert compressible("application/json", 5000, 1024)
+        assert not compressible("application/json", 100, 1024)
+        assert not compressible("application/vnd.apache.parquet", 5000, 1024)
+
+
+class TestMiddleware:
+    """Test CompressionMiddleware end to end"""
+
+    def test_large_json_is_gzipped(self):
+        client = TestClient(make_app())
+        r = client.get("/big", headers={"Accept-Encoding": "gzip"})
+        assert r.headers["content-encoding"] == "gzip"
+        assert int(r.headers["content-length"]) < len(BIG_JSON)
+        assert r.headers["etag"] == '"v1-gzip"'
+        assert "Accept-Encoding" in r.headers["vary"]
+        assert r.content == BIG_JSON
+
+    def test_small_and_parquet_untouched(self):
+        client = TestClient(make_app())
+        assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+        assert "content-encoding" not in client.get("/parquet", headers={"Accept-Encoding": "gzip"}).headers
+
+    def test_streaming_body(self):
+        client = TestClient(make_app())
+        r = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+        assert r.headers["content-encoding"] == "gzip"
+        assert len(r.text.splitlines()) == 50
+
+
+class TestPrecompressedCache:
+    """Test that cached Response bodies are compressed once"""
+
+    def test_hits_reuse_compressed_body(self, monkeypatch):
+        cache = ResultCache(max_bytes=1024 * 1024, default_ttl=60)
+        calls = []
+        real_compress = compression.compress
+        monkeypatch.setattr(compression, "compress", lambda body, enc: calls.append(enc) or real_compress(body, enc))
+
+        @cached("test", cache=cache)
+        async def endpoint(request, response: Response):
+            return Response(content=BIG_JSON, media_type="application/json")
+
+        def get():
+            request = Request({"type": "http", "headers": [(b"accept-encoding", b"gzip")]})
+            return asyncio.run(endpoint(request=request, response=Response()))
+
+        first = get()
+        compressed_once = len(calls)
+        second = get()
+        assert len(calls) == compressed_once
+        assert second.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(second.body) == BIG_JSON
+        assert first.body == second.body
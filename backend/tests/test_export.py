@@ -0,0 +1,55 @@
+"""
+Export Encoder Tests
+Tests the CSV and NDJSON chunk encoders used by /api/trips/export
+"""
+import csv
+import io
+import json
+import sys
+import os
+from datetime import datetime
+from decimal import Decimal
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.export import csv_header, csv_chunk, ndjson_chunk
+
+COLUMNS = ("trip_id", "dropoff_datetime", "pickup_zone", "total_amount")
+ROWS = [
+    (2, datetime(2024, 1, 2, 8, 30), "Midtown, East", Decimal("12.50")),
+    (1, datetime(2024, 1, 1, 23, 0), None, 7.0),
+]
+
+
+class TestCsvChunks:
+    """Test CSV encoding"""
+
+    def test_header_and_rows_parse_back(self):
+        """Header plus chunks form a valid CSV document with quoting and NULLs"""
+        body = (csv_header(COLUMNS) + csv_chunk(COLUMNS, ROWS)).decode()
+        parsed = list(csv.reader(io.StringIO(body)))
+        assert parsed[0] == list(COLUMNS)
+        assert parsed[1] == ["2", "2024-01-02T08:30:00", "Midtown, East", "12.50"]
+        assert parsed[2][2] == ""
+
+    def test_empty_batch(self):
+        """An empty batch encodes to nothing"""
+        assert csv_chunk(COLUMNS, []) == b""
+
+
+class TestNdjsonChunks:
+    """Test NDJSON encoding"""
+
+    def test_one_object_per_line(self):
+        """Every row becomes one JSON object keyed by column name"""
+        lines = ndjson_chunk(COLUMNS, ROWS).decode().splitlines()
+        assert len(lines) == 2
+        first = json.loads(lines[0])
+        assert first == {
+            "trip_id": 2,
+            "dropoff_datetime": "2024-01-02T08:30:00",
+            "pickup_zone": "Midtown, East",
+            "total_amount": 12.5,
+        }
+        assert json.loads(lines[1])["pickup_zone"] is None
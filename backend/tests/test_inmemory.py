@@ -0,0 +1,189 @@
+"""
+In-Memory Aggregate Store Tests
+Checks the NumPy store returns the same rows the SQL paths would
+"""
+import sys
+import os
+import pytest
+from datetime import date, timedelta
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+pytest.importorskip("numpy")
+
+from app.inmemory import InMemoryAggregates
+
+
+def make_store():
+    daily = []
+    borough = []
+    for day in range(10):
+        metric_date = date(2024, 1, 1) + timedelta(days=day)
+        for service, trips in (("yellow", 100 + day), ("green", 10)):
+            daily.append({
+                "metric_date": metric_date,
+                "service_type": service,
+                "total_trips": trips,
+                "total_revenue": trips * 20.0,
+                "avg_trip_distance": 2.0 if service == "yellow" else 5.0,
+                "avg_trip_duration_sec": 600.0,
+                "avg_fare_amount": None if day == 0 and service == "green" else 20.0,
+            })
+            for name, share in (("Manhattan", 0.75), ("Queens", 0.25)):
+                borough.append({
+                    "metric_date": metric_date,
+                    "service_type": service,
+                    "pickup_borough": name,
+                    "total_trips": int(trips * share),
+                    "total_revenue": trips * share * 20.0,
+                    "total_distance": trips * share * 3.0,
+                    "distance_trips": int(trips * share),
+                })
+    store = InMemoryAggregates()
+    store.load(daily, borough)
+    return store
+
+
+class TestInMemoryAggregates:
+    """Test daily pages and summary rows"""
+
+    def test_daily_page_order_and_pagination(self):
+        """Rows come back metric_date DESC, service_type ASC, paged by offset"""
+        store = make_store()
+        total, rows = store.daily_page(date(2024, 1, 1), date(2024, 1, 10), None, 0, 3)
+        assert total == 20
+        assert [(r["metric_date"], r["service_type"]) for r in rows] == [
+            (date(2024, 1, 10), "green"),
+            (date(2024, 1, 10), "yellow"),
+            (date(2024, 1, 9), "green"),
+        ]
+        total, rows = store.daily_page(date(2024, 1, 1), date(2024, 1, 1), "green", 0, 10)
+        assert total == 1
+        assert rows[0]["avg_fare_amount"] is None
+        assert isinstance(rows[0]["total_trips"], int)
+
+    def test_unknown_service_matches_nothing(self):
+        store = make_store()
+        assert store.daily_page(date(2024, 1, 1), date(2024, 1, 10), "fhv", 0, 10) == (0, [])
+
+    def test_summary_is_trip_weighted(self):
+        """Means are weighted by total_trips, not averaged per day"""
+        store = make_store()
+        summary, by_borough = store.summary_rows(date(2024, 1, 1), date(2024, 1, 10), None)
+        total = next(r for r in summary if r["is_total"])
+        yellow_trips = sum(100 + d for d in range(10))
+        green_trips = 100
+        assert total["total_trips"] == yellow_trips + green_trips
+        expected = (2.0 * yellow_trips + 5.0 * green_trips) / (yellow_trips + green_trips)
+        assert total["avg_distance"] == pytest.approx(expected)
+
+        per_service = {r["service_type"]: r for r in summary if not r["is_total"]}
+        assert per_service["green"]["total_trips"] == green_trips
+        # The NULL fare day is left out of both sides, like the NULL-aware SQL denominator
+        assert per_service["green"]["avg_fare"] == pytest.approx(20.0)
+
+        assert [r["pickup_borough"] for r in by_borough] == ["Manhattan", "Queens"]
+        assert by_borough[0]["avg_distance"] == pytest.approx(3.0, rel=0.02)
+
+    def test_borough_distance_ignores_trips_without_distance(self):
+        """FHV rows (0.0 placeholder distance, not in distance_trips) count as trips but not in avg_distance"""
+        day = date(2024, 1, 1)
+        store = InMemoryAggregates()
+        store.load(
+            [{"metric_date": day, "service_type": "yellow", "total_trips": 100, "total_revenue": 2000.0,
+              "avg_trip_distance": 3.0, "avg_trip_duration_sec": 600.0, "avg_fare_amount": 20.0}],
+            [
+                {"metric_date": day, "service_type": "yellow", "pickup_borough": "Bronx", "total_trips": 100,
+                 "total_revenue": 2000.0, "total_distance": 300.0, "distance_trips": 100},
+                {"metric_date": day, "service_type": "fhv", "pickup_borough": "Bronx", "total_trips": 300,
+                 "total_revenue": 0.0, "total_distance": 0.0, "distance_trips": 0},
+            ]
+        )
+        _, by_borough = store.summary_rows(day, day, None)
+        assert by_borough == [{
+            "pickup_borough": "Bronx", "trip_count": 400, "total_revenue": 2000.0, "avg_distance": 3.0,
+        }]
+
+    def test_summary_skips_null_average_days(self):
+        """A day with a NULL average does not dilute the overall mean"""
+        day = date(2024, 1, 1)
+        store = InMemoryAggregates()
+        store.load(
+            [
+                {"metric_date": day, "service_type": "yellow", "total_trips": 100, "total_revenue": 2000.0,
+                 "avg_trip_distance": 3.0, "avg_trip_duration_sec": 600.0, "avg_fare_amount": 20.0},
+                {"metric_date": day, "service_type": "green", "total_trips": 300, "total_revenue": 0.0,
+                 "avg_trip_distance": None, "avg_trip_duration_sec": 900.0, "avg_fare_amount": None},
+            ],
+            []
+        )
+        summary, _ = store.summary_rows(day, day, None)
+        total = next(r for r in summary if r["is_total"])
+        assert total["total_trips"] == 400
+        assert total["avg_fare"] == pytest.approx(20.0)
+        assert total["avg_distance"] == pytest.approx(3.0)
+        assert total["avg_duration_sec"] == pytest.approx((600.0 * 100 + 900.0 * 300) / 400)
+        green = next(r for r in summary if r["service_type"] == "green")
+        assert green["avg_fare"] is None
+
+    def test_summary_leaves_fhv_placeholders_out(self):
+        """FHV's 0.0 distance and fare are not averaged in; its durations are"""
+        day = date(2024, 1, 1)
+        store = InMemoryAggregates()
+        store.load(
+            [
+                {"metric_date": day, "service_type": "yellow", "total_trips": 100, "total_revenue": 2000.0,
+                 "avg_trip_distance": 3.0, "avg_trip_duration_sec": 600.0, "avg_fare_amount": 20.0},
+                {"metric_date": day, "service_type": "fhv", "total_trips": 300, "total_revenue": 0.0,
+                 "avg_trip_distance": 0.0, "avg_trip_duration_sec": 900.0, "avg_fare_amount": 0.0},
+            ],
+            []
+        )
+        summary, _ = store.summary_rows(day, day, None)
+        total = next(r for r in summary if r["is_total"])
+        assert total["avg_distance"] == pytest.approx(3.0)
+        assert total["avg_fare"] == pytest.approx(20.0)
+        assert total["avg_duration_sec"] == pytest.approx((600.0 * 100 + 900.0 * 300) / 400)
+        fhv = next(r for r in summary if r["service_type"] == "fhv")
+        assert fhv["avg_fare"] is None
+        assert fhv["avg_duration_sec"] == pytest.approx(900.0)
+
+    def test_summary_empty_range(self):
+        """An empty range still yields the grand-total row"""
+        store = make_store()
+        summary, by_borough = store.summary_rows(date(2023, 1, 1), date(2023, 1, 31), None)
+        assert summary == [{
+            "service_type": None, "is_total": 1, "total_trips": 0, "total_revenue": 0.0,
+            "avg_distance": None, "avg_duration_sec": None, "avg_fare": None,
+        }]
+        assert by_borough == []
+
+    def test_weekly_rollup(self):
+        """Weeks start on Monday; sums add up and averages are trip-weighted"""
+        store = make_store()
+        total, rows = store.rollup_page(date(2024, 1, 1), date(2024, 1, 10), None, "week", 0, 10)
+        assert total == 4
+        assert [(r["metric_date"], r["service_type"]) for r in rows] == [
+            (date(2024, 1, 8), "green"),
+            (date(2024, 1, 8), "yellow"),
+            (date(2024, 1, 1), "green"),
+            (date(2024, 1, 1), "yellow"),
+        ]
+        yellow = rows[3]
+        assert yellow["total_trips"] == sum(100 + d for d in range(7))
+        assert yellow["total_revenue"] == pytest.approx(20.0 * yellow["total_trips"])
+        assert yellow["avg_trip_distance"] == pytest.approx(2.0)
+        # The NULL fare day is left out of both sides of the weighted mean
+        assert rows[2]["avg_fare_amount"] == pytest.approx(20.0)
+
+    def test_month_and_year_rollups_match_daily_totals(self):
+        """Coarser buckets keep the same totals as the daily rows"""
+        store = make_store()
+        _, daily = store.daily_page(date(2024, 1, 1), date(2024, 1, 10), "yellow", 0, 100)
+        for granularity in ("month", "year"):
+            total, rows = store.rollup_page(date(2024, 1, 1), date(2024, 1, 10), "yellow", granularity, 0, 10)
+            assert total == 1
+            assert rows[0]["metric_date"] == date(2024, 1, 1)
+            assert rows[0]["total_trips"] == sum(r["total_trips"] for r in daily)
+        assert store.rollup_page(date(2024, 1, 1), date(2024, 1, 10), None, "month", 1, 1)[1][0]["service_type"] == "yellow"
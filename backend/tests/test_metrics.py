@@ -0,0 +1,91 @@
+"""
+Metrics Tests
+Tests the Prometheus text rendering and the route latency middleware
+"""
+import sys
+import os
+import pytest
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.metrics import HTTP_REQUEST_SECONDS, HTTP_REQUESTS_IN_FLIGHT, MetricsMiddleware, MetricsRegistry
+
+
+class TestMetricsRegistry:
+    """Test metric types and the exposition format"""
+
+    def test_counter_and_gauge(self):
+        """Series are rendered per label set with HELP/TYPE headers"""
+        registry = MetricsRegistry()
+        counter = registry.counter("requests_total", "Requests", ("route",))
+        gauge = registry.gauge("in_flight", "In flight")
+        counter.inc("/a")
+        counter.inc("/a", amount=2)
+        counter.inc('/b"')
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+
+        text = registry.render()
+        assert "# TYPE requests_total counter" in text
+        assert 'requests_total{route="/a"} 3' in text
+        assert 'requests_total{route="/b\\""} 1' in text
+        assert "in_flight 1" in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Buckets count observations <= le, plus _sum and _count"""
+        registry = MetricsRegistry()
+        histogram = registry.histogram("latency_seconds", "Latency", ("query",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, "q")
+
+        text = registry.render()
+        assert 'latency_seconds_bucket{query="q",le="0.1"} 2' in text
+        assert 'latency_seconds_bucket{query="q",le="1"} 3' in text
+        assert 'latency_seconds_bucket{query="q",le="+Inf"} 4' in text
+        assert 'latency_seconds_sum{query="q"} 3.65' in text
+        assert 'latency_seconds_count{query="q"} 4' in text
+
+    def test_stats_collector_reads_at_render(self):
+        """register_stats exposes stats() fields as gauges and _total counters"""
+        registry = MetricsRegistry()
+        stats = {"entries": 1, "hits": 5}
+        registry.register_stats("cache", {"result": lambda: stats}, label="cache", gauges=("entries",), counters=("hits",))
+        stats["hits"] = 7
+
+        text = registry.render()
+        assert 'cache_entries{cache="result"} 1' in text
+        assert "# TYPE cache_hits_total counter" in text
+        assert 'cache_hits_total{cache="result"} 7' in text
+
+    def test_label_count_is_checked(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("x_total", "X", ("a",))
+        with pytest.raises(ValueError):
+            counter.inc()
+
+
+class TestMetricsMiddleware:
+    """Test per-route latency recording"""
+
+    def test_records_route_template_and_status(self):
+        """Observations use the route path, not the raw URL; unmatched paths share a series"""
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware)
+
+        @app.get("/items/{item_id}")
+        async def item(item_id: int):
+            return {"id": item_id}
+
+        client = TestClient(app)
+        before = (HTTP_REQUEST_SECONDS.snapshot("GET", "/items/{item_id}", 200) or {"count": 0})["count"]
+        client.get("/items/1")
+        client.get("/items/2")
+        client.get("/nope")
+
+        assert HTTP_REQUEST_SECONDS.snapshot("GET", "/items/{item_id}", 200)["count"] == before + 2
+        assert HTTP_REQUEST_SECONDS.snapshot("GET", "unmatched", 404)["count"] >= 1
+        assert HTTP_REQUESTS_IN_FLIGHT.value("GET") == 0
@@ -0,0 +1,30 @@
+"""
+Pagination Cursor Tests
+Tests the opaque keyset cursors used by /api/trips
+"""
+import sys
+import os
+import pytest
+from datetime import datetime
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.pagination import encode_cursor, decode_cursor, InvalidCursorError
+
+
+class TestTripCursor:
+    """Test cursor encoding and decoding"""
+
+    def test_round_trip(self):
+        """A cursor decodes back to the (dropoff_datetime, trip_id) it was built from"""
+        dropoff = datetime(2024, 1, 31, 23, 59, 12, 500000)
+        token = encode_cursor(dropoff, 159_500_000)
+        assert "=" not in token
+        assert decode_cursor(token) == (dropoff, 159_500_000)
+
+    @pytest.mark.parametrize("token", ["", "not-a-cursor", "W10", "WyJ4IiwxXQ"])
+    def test_invalid_cursor_rejected(self, token):
+        """Garbage tokens raise InvalidCursorError instead of reaching SQL"""
+        with pytest.raises(InvalidCursorError):
+            decode_cursor(token)
@@ -0,0 +1,126 @@
+"""
+Connection Pool Tests
+Exercises app.pool.ConnectionPool against SQLite as a local stand-in for Azure SQL
+"""
+import sqlite3
+import sys
+import os
+import threading
+import time
+import pytest
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.pool import ConnectionPool, PoolTimeoutError, PoolClosedError
+
+
+def sqlite_connect():
+    return sqlite3.connect(":memory:", check_same_thread=False)
+
+
+class TestConnectionPool:
+    """Test pooled connection checkout, recycling and limits"""
+
+    def test_open_prefills_min_size(self):
+        """open() creates min_size idle connections"""
+        pool = ConnectionPool(sqlite_connect, min_size=2, max_size=4)
+        pool.open()
+        stats = pool.stats()
+        assert stats["size"] == 2
+        assert stats["idle"] == 2
+        assert stats["created"] == 2
+        pool.close()
+
+    def test_connection_is_reused(self):
+        """Returned connections are handed out again instead of reconnecting"""
+        pool = ConnectionPool(sqlite_connect, min_size=0, max_size=2)
+        with pool.connection() as first:
+            first.execute("SELECT 1")
+        with pool.connection() as second:
+            assert second is first
+        assert pool.stats()["created"] == 1
+        assert pool.stats()["checkouts"] == 2
+
+    def test_wait_timeout_when_exhausted(self):
+        """Callers time out once max_size connections are checked out"""
+        pool = ConnectionPool(sqlite_connect, min_size=0, max_size=1, timeout=0.05)
+        with pool.connection():
+            with pytest.raises(PoolTimeoutError):
+                with pool.connection():
+                    pass
+        assert pool.stats()["timeouts"] == 1
+        assert pool.stats()["in_use"] == 0
+
+    def test_waiter_gets_released_connection(self):
+        """A waiting caller is woken up when a connection is returned"""
+        pool = ConnectionPool(sqlite_connect, min_size=0, max_size=1, timeout=2)
+        entry = pool.acquire()
+
+        def give_back():
+            time.sleep(0.05)
+            pool.release(entry)
+
+        threading.Thread(target=give_back).start()
+        with pool.connection() as conn:
+            assert conn is entry.conn
+
+    def test_max_lifetime_recycles(self):
+        """Connections older than max_lifetime are replaced on checkout"""
+        pool = ConnectionPool(sqlite_connect, min_size=0, max_size=1, max_lifetime=0.01)
+        with pool.connection() as first:
+            pass
+        time.sleep(0.02)
+        with pool.connection() as second:
+            assert second is not first
+        assert pool.stats()["size"] <= 1
+
+    def test_dead_connection_replaced_on_ping(self):
+        """Idle connections that fail the liveness check are discarded"""
+        pool = ConnectionPool(sqlite_connect, min_size=0, max_size=1, ping_after=0)
+        with pool.connection() as first:
+            pass
+        first.close()  # Simulate the server dropping the connection
+        with pool.connection() as second:
+            assert second is not first
+            assert second.execute("SELECT 1").fetchone() == (1,)
+        assert pool.stats()["failed_pings"] == 1
+
+    def test_broken_connection_discarded_after_error(self):
+        """A connection whose rollback fails after an error is not reused"""
+        pool = ConnectionPool(sqlite_connect, min_size=0, max_size=1)
+        with pytest.raises(sqlite3.ProgrammingError):
+            with pool.connection() as conn:
+                conn.close()
+                conn.execute("SELECT 1")
+        assert pool.stats()["size"] == 0
+
+    def test_concurrent_checkouts_respect_max_size(self):
+        """Never more than max_size connections exist under contention"""
+        pool = ConnectionPool(sqlite_connect, min_size=0, max_size=3, timeout=5)
+        peak = []
+
+        def worker():
+            for _ in range(20):
+                with pool.connection() as conn:
+                    conn.execute("SELECT 1")
+                    peak.append(pool.stats()["in_use"])
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert max(peak) <= 3
+        assert pool.stats()["created"] <= 3
+        assert pool.stats()["in_use"] == 0
+
+    def test_closed_pool_rejects_checkout(self):
+        """close() drains idle connections and refuses new checkouts"""
+        pool = ConnectionPool(sqlite_connect, min_size=1, max_size=1)
+        pool.open()
+        pool.close()
+        assert pool.stats()["size"] == 0
+        with pytest.raises(PoolClosedError):
+            pool.acquire()
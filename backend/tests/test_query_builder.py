@@ -0,0 +1,144 @@
+"""
+Query Builder Tests
+Tests sargable date ranges, parameter binding and schema checks
+"""
+import sys
+import os
+import pytest
+from datetime import date, datetime
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.query_builder import QueryBuilder, SchemaError, check_columns, schema_mismatches, SCHEMA
+
+
+class TestQueryBuilder:
+    """Test SQL generation"""
+
+    def test_date_range_is_half_open_on_datetime_column(self):
+        """DATETIME2 columns get [start 00:00, end + 1 day 00:00) bound as datetimes"""
+        sql, params = (
+            QueryBuilder("fact_trip")
+            .select("trip_id")
+            .where_date_range("dropoff_datetime", date(2024, 1, 1), date(2024, 1, 31))
+            .build()
+        )
+        assert "dropoff_datetime >= ? AND dropoff_datetime < ?" in sql
+        assert "CAST" not in sql
+        assert params == (datetime(2024, 1, 1), datetime(2024, 2, 1))
+
+    def test_date_range_on_date_column_binds_dates(self):
+        """DATE columns keep date parameters so no implicit conversion is needed"""
+        where, params = (
+            QueryBuilder("agg_daily_metrics")
+            .where_date_range("metric_date", date(2024, 1, 1), date(2024, 12, 31))
+            .where_sql()
+        )
+        assert where == "metric_date >= ? AND metric_date < ?"
+        assert params == (date(2024, 1, 1), date(2025, 1, 1))
+
+    def test_top_offset_and_fetch_are_bound(self):
+        """TOP and OFFSET/FETCH values are parameters, not interpolated"""
+        sql, params = (
+            QueryBuilder("agg_daily_metrics")
+            .select("metric_date")
+            .where_equals("service_type", "yellow")
+            .where_equals("metric_date", None)
+            .order_by("metric_date DESC")
+            .top(10)
+            .paginate(200, 100)
+            .build()
+        )
+        assert sql.startswith("SELECT TOP (?) metric_date FROM agg_daily_metrics")
+        assert sql.endswith("OFFSET ? ROWS FETCH NEXT ? ROWS ONLY")
+        assert "200" not in sql
+        assert params == (10, "yellow", 200, 100)
+
+    def test_duckdb_dialect_uses_limit(self):
+        """The duckdb dialect writes TOP and OFFSET/FETCH as trailing LIMIT/OFFSET"""
+        sql, params = (
+            QueryBuilder("fact_trip", "duckdb")
+            .select("trip_id")
+            .where_equals("service_type", "green")
+            .order_by("dropoff_datetime DESC", "trip_id DESC")
+            .top(51)
+            .build()
+        )
+        assert sql == (
+            "SELECT trip_id FROM fact_trip WHERE service_type = ? "
+            "ORDER BY dropoff_datetime DESC, trip_id DESC LIMIT ?"
+        )
+        assert params == ("green", 51)
+
+        sql, params = (
+            QueryBuilder("agg_daily_metrics", "duckdb")
+            .select("metric_date")
+            .order_by("metric_date DESC")
+            .paginate(200, 100)
+            .build()
+        )
+        assert sql.endswith("ORDER BY metric_date DESC LIMIT ? OFFSET ?")
+        assert params == (100, 200)
+
+    def test_unknown_dialect_rejected(self):
+        with pytest.raises(ValueError):
+            QueryBuilder("fact_trip", "oracle")
+
+    def test_keyset_predicate(self):
+        """where_before expands to a lexicographic comparison behind a seekable leading bound"""
+        after = (datetime(2024, 1, 5, 12, 0), 42)
+        where, params = (
+            QueryBuilder("fact_trip")
+            .where_before(("dropoff_datetime", "trip_id"), after)
+            .where_sql()
+        )
+        assert where == "dropoff_datetime <= ? AND (dropoff_datetime < ? OR trip_id < ?)"
+        assert params == (after[0], after[0], 42)
+
+        where, params = (
+            QueryBuilder("fact_trip")
+            .where_before(("pickup_date", "dropoff_datetime", "trip_id"), (after[0].date(),) + after)
+            .where_sql()
+        )
+        assert where == (
+            "pickup_date <= ? AND (pickup_date < ? OR dropoff_datetime < ? "
+            "OR (dropoff_datetime = ? AND trip_id < ?))"
+        )
+        assert params == (after[0].date(), after[0].date(), after[0], after[0], 42)
+
+    def test_count_shares_filters(self):
+        """build_count reuses the same WHERE and parameters"""
+        builder = QueryBuilder("agg_daily_metrics").where_equals("service_type", "fhv")
+        assert builder.build_count() == (
+            "SELECT COUNT(*) FROM agg_daily_metrics WHERE service_type = ?", ("fhv",)
+        )
+
+
+class TestSchemaChecks:
+    """Test schema validation"""
+
+    def test_unknown_table_and_column_rejected(self):
+        """Stale names such as fact_trips / tpep_* fail fast"""
+        with pytest.raises(SchemaError):
+            QueryBuilder("fact_trips")
+        with pytest.raises(SchemaError):
+            QueryBuilder("fact_trip").select("tpep_dropoff_datetime")
+        with pytest.raises(SchemaError):
+            QueryBuilder("fact_trip").order_by("trip_id; DROP TABLE fact_trip")
+
+    def test_schema_mismatches_against_live_columns(self):
+        """Missing tables and columns in the live database are reported"""
+        actual = {table: set(columns) for table, columns in SCHEMA.items()}
+        assert schema_mismatches(actual) == []
+        actual["fact_trip"].discard("dropoff_datetime")
+        del actual["dim_taxi_zone"]
+        assert schema_mismatches(actual) == [
+            "missing column fact_trip.dropoff_datetime",
+            "missing table dim_taxi_zone",
+        ]
+
+    def test_check_columns(self):
+        check_columns("fact_trip", ["trip_id", "pickup_borough"])
+        with pytest.raises(SchemaError):
+            check_columns("agg_daily_metrics", ["pickup_borough"])
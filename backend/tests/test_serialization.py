@@ -0,0 +1,45 @@
+"""
+Serialization Tests
+Tests that the fast JSON path produces the same documents as the response models
+"""
+import json
+import sys
+import os
+from datetime import date, datetime
+from decimal import Decimal
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models import DailyAggregate, Trip
+from app.serialization import dumps, json_response, records
+
+
+class TestFastJson:
+    """Test dumps() and records()"""
+
+    def test_matches_daily_aggregate_model(self):
+        """A driver row encodes exactly like DailyAggregate would"""
+        columns = ("metric_date", "service_type", "total_trips", "total_revenue",
+                   "avg_trip_distance", "avg_trip_duration_sec", "avg_fare_amount")
+        row = (date(2024, 1, 2), "yellow", 1200, Decimal("25000.50"), Decimal("3.10"), None, 18.75)
+        fast = json.loads(dumps(records(columns, [row])[0]))
+        model = json.loads(DailyAggregate(**dict(zip(columns, row))).model_dump_json())
+        assert fast == model
+
+    def test_matches_trip_model_datetimes(self):
+        """Datetimes use the same ISO 8601 form as the Trip model"""
+        record = {
+            "trip_id": 1, "service_type": "green",
+            "pickup_datetime": datetime(2024, 1, 1, 8, 0, 0, 250000),
+            "dropoff_datetime": datetime(2024, 1, 1, 8, 15),
+            "pickup_borough": None, "pickup_zone": None,
+            "dropoff_borough": None, "dropoff_zone": None,
+            "trip_distance": 1.5, "total_amount": 9.0, "trip_duration_sec": 900,
+        }
+        assert json.loads(dumps(record)) == json.loads(Trip(**record).model_dump_json())
+
+    def test_json_response(self):
+        response = json_response({"data": []})
+        assert response.media_type == "application/json"
+        assert response.body == b'{"data":[]}'
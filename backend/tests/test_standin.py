@@ -0,0 +1,87 @@
+"""
+Load Test Harness Tests
+Tests the SQLite stand-in database and the load report helpers
+"""
+import sys
+import os
+from datetime import date, datetime
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks import standin
+from benchmarks.load import chart_granularity, percentile
+
+
+class TestTranslate:
+    """Test the T-SQL to SQLite rewrite"""
+
+    def test_top_moves_first_param_to_limit(self):
+        sql, params = standin.translate(
+            "SELECT TOP (?) trip_id FROM fact_trip WHERE service_type = ? ORDER BY trip_id DESC",
+            [51, "yellow"]
+        )
+        assert sql == "SELECT trip_id FROM fact_trip WHERE service_type = ? ORDER BY trip_id DESC LIMIT ?"
+        assert params == ("yellow", 51)
+
+    def test_offset_fetch_swaps_params(self):
+        sql, params = standin.translate(
+            "SELECT metric_date FROM agg_daily_metrics WHERE metric_date >= ? ORDER BY metric_date "
+            "OFFSET ? ROWS FETCH NEXT ? ROWS ONLY",
+            [date(2024, 1, 1), 100, 50]
+        )
+        assert sql.endswith("ORDER BY metric_date LIMIT ? OFFSET ?")
+        assert params == (date(2024, 1, 1), 50, 100)
+
+    def test_count_big(self):
+        sql, params = standin.translate("SELECT COUNT_BIG(*) FROM fact_trip")
+        assert sql == "SELECT COUNT(*) FROM fact_trip"
+        assert params == ()
+
+
+class TestPopulate:
+    """Test the generated data and the T-SQL connection"""
+
+    def test_aggregates_match_fact_trip(self, tmp_path):
+        path = str(tmp_path / "standin.sqlite")
+        counts = standin.populate(path, days=10, trips_per_day=20)
+        assert counts["agg_service_stats"] == len(standin.SERVICES)
+
+        conn = standin.connect(path)
+        try:
+            cursor = conn.cursor()
+            valid = cursor.execute("SELECT COUNT_BIG(*) FROM fact_trip WHERE is_valid = 1").fetchone()[0]
+            assert cursor.execute("SELECT SUM(total_trips) FROM agg_daily_metrics").fetchone()[0] == valid
+            assert cursor.execute("SELECT SUM(total_trips) FROM agg_daily_borough_metrics").fetchone()[0] == valid
+            assert cursor.execute("SELECT SUM(valid_trips) FROM agg_service_stats").fetchone()[0] == valid
+
+            rows = cursor.execute(
+                "SELECT TOP (?) trip_id, dropoff_datetime, pickup_date FROM fact_trip ORDER BY trip_id", [3]
+            ).fetchall()
+            assert [r[0] for r in rows] == [1, 2, 3]
+            assert isinstance(rows[0][1], datetime)
+            assert rows[-1][2] == date(2024, 12, 22)
+        finally:
+            conn.close()
+
+    def test_deterministic(self, tmp_path):
+        first = standin.populate(str(tmp_path / "a.sqlite"), days=5, trips_per_day=10, seed=3)
+        second = standin.populate(str(tmp_path / "b.sqlite"), days=5, trips_per_day=10, seed=3)
+        assert first == second
+
+
+class TestReportHelpers:
+    """Test percentile and chart granularity helpers"""
+
+    def test_nearest_rank_percentile(self):
+        values = [float(v) for v in range(1, 101)]
+        assert percentile(values, 50) == 50.0
+        assert percentile(values, 95) == 95.0
+        assert percentile(values, 99) == 99.0
+        assert percentile([7.0], 99) == 7.0
+        assert percentile([], 50) == 0.0
+
+    def test_granularity_matches_frontend(self):
+        assert chart_granularity(90) == "day"
+        assert chart_granularity(365) == "month"
+        assert chart_granularity(1826) == "year"
@@ -0,0 +1,113 @@
+"""
+Request Timing Tests
+Tests the Server-Timing header and the slow-query log
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import sys
+import os
+import time
+import pytest
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.timing import RequestTiming, ServerTimingMiddleware, add_timing, current_timing, timed
+
+
+class TestRequestTiming:
+    """Test phase accumulation and header formatting"""
+
+    def test_header_orders_phases_and_counts_queries(self):
+        """Known phases come first in a fixed order, db carries the query count"""
+        timing = RequestTiming("GET", "/api/trips")
+        timing.add("serialize", 0.002)
+        timing.add("db", 0.010)
+        timing.add("db", 0.005)
+        timing.add("db", 0.001, calls=0)  # A further fetch of the same query
+        timing.add("auth", 0.0004)
+
+        header = timing.header()
+        assert header.startswith('auth;dur=0.4, db;dur=16.0;desc="2 queries", serialize;dur=2.0, total;dur=')
+
+    def test_timing_outside_request_is_ignored(self):
+        assert current_timing() is None
+        add_timing("db", 1.0)
+        with timed("serialize"):
+            pass
+
+
+class TestServerTimingMiddleware:
+    """Test the header on real responses"""
+
+    def test_phases_from_handler_and_threads(self):
+        """Time added in the handler and in executor threads (with the context copied) is reported"""
+        import contextvars
+        app = FastAPI()
+        app.add_middleware(ServerTimingMiddleware)
+
+        def query():
+            time.sleep(0.01)
+            add_timing("db", 0.01)
+
+        @app.get("/work")
+        async def work():
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, contextvars.copy_context().run, query)
+            with timed("serialize"):
+                pass
+            return {"ok": True}
+
+        response = TestClient(app).get("/work")
+        header = response.headers["server-timing"]
+        assert 'db;dur=10.0;desc="1 query"' in header
+        assert "serialize;dur=" in header
+        assert "total;dur=" in header
+
+
+class TestSlowQueryLog:
+    """Test slow-query records written by Database"""
+
+    def make_database(self, monkeypatch):
+        try:
+            from app import database
+        except ImportError as e:  # pyodbc needs the ODBC driver manager
+            pytest.skip(f"app.database unavailable: {e}")
+        from app.pool import ConnectionPool
+        monkeypatch.setattr(database.settings, "SLOW_QUERY_MS", 0)
+        db = database.Database()
+        db.pool = ConnectionPool(connect=lambda: sqlite3.connect(":memory:", check_same_thread=False))
+        return db
+
+    def test_record_has_sql_shape_duration_and_rows(self, monkeypatch, caplog):
+        """Parameter types are logged, never their values"""
+        db = self.make_database(monkeypatch)
+        with caplog.at_level(logging.WARNING, logger="app.slow_query"):
+            rows = db.execute_query("SELECT ? AS a, ? AS b   FROM (SELECT 1)", ("secret", 2))
+        assert rows == [{"a": "secret", "b": 2}]
+
+        record = json.loads(caplog.records[-1].getMessage())
+        assert record["event"] == "slow_query"
+        assert record["query"] == "select:-"
+        assert record["params"] == ["str", "int"]
+        assert record["rows"] == 1
+        assert record["sql"] == "SELECT ? AS a, ? AS b FROM (SELECT 1)"
+        assert "secret" not in caplog.text
+
+        # /health shows the label and timing only
+        from app.database import recent_slow_queries
+        assert recent_slow_queries[-1]["query"] == "select:-"
+        assert "sql" not in recent_slow_queries[-1] and "params" not in recent_slow_queries[-1]
+        db.close()
+
+    def test_fast_queries_are_not_logged(self, monkeypatch, caplog):
+        db = self.make_database(monkeypatch)
+        monkeypatch.setattr("app.database.settings.SLOW_QUERY_MS", 60_000)
+        with caplog.at_level(logging.WARNING, logger="app.slow_query"):
+            assert db.execute_scalar("SELECT 1") == 1
+        assert not caplog.records
+        db.close()
@@ -0,0 +1,72 @@
+"""
+Cache Warm-up Tests
+Tests the warm-up target list and progress reporting of CacheWarmer
+"""
+import asyncio
+import sys
+import os
+from datetime import date
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models import ServiceType
+from app.warmup import CacheWarmer, warmup_targets
+
+
+class FakeDatabase:
+    """Answers the anchor query; data_version refreshes run inline"""
+
+    def __init__(self, latest):
+        self.latest = latest
+
+    async def execute_scalar_async(self, query, params=None):
+        return self.latest
+
+    async def run(self, func, *args):
+        return func(*args)
+
+    def execute_query(self, query, params=None):
+        return [{"max_trip_id": 1}]
+
+
+class TestWarmupTargets:
+    """Test which filters are warmed"""
+
+    def test_every_range_and_service(self):
+        """Each range is paired with every service type and with all services"""
+        targets = warmup_targets(date(2024, 12, 31), [7, 30])
+        assert len(targets) == 2 * (len(ServiceType) + 1)
+        assert (date(2024, 12, 25), date(2024, 12, 31), None) in targets
+        assert (date(2024, 12, 2), date(2024, 12, 31), ServiceType.FHVHV) in targets
+
+
+class TestCacheWarmer:
+    """Test CacheWarmer.run() progress and failure handling"""
+
+    def test_progress_counts_failures(self):
+        """Failed filters are counted and logged, the rest still complete"""
+        warmer = CacheWarmer(days=[7, 30, 90], concurrency=2, trips_page_size=50)
+        warmed = []
+
+        async def warm(start_date, end_date, service_type):
+            if service_type is ServiceType.FHV:
+                raise RuntimeError("timeout")
+            warmed.append((start_date, end_date, service_type))
+
+        warmer.warm = warm
+        assert warmer.stats()["state"] == "pending"
+        asyncio.run(warmer.run(FakeDatabase(date(2024, 12, 31))))
+
+        stats = warmer.stats()
+        assert stats["state"] == "done"
+        assert stats["total"] == 15
+        assert stats["completed"] == 12
+        assert stats["failed"] == 3
+        assert stats["progress_pct"] == 100.0
+        assert all(end == date(2024, 12, 31) for _, end, _ in warmed)
+
+    def test_anchor_falls_back_to_today(self):
+        """An empty aggregate table anchors the ranges at today"""
+        warmer = CacheWarmer(days=[7], concurrency=1, trips_page_size=50)
+        assert asyncio.run(warmer.anchor_date(FakeDatabase(None))) == date.today()
@@ -6,8 +6,8 @@ import { NgChartsModule } from 'ng2-charts';
 import { ChartConfiguration, ChartType } from 'chart.js';
 import { ApiService } from '../../services/api.service';
 import { AuthService } from '../../services/auth.service';
-import { DailyAggregate } from '../../models/aggregate.model';
-import { Trip } from '../../models/trip.model';
+import { DailyAggregate, DailyAggregatesResponse } from '../../models/aggregate.model';
+import { Trip, TripsResponse } from '../../models/trip.model';
 import { SummaryStats } from '../../models/summary.model';
 import { Subject } from 'rxjs';
 import { debounceTime, distinctUntilChanged } from 'rxjs/operators';
@@ -40,11 +40,11 @@ export class DashboardComponent implements OnInit {
   chartError: string = '';
   tripError: string = '';
   
-  // Pagination
+  // Pagination (keyset: pageCursors[i] fetches page i + 1)
   currentPage = 1;
   pageSize = 50;
-  totalRecords = 0;
-  totalPages = 0;
+  hasMore = false;
+  private pageCursors: (string | null)[] = [null];
   
   // Full date labels for tooltips
   private fullDateLabels: string[] = [];
@@ -283,74 +283,45 @@ export class DashboardComponent implements OnInit {
   onFilterChange(): void {
     // Reset to page 1 when filters change
     this.currentPage = 1;
+    this.pageCursors = [null];
     // Load data immediately (date pickers trigger on selection, not typing)
     this.loadData();
   }
 
   loadData(): void {
-    this.loadSummary();
-    this.loadAggregates();
-    this.loadTrips();
-  }
-  
-  loadSummary(): void {
+    // Summary, chart data and the first trips page in one round trip
     this.loadingSummary = true;
-    this.summaryError = '';
-    
-    this.apiService.getSummary(
-      this.startDate,
-      this.endDate,
-      this.serviceType || undefined
-    ).subscribe({
-      next: (data) => {
-        this.summary = data;
-        this.loadingSummary = false;
-        this.updatePieChart();
-      },
-      error: (err) => {
-        console.error('Error loading summary:', err);
-        this.summaryError = 'Failed to load summary statistics.';
-        this.loadingSummary = false;
-        if (err.status === 401) {
-          this.authService.logout();
-          this.router.navigate(['/login']);
-        }
-      }
-    });
-  }
-
-  loadAggregates(): void {
     this.loadingChart = true;
+    this.loadingTable = true;
+    this.summaryError = '';
     this.chartError = '';
+    this.tripError = '';
     
-    this.apiService.getDailyAggregates(
+    this.apiService.getDashboard(
       this.startDate,
       this.endDate,
       this.serviceType || undefined,
-      1,
-      10000  // Get all data for chart aggregation
+      this.pageSize,
+      this.chartAggregation()
     ).subscribe({
-      next: (response) => {
-        this.aggregates = response.data;
-        this.updateCharts();
-        this.loadingChart = false;
-        
-        if (this.aggregates.length === 0) {
-          this.chartError = 'No data available for selected date range.';
-        }
+      next: (data) => {
+        this.applySummary(data.summary);
+        this.applyAggregates(data.daily);
+        this.applyTrips(data.trips);
       },
       error: (err) => {
-        console.error('Error loading aggregates:', err);
+        console.error('Error loading dashboard:', err);
+        this.summaryError = 'Failed to load summary statistics.';
         this.chartError = 'Failed to load chart data. Please try again.';
+        this.tripError = 'Failed to load trip records.';
+        this.loadingSummary = false;
         this.loadingChart = false;
-        if (err.status === 401) {
-          this.authService.logout();
-          this.router.navigate(['/login']);
-        }
+        this.loadingTable = false;
+        this.handleAuthError(err);
       }
     });
   }
-
+  
   loadTrips(): void {
     this.loadingTable = true;
     this.tripError = '';
@@ -360,43 +331,77 @@ export class DashboardComponent implements OnInit {
       this.endDate,
       this.serviceType || undefined,
       undefined,
-      this.currentPage,
+      this.pageCursors[this.currentPage - 1],
       this.pageSize
     ).subscribe({
-      next: (response) => {
-        this.trips = response.data;
-        this.totalRecords = response.pagination.total_records;
-        this.totalPages = response.pagination.total_pages;
-        this.loadingTable = false;
-        
-        if (this.trips.length === 0 && !this.tripError) {
-          this.tripError = 'No trip records found for the selected date range and filters.';
-        }
-      },
+      next: (response) => this.applyTrips(response),
       error: (err) => {
         console.error('Error loading trips:', err);
         this.tripError = err.status === 504 || err.statusText === 'Gateway Timeout' 
           ? 'Request timed out. Try a smaller date range.' 
           : 'Failed to load trip records.';
         this.loadingTable = false;
-        if (err.status === 401) {
-          this.authService.logout();
-          this.router.navigate(['/login']);
-        }
+        this.handleAuthError(err);
       }
     });
   }
+  
+  private applySummary(data: SummaryStats): void {
+    this.summary = data;
+    this.loadingSummary = false;
+    this.updatePieChart();
+  }
+  
+  private applyAggregates(response: DailyAggregatesResponse): void {
+    this.aggregates = response.data;
+    this.updateCharts();
+    this.loadingChart = false;
+    
+    if (this.aggregates.length === 0) {
+      this.chartError = 'No data available for selected date range.';
+    }
+  }
+  
+  private applyTrips(response: TripsResponse): void {
+    this.trips = response.data;
+    this.hasMore = response.pagination.has_more;
+    this.pageCursors[this.currentPage] = response.pagination.next_cursor;
+    this.loadingTable = false;
+    
+    if (this.trips.length === 0 && !this.tripError) {
+      this.tripError = 'No trip records found for the selected date range and filters.';
+    }
+  }
+  
+  private handleAuthError(err: any): void {
+    if (err.status === 401) {
+      this.authService.logout();
+      this.router.navigate(['/login']);
+    }
+  }
+
+  private filterDays(): number {
+    const start = new Date(this.startDate + 'T00:00:00');
+    const end = new Date(this.endDate + 'T00:00:00');
+    return Math.floor((end.getTime() - start.getTime()) / (1000 * 60 * 60 * 24));
+  }
+  
+  // X-axis bucket for the selected range; the server rolls the series up to it
+  private chartAggregation(): 'day' | 'month' | 'year' {
+    const daysDiff = this.filterDays();
+    if (daysDiff <= 180) {
+      return 'day';
+    }
+    return daysDiff <= 365 ? 'month' : 'year';
+  }
 
   updateCharts(): void {
     if (this.aggregates.length === 0) return;
     
-    // Calculate date range to determine aggregation strategy
-    const dates = this.aggregates.map(a => new Date(a.metric_date + 'T00:00:00'));
-    const minDate = new Date(Math.min(...dates.map(d => d.getTime())));
-    const maxDate = new Date(Math.max(...dates.map(d => d.getTime())));
-    const daysDiff = Math.floor((maxDate.getTime() - minDate.getTime()) / (1000 * 60 * 60 * 24));
+    // Aggregation follows the selected range (the rows may already be month/year buckets)
+    const daysDiff = this.filterDays();
     
-    console.log(`Date range: ${daysDiff} days (${minDate.toISOString().split('T')[0]} to ${maxDate.toISOString().split('T')[0]})`);
+    console.log(`Date range: ${daysDiff} days (${this.startDate} to ${this.endDate})`);
     
     // Determine aggregation level and chart titles
     // New aggregation rules:
@@ -423,13 +428,7 @@ export class DashboardComponent implements OnInit {
     }
     
     // Determine aggregation level for X-axis
-    if (daysDiff <= 180) {
-      aggregateBy = 'day';
-    } else if (daysDiff <= 365) {
-      aggregateBy = 'month';
-    } else {
-      aggregateBy = 'year';
-    }
+    aggregateBy = this.chartAggregation();
     
     this.chartTitle = 'Trip Volume - Time Series';
     this.revenueChartTitle = 'Revenue';
@@ -620,7 +619,7 @@ export class DashboardComponent implements OnInit {
   }
 
   onPageChange(newPage: number): void {
-    if (newPage < 1 || newPage > this.totalPages) {
+    if (newPage < 1 || (newPage > this.currentPage && !this.hasMore)) {
       return;
     }
     this.currentPage = newPage;
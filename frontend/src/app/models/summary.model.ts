@@ -1,3 +1,6 @@
+import { DailyAggregatesResponse } from './aggregate.model';
+import { TripsResponse } from './trip.model';
+
 export interface SummaryStats {
   total_trips: number;
   total_revenue: number;
@@ -12,6 +15,13 @@ export interface SummaryStats {
   by_borough: {
     pickup_borough: string;
     trip_count: number;
+    total_revenue: number;
     avg_distance: number;
   }[];
 }
+
+export interface DashboardResponse {
+  summary: SummaryStats;
+  daily: DailyAggregatesResponse;
+  trips: TripsResponse;
+}
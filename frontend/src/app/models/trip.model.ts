@@ -14,12 +14,11 @@ export interface Trip {
 
 export interface TripsResponse {
   data: Trip[];
-  pagination: Pagination;
+  pagination: CursorPagination;
 }
 
-export interface Pagination {
-  page: number;
+export interface CursorPagination {
   page_size: number;
-  total_records: number;
-  total_pages: number;
+  next_cursor: string | null;
+  has_more: boolean;
 }
\ No newline at end of file
@@ -4,7 +4,7 @@ import { Observable } from 'rxjs';
 import { environment } from '../../../environments/environment';
 import { DailyAggregatesResponse } from '../models/aggregate.model';
 import { TripsResponse } from '../models/trip.model';
-import { SummaryStats } from '../models/summary.model';
+import { DashboardResponse, SummaryStats } from '../models/summary.model';
 
 @Injectable({
   providedIn: 'root'
@@ -61,13 +61,12 @@ export class ApiService {
     endDate: string,
     serviceType?: string,
     borough?: string,
-    page: number = 1,
+    cursor?: string | null,
     pageSize: number = 100
   ): Observable<TripsResponse> {
     let params = new HttpParams()
       .set('start_date', startDate)
       .set('end_date', endDate)
-      .set('page', page.toString())
       .set('page_size', pageSize.toString());
 
     if (serviceType) {
@@ -76,6 +75,9 @@ export class ApiService {
     if (borough) {
       params = params.set('borough', borough);
     }
+    if (cursor) {
+      params = params.set('cursor', cursor);
+    }
 
     return this.http.get<TripsResponse>(
       `${this.apiUrl}/api/trips`,
@@ -83,6 +85,29 @@ export class ApiService {
     );
   }
 
+  getDashboard(
+    startDate: string,
+    endDate: string,
+    serviceType?: string,
+    tripsPageSize: number = 100,
+    granularity: 'day' | 'week' | 'month' | 'year' = 'day'
+  ): Observable<DashboardResponse> {
+    let params = new HttpParams()
+      .set('start_date', startDate)
+      .set('end_date', endDate)
+      .set('trips_page_size', tripsPageSize.toString())
+      .set('granularity', granularity);
+
+    if (serviceType) {
+      params = params.set('service_type', serviceType);
+    }
+
+    return this.http.get<DashboardResponse>(
+      `${this.apiUrl}/api/dashboard`,
+      { params }
+    );
+  }
+
   getStatistics(): Observable<any> {
     return this.http.get(`${this.apiUrl}/api/statistics`);
   }